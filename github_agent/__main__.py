@@ -19,7 +19,17 @@ from dotenv import load_dotenv
 from google.adk.artifacts import InMemoryArtifactService
 from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions import DatabaseSessionService, InMemorySessionService
+
+from github_agent.session_store import SESSION_KEY_ENV
+from github_agent.shared_state import (
+    DEFAULT_STATE_DIR,
+    SQLITE_TIMEOUT,
+    FileArtifactService,
+    SQLiteTaskStore,
+    enable_wal,
+)
+from github_agent.warm_pool import WarmPoolError, start_warm_pool
 
 
 load_dotenv()
@@ -29,7 +39,25 @@ logging.basicConfig()
 DEFAULT_HOST = 'localhost'
 DEFAULT_PORT = 10003
 
-def main(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+# Cấu hình truyền từ process cha sang các worker của uvicorn
+HOST_ENV = 'GITHUB_AGENT_HOST'
+PORT_ENV = 'GITHUB_AGENT_PORT'
+STATE_DIR_ENV = 'GITHUB_AGENT_STATE_DIR'
+SESSION_DB_ENV = 'GITHUB_AGENT_SESSION_DB'
+
+
+def build_app(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, state_dir: str = ''):
+    """
+    Tạo ASGI app của A2A server
+
+    Args:
+        host: Host trong agent card
+        port: Port trong agent card
+        state_dir: Thư mục state dùng chung giữa các worker (rỗng: giữ trong bộ nhớ)
+
+    Returns:
+        Starlette app
+    """
     
     agent_skills = [
         AgentSkill(
@@ -98,32 +126,88 @@ def main(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
         skills=agent_skills,
     )
 
+    if state_dir:
+        adk_sessions_db = os.path.join(state_dir, 'adk_sessions.db')
+        enable_wal(adk_sessions_db)
+        session_service = DatabaseSessionService(
+            f'sqlite:///{adk_sessions_db}', connect_args={'timeout': SQLITE_TIMEOUT}
+        )
+        artifact_service = FileArtifactService(os.path.join(state_dir, 'artifacts'))
+        task_store = SQLiteTaskStore(os.path.join(state_dir, 'tasks.db'))
+    else:
+        session_service = InMemorySessionService()
+        artifact_service = InMemoryArtifactService()
+        task_store = InMemoryTaskStore()
+
     runner = Runner(
         app_name=agent_card.name,
         agent=root_agent,
-        artifact_service=InMemoryArtifactService(),
-        session_service=InMemorySessionService(),
+        artifact_service=artifact_service,
+        session_service=session_service,
         memory_service=InMemoryMemoryService(),
     )
     agent_executor = GitHubAgentExecutor(runner, agent_card)
 
     request_handler = DefaultRequestHandler(
-        agent_executor=agent_executor, task_store=InMemoryTaskStore()
+        agent_executor=agent_executor, task_store=task_store
     )
 
     a2a_app = A2AStarletteApplication(
         agent_card=agent_card, http_handler=request_handler
     )
 
-    uvicorn.run(a2a_app.build(), host=host, port=port)
+    return a2a_app.build()
+
+
+def create_app():
+    """App factory cho các worker của uvicorn (cấu hình lấy từ environment)"""
+    # Mirror do process cha quản lý, tree index/metadata nằm trong bộ nhớ của từng worker
+    start_warm_pool(mirrors=False)
+    return build_app(
+        os.getenv(HOST_ENV, DEFAULT_HOST),
+        int(os.getenv(PORT_ENV, str(DEFAULT_PORT))),
+        os.getenv(STATE_DIR_ENV, ''),
+    )
+
+
+def _start_warm_pool(indexes: bool = True):
+    """Warm các repository pin trước khi nhận request (sau đó refresh nền)"""
+    try:
+        start_warm_pool(indexes=indexes)
+    except WarmPoolError as e:
+        raise click.UsageError(str(e))
+
+
+def main(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = 1, state_dir: str = ''):
+    if workers <= 1:
+        _start_warm_pool()
+        uvicorn.run(build_app(host, port, state_dir), host=host, port=port)
+        return
+
+    # Worker là process riêng: mọi state dùng chung phải nằm ngoài bộ nhớ
+    state_dir = os.path.abspath(state_dir or DEFAULT_STATE_DIR)
+    os.environ.setdefault(SESSION_DB_ENV, os.path.join(state_dir, 'github_sessions.db'))
+    if not os.getenv(SESSION_KEY_ENV):
+        raise click.UsageError(
+            f'--workers > 1 cần {SESSION_KEY_ENV} (Fernet key) để lưu GitHub session dùng chung'
+        )
+    _start_warm_pool(indexes=False)
+    os.environ[HOST_ENV] = host
+    os.environ[PORT_ENV] = str(port)
+    os.environ[STATE_DIR_ENV] = state_dir
+    uvicorn.run(
+        'github_agent.__main__:create_app', factory=True, host=host, port=port, workers=workers
+    )
 
 
 @click.command()
 @click.option('--host', 'host', default=DEFAULT_HOST)
 @click.option('--port', 'port', default=DEFAULT_PORT)
-def cli(host: str, port: int):
-    main(host, port)
+@click.option('--workers', 'workers', default=1, help='Số worker process (> 1 dùng state dùng chung)')
+@click.option('--state-dir', 'state_dir', default='', help='Thư mục state dùng chung (SQLite/file)')
+def cli(host: str, port: int, workers: int, state_dir: str):
+    main(host, port, workers, state_dir)
 
 
 if __name__ == '__main__':
-    main()
+    cli()
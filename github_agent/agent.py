@@ -10,17 +10,28 @@ from .tools import (
     validate_github_url,
     validate_github_token,
     show_github_setup_guide,
+    list_sessions,
+    cleanup_expired_sessions,
+    get_github_api_stats
+)
+# Session-based tools dùng bản async để không chặn event loop khi chờ GitHub
+from .async_tools import (
     create_github_session,
     get_repository_info_session,
+    get_repository_overview_session,
     clone_repository_session,
     get_repository_content_session,
+    get_repository_tree_session,
     get_file_content_session,
     list_pull_requests_session,
+    list_branches_session,
+    list_commits_session,
+    list_issues_session,
     get_pull_request_session,
     get_pull_request_diff_session,
     search_code_session,
-    list_sessions,
-    cleanup_expired_sessions
+    search_local_code_session,
+    search_relevant_code_session,
 )
 from dotenv import load_dotenv
 load_dotenv()
@@ -43,17 +54,25 @@ github_agent = LlmAgent(
         # Session-based tools
         FunctionTool(create_github_session),
         FunctionTool(get_repository_info_session),
+        FunctionTool(get_repository_overview_session),
         FunctionTool(clone_repository_session),
         FunctionTool(get_repository_content_session),
+        FunctionTool(get_repository_tree_session),
         FunctionTool(get_file_content_session),
         FunctionTool(list_pull_requests_session),
+        FunctionTool(list_branches_session),
+        FunctionTool(list_commits_session),
+        FunctionTool(list_issues_session),
         FunctionTool(get_pull_request_session),
         FunctionTool(get_pull_request_diff_session),
         FunctionTool(search_code_session),
+        FunctionTool(search_local_code_session),
+        FunctionTool(search_relevant_code_session),
         
         # Session management tools
         FunctionTool(list_sessions),
         FunctionTool(cleanup_expired_sessions),
+        FunctionTool(get_github_api_stats),
     ],
     # Store output cho debugging
     output_key="github_agent_result"
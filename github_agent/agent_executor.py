@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 from typing import TYPE_CHECKING
@@ -20,6 +21,8 @@ from a2a.utils.errors import ServerError
 from google.adk import Runner
 from google.genai import types
 
+from .progress import reset_progress_reporter, set_progress_reporter
+
 
 if TYPE_CHECKING:
     from google.adk.sessions.session import Session
@@ -40,6 +43,8 @@ class GitHubAgentExecutor(AgentExecutor):
         self._card = card
         # Track active sessions for potential cancellation
         self._active_sessions: set[str] = set()
+        # Running execute() tasks by task_id, cancelled from cancel()
+        self._running_tasks: dict[str, asyncio.Task] = {}
 
     async def _process_request(
         self,
@@ -55,6 +60,17 @@ class GitHubAgentExecutor(AgentExecutor):
         # Track this session as active
         self._active_sessions.add(session_id)
 
+        async def report_progress(message: str) -> None:
+            await task_updater.update_status(
+                TaskState.working,
+                message=task_updater.new_agent_message(
+                    [TextPart(text=message)]
+                ),
+            )
+
+        # Long-running tools (e.g. clone) stream progress through this reporter
+        progress_token = set_progress_reporter(report_progress)
+
         try:
             async for event in self.runner.run_async(
                 session_id=session_id,
@@ -92,6 +108,7 @@ class GitHubAgentExecutor(AgentExecutor):
                 else:
                     logger.debug('Skipping event')
         finally:
+            reset_progress_reporter(progress_token)
             # Remove from active sessions when done
             self._active_sessions.discard(session_id)
 
@@ -106,37 +123,44 @@ class GitHubAgentExecutor(AgentExecutor):
         if not context.current_task:
             await updater.update_status(TaskState.submitted)
         await updater.update_status(TaskState.working)
-        await self._process_request(
-            types.UserContent(
-                parts=[
-                    convert_a2a_part_to_genai(part)
-                    for part in context.message.parts
-                ],
-            ),
-            context.context_id,
-            updater,
-        )
+        self._running_tasks[context.task_id] = asyncio.current_task()
+        try:
+            await self._process_request(
+                types.UserContent(
+                    parts=[
+                        convert_a2a_part_to_genai(part)
+                        for part in context.message.parts
+                    ],
+                ),
+                context.context_id,
+                updater,
+            )
+        finally:
+            self._running_tasks.pop(context.task_id, None)
         logger.debug('[weather] execute exiting')
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
         """Cancel the execution for the given context.
 
-        Currently logs the cancellation attempt as the underlying ADK runner
-        doesn't support direct cancellation of ongoing tasks.
+        Cancels the running execute() task. Tools awaiting async work (e.g. a
+        git clone subprocess) receive CancelledError, kill their process and
+        clean up partial output.
         """
         session_id = context.context_id
-        if session_id in self._active_sessions:
-            logger.info(
-                f'Cancellation requested for active weather session: {session_id}'
-            )
-            # TODO: Implement proper cancellation when ADK supports it
-            self._active_sessions.discard(session_id)
-        else:
+        task = self._running_tasks.get(context.task_id)
+        if task is None or task.done():
             logger.debug(
                 f'Cancellation requested for inactive weather session: {session_id}'
             )
+            raise ServerError(error=UnsupportedOperationError())
 
-        raise ServerError(error=UnsupportedOperationError())
+        logger.info(
+            f'Cancellation requested for active weather session: {session_id}'
+        )
+        task.cancel()
+        self._active_sessions.discard(session_id)
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.cancel()
 
     async def _upsert_session(self, session_id: str) -> 'Session':
         """Retrieves a session if it exists, otherwise creates a new one.
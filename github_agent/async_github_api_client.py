@@ -0,0 +1,548 @@
+"""
+Async GitHub API Client - phiên bản asyncio của GitHubAPIClient
+Không block event loop khi chờ network, cho phép nhiều conversation
+và nhiều function call song song cùng chờ GitHub
+"""
+import asyncio
+import functools
+import json
+import subprocess
+import tempfile
+from typing import Dict, Any, AsyncIterator, BinaryIO, List, Optional, Tuple
+from urllib.parse import quote
+from .session_manager import session_manager
+from .repo_context import repo_context_stats
+from .http_transport import AsyncHTTPTransport, get_async_transport
+from .response_cache import ResponseCache, get_response_cache, token_scope
+from .rate_limiter import RateLimitScheduler, get_rate_limit_scheduler, resource_for_url
+from .pagination import aiter_items, page_size_for, parse_next_link
+from .tree_index import TREE_WALK_CONCURRENCY, RepositoryTreeIndex, TreeIndexCache, TreeWalker, get_tree_index_cache
+from .blob_cache import BlobCache, get_blob_cache
+from .git_clone import CloneProfile, clone_with_profile_async
+from .diff_parser import DIFF_MEDIA_TYPE, PullRequestDiffTooLargeError
+from .graphql_queries import OverviewBuilder, check_response, record_query_cost
+from .mirror_cache import GitCommandError, MirrorCache, get_mirror_cache
+from .single_flight import AsyncSingleFlight, FlightResult, flight_key, get_async_single_flight, get_public_repos
+from .github_api_client import (
+    COMMIT_SHA_RE,
+    build_clone_path,
+    raise_for_github_status,
+    wrap_content_listing,
+    decode_file_content,
+    file_content_from_blob,
+    file_excerpt_result,
+    needs_excerpt,
+)
+from .large_file import (
+    CHUNK_SIZE,
+    DEFAULT_LARGE_FILE_BYTES,
+    DEFAULT_SPOOL_BYTES,
+    RAW_MEDIA_TYPE,
+    build_excerpt,
+)
+
+
+class AsyncGitHubAPIClient:
+    """Client asyncio để tương tác với GitHub API"""
+
+    def __init__(self, session_id: str, transport: Optional[AsyncHTTPTransport] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 scheduler: Optional[RateLimitScheduler] = None,
+                 tree_index_cache: Optional[TreeIndexCache] = None,
+                 blob_cache: Optional[BlobCache] = None,
+                 mirror_cache: Optional[MirrorCache] = None,
+                 single_flight: Optional[AsyncSingleFlight] = None):
+        self.session_id = session_id
+        self.base_url = "https://api.github.com"
+        self._transport = transport
+        # Các cache và rate limit scheduler dùng chung với client sync
+        self.response_cache = response_cache or get_response_cache()
+        self.scheduler = scheduler or get_rate_limit_scheduler()
+        self.tree_index_cache = tree_index_cache or get_tree_index_cache()
+        self.blob_cache = blob_cache or get_blob_cache()
+        self.mirror_cache = mirror_cache or get_mirror_cache()
+        self.single_flight = single_flight or get_async_single_flight()
+        self.public_repos = get_public_repos()
+
+    @property
+    def transport(self) -> AsyncHTTPTransport:
+        # Lấy lazy vì transport gắn với event loop đang chạy
+        if self._transport is None:
+            self._transport = get_async_transport()
+        return self._transport
+
+    def _get_token(self) -> str:
+        """Lấy PAT của session"""
+        token = session_manager.get_token(self.session_id)
+        if not token:
+            raise ValueError(f"Session {self.session_id} không tồn tại hoặc đã hết hạn")
+        return token
+
+    def _get_headers(self, token: Optional[str] = None) -> Dict[str, str]:
+        """Lấy headers với authentication từ session"""
+        token = token or self._get_token()
+
+        return {
+            "Authorization": f"token {token}",
+            "Accept": "application/vnd.github.v3+json",
+            "User-Agent": "GitHub-Agent/1.0"
+        }
+
+    async def _send(self, method: str, url: str, headers: Dict[str, str], scope: str, cost: int = 1, **kwargs):
+        """Gửi request qua rate limit scheduler (xem GitHubAPIClient._send)"""
+        resource = resource_for_url(url)
+        attempt = 0
+        while True:
+            wait = self.scheduler.acquire(scope, resource, cost)
+            if wait:
+                await asyncio.sleep(wait)
+
+            response = await self.transport.request(method, url, headers=headers, **kwargs)
+            repo_context_stats.record(self.session_id, api_calls=1)
+            self.scheduler.update_from_headers(scope, response.headers, resource)
+            if kwargs.get("stream") and response.status_code >= 400:
+                # Body lỗi nhỏ, đọc luôn để kiểm tra rate limit và báo lỗi
+                await response.aread()
+
+            delay = self.scheduler.retry_delay(attempt, response)
+            if delay is None:
+                break
+            await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        self.scheduler.raise_if_rate_limited(response)
+        return response
+
+    def get_rate_limit_budget(self) -> Dict[str, Dict[str, Any]]:
+        """Lấy rate limit budget hiện tại của token trong session"""
+        return self.scheduler.get_budget(token_scope(self._get_token()))
+
+    async def _request(self, method: str, endpoint: str, cacheable: bool = False, accept: Optional[str] = None,
+                       parse_json: bool = True, **kwargs) -> Tuple[Any, Optional[str]]:
+        """Thực hiện HTTP request bất đồng bộ tới GitHub API (xem GitHubAPIClient._request)"""
+        token = self._get_token()
+        scope = token_scope(token)
+        headers = self._get_headers(token)
+        if accept:
+            headers["Accept"] = accept
+        if endpoint.startswith(("http://", "https://")):
+            url = endpoint
+        else:
+            url = f"{self.base_url}/{endpoint.lstrip('/')}"
+
+        if method == "GET" and not kwargs.get("stream"):
+            key = flight_key(self.public_repos.flight_scope(scope, url), url, kwargs.get("params"), headers["Accept"])
+            status_code, body, link = await self.single_flight.do(
+                key, lambda: self._fetch(method, url, headers, scope, cacheable, **kwargs), scope
+            )
+        else:
+            status_code, body, link = await self._fetch(method, url, headers, scope, cacheable, **kwargs)
+
+        raise_for_github_status(status_code, body.decode("utf-8", errors="replace") if status_code >= 400 else "")
+
+        if not parse_json:
+            return body.decode("utf-8", errors="replace"), link
+        return (json.loads(body) if body else {}), link
+
+    async def _fetch(self, method: str, url: str, headers: Dict[str, str], scope: str, cacheable: bool,
+                     **kwargs) -> FlightResult:
+        """Gửi request qua response cache nếu cacheable (xem GitHubAPIClient._fetch)"""
+        cache_key = cache_entry = None
+        if cacheable and method == "GET":
+            cache_key, cache_entry = self.response_cache.prepare_request(
+                scope, url, kwargs.get("params"), headers
+            )
+
+        response = await self._send(method, url, headers, scope, **kwargs)
+
+        body, link = response.content, response.headers.get("Link")
+        if cache_key is not None:
+            body, link = self.response_cache.resolve_response(
+                cache_key, cache_entry, response.status_code, response.headers, body
+            )
+        return response.status_code, body, link
+
+    async def _make_request(self, method: str, endpoint: str, cacheable: bool = False, **kwargs) -> Any:
+        """Thực hiện HTTP request bất đồng bộ tới GitHub API, chỉ trả về JSON body"""
+        return (await self._request(method, endpoint, cacheable=cacheable, **kwargs))[0]
+
+    async def _fetch_page(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                          cacheable: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Lấy một trang của list endpoint, trả về (items, URL trang kế tiếp)"""
+        items, link = await self._request("GET", endpoint, cacheable=cacheable, params=params)
+        return items, parse_next_link(link)
+
+    def iter_paginated(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                       max_items: Optional[int] = None, per_page: Optional[int] = None,
+                       cacheable: bool = False, prefetch: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Duyệt lazy (async for) tất cả item của một list endpoint (xem GitHubAPIClient.iter_paginated)"""
+        params = dict(params or {})
+        params["per_page"] = page_size_for(max_items, per_page)
+        fetch_page = functools.partial(self._fetch_page, cacheable=cacheable)
+        return aiter_items(fetch_page, endpoint, params, max_items, prefetch)
+
+    @staticmethod
+    async def _collect(items: AsyncIterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [item async for item in items]
+
+    async def get_repository_info(self, owner: str, repo: str) -> Dict[str, Any]:
+        """Lấy thông tin repository (xem GitHubAPIClient.get_repository_info)"""
+        repo_info = await self._make_request("GET", f"repos/{owner}/{repo}", cacheable=True)
+        self.public_repos.mark(owner, repo, repo_info.get("private") is False)
+        return repo_info
+
+    async def graphql(self, query: str, variables: Optional[Dict[str, Any]] = None, cost: int = 1) -> Dict[str, Any]:
+        """Gửi GraphQL query (xem GitHubAPIClient.graphql)"""
+        token = self._get_token()
+        scope = token_scope(token)
+        response = await self._send("POST", f"{self.base_url}/graphql", self._get_headers(token), scope,
+                                    cost=cost, json={"query": query, "variables": variables or {}})
+
+        raise_for_github_status(response.status_code, response.text)
+
+        data = check_response(response.json())
+        record_query_cost(self.scheduler, scope, data)
+        return data
+
+    async def get_repository_overview(self, owner: str, repo: str, max_items: int = 30) -> Dict[str, Any]:
+        """Lấy overview của repository qua GraphQL (xem GitHubAPIClient.get_repository_overview)"""
+        builder = OverviewBuilder(owner, repo, max_items)
+        request = builder.next_query()
+        while request is not None:
+            query, variables, cost = request
+            builder.feed(await self.graphql(query, variables, cost))
+            request = builder.next_query()
+        return builder.result()
+
+    async def get_repository_content(self, owner: str, repo: str, path: str = "", ref: str = "") -> List[Dict[str, Any]]:
+        """Lấy nội dung thư mục hoặc file (xem GitHubAPIClient.get_repository_content)"""
+        endpoint = f"repos/{owner}/{repo}/contents/{path}"
+        params = {"ref": ref} if ref else {}
+
+        result = await self._make_request("GET", endpoint, cacheable=True, params=params)
+
+        return wrap_content_listing(result)
+
+    async def get_file_content(self, owner: str, repo: str, path: str, ref: str = "") -> Dict[str, Any]:
+        """Lấy nội dung của một file cụ thể, đọc blob cache trước (xem GitHubAPIClient.get_file_content)"""
+        index = self.get_cached_tree_index(owner, repo, ref)
+        entry = index.get(path) if index is not None else None
+        if entry is not None and entry.type == "blob":
+            data = await asyncio.to_thread(self.blob_cache.get, entry.sha)
+            if data is not None:
+                return file_content_from_blob(entry, data)
+
+        endpoint = f"repos/{owner}/{repo}/contents/{path}"
+        params = {"ref": ref} if ref else {}
+
+        result = await self._make_request("GET", endpoint, cacheable=True, params=params)
+
+        # Ghi blob cache là I/O đĩa nên chạy ngoài event loop
+        return await asyncio.to_thread(decode_file_content, result, self.blob_cache)
+
+    async def _download_raw(self, owner: str, repo: str, path: str, ref: str = "") -> Tuple[BinaryIO, int]:
+        """Stream nội dung raw của file vào spooled temp file (xem GitHubAPIClient._download_raw)"""
+        token = self._get_token()
+        scope = token_scope(token)
+        headers = self._get_headers(token)
+        headers["Accept"] = RAW_MEDIA_TYPE
+        url = f"{self.base_url}/repos/{owner}/{repo}/contents/{path}"
+        params = {"ref": ref} if ref else {}
+
+        response = await self._send("GET", url, headers, scope, params=params, stream=True)
+        try:
+            raise_for_github_status(response.status_code, response.text if response.status_code >= 400 else "",
+                                    "File không tồn tại")
+            spool = tempfile.SpooledTemporaryFile(max_size=DEFAULT_SPOOL_BYTES)
+            size = 0
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                spool.write(chunk)
+                size += len(chunk)
+            spool.seek(0)
+            return spool, size
+        finally:
+            await response.aclose()
+
+    async def get_file_excerpt(self, owner: str, repo: str, path: str, ref: str = "", start_line: int = 1,
+                               sha: Optional[str] = None) -> Dict[str, Any]:
+        """Đọc file lớn với bộ nhớ cố định (xem GitHubAPIClient.get_file_excerpt)"""
+        if sha is None:
+            index = self.get_cached_tree_index(owner, repo, ref)
+            entry = index.get(path) if index is not None else None
+            sha = entry.sha if entry is not None and entry.type == "blob" else None
+
+        cached = self.blob_cache.open(sha) if sha else None
+        if cached is not None:
+            with cached:
+                excerpt = await asyncio.to_thread(build_excerpt, cached, start_line, path=path)
+            return file_excerpt_result(path, sha, excerpt, "blob_cache")
+
+        spool, size = await self._download_raw(owner, repo, path, ref)
+
+        def store_and_excerpt() -> Tuple[Optional[str], Dict[str, Any]]:
+            with spool:
+                stored_sha = self.blob_cache.put_stream(spool, size)
+                spool.seek(0)
+                return stored_sha, build_excerpt(spool, start_line, path=path)
+
+        # Ghi blob cache và quét file là I/O đĩa nên chạy ngoài event loop
+        stored_sha, excerpt = await asyncio.to_thread(store_and_excerpt)
+        return file_excerpt_result(path, stored_sha or sha, excerpt, "raw")
+
+    async def read_file(self, owner: str, repo: str, path: str, ref: str = "",
+                        start_line: int = 1) -> Dict[str, Any]:
+        """Đọc file cho tool, file lớn chỉ trả về đoạn trích (xem GitHubAPIClient.read_file)"""
+        index = self.get_cached_tree_index(owner, repo, ref)
+        entry = index.get(path) if index is not None else None
+        if entry is not None and entry.type == "blob" and (entry.size or 0) > DEFAULT_LARGE_FILE_BYTES:
+            return await self.get_file_excerpt(owner, repo, path, ref, start_line, entry.sha)
+
+        result = await self.get_file_content(owner, repo, path, ref)
+        if not needs_excerpt(result, start_line):
+            return result
+        return await self.get_file_excerpt(owner, repo, path, ref, start_line, result.get("sha"))
+
+    async def resolve_commit_sha(self, owner: str, repo: str, ref: str = "") -> str:
+        """Resolve branch/tag/commit thành commit SHA (xem GitHubAPIClient.resolve_commit_sha)"""
+        ref = ref or "HEAD"
+        if COMMIT_SHA_RE.fullmatch(ref):
+            return ref
+
+        scope = token_scope(self._get_token())
+        commit_sha = self.tree_index_cache.resolve_ref(scope, owner, repo, ref)
+        if commit_sha:
+            return commit_sha
+
+        commit_sha, _ = await self._request(
+            "GET", f"repos/{owner}/{repo}/commits/{quote(ref, safe='/')}",
+            cacheable=True, accept="application/vnd.github.sha", parse_json=False
+        )
+        commit_sha = commit_sha.strip()
+        self.tree_index_cache.remember_ref(scope, owner, repo, ref, commit_sha)
+        return commit_sha
+
+    async def get_tree(self, owner: str, repo: str, tree_sha: str, recursive: bool = False) -> Dict[str, Any]:
+        """Lấy git tree (xem GitHubAPIClient.get_tree)"""
+        params = {"recursive": "1"} if recursive else {}
+        return await self._make_request("GET", f"repos/{owner}/{repo}/git/trees/{tree_sha}", cacheable=True, params=params)
+
+    async def get_tree_index(self, owner: str, repo: str, ref: str = "") -> RepositoryTreeIndex:
+        """
+        Lấy path index của toàn bộ repository tại một ref (xem GitHubAPIClient.get_tree_index)
+
+        Khi phải walk subtree, các subtree cùng cấp được lấy song song (tối đa
+        TREE_WALK_CONCURRENCY request cùng lúc)
+        """
+        commit_sha = await self.resolve_commit_sha(owner, repo, ref)
+        index = self.tree_index_cache.get(owner, repo, commit_sha)
+        if index is not None:
+            return index
+
+        slots = asyncio.Semaphore(max(1, TREE_WALK_CONCURRENCY))
+
+        async def fetch(tree_sha: str, recursive: bool) -> Dict[str, Any]:
+            async with slots:
+                return await self.get_tree(owner, repo, tree_sha, recursive)
+
+        walker = TreeWalker(commit_sha)
+        while True:
+            batch = walker.next_requests()
+            if not batch:
+                break
+            # Một batch có thể tới DEFAULT_MAX_TREE_WALKS subtree
+            responses = await asyncio.gather(*[
+                fetch(tree_sha, recursive) for _, tree_sha, recursive in batch
+            ])
+            for (base_path, tree_sha, recursive), response in zip(batch, responses):
+                walker.feed(base_path, tree_sha, recursive, response)
+
+        index = walker.build()
+        self.tree_index_cache.put(owner, repo, index, walker.subtree_walks)
+        return index
+
+    def get_cached_tree_index(self, owner: str, repo: str, ref: str = "") -> Optional[RepositoryTreeIndex]:
+        """Lấy tree index đã có sẵn cho ref mà không gọi network"""
+        ref = ref or "HEAD"
+        commit_sha = ref if COMMIT_SHA_RE.fullmatch(ref) else self.tree_index_cache.resolve_ref(
+            token_scope(self._get_token()), owner, repo, ref
+        )
+        if not commit_sha:
+            return None
+        return self.tree_index_cache.get(owner, repo, commit_sha)
+
+    async def search_code(self, query: str, owner: str = "", repo: str = "") -> Dict[str, Any]:
+        """Tìm kiếm code trong repository (xem GitHubAPIClient.search_code)"""
+        search_query = query
+        if owner and repo:
+            search_query += f" repo:{owner}/{repo}"
+
+        return await self._make_request("GET", "search/code", params={"q": search_query})
+
+    async def list_branches(self, owner: str, repo: str, per_page: int = 100, max_items: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Liệt kê các branch của repository (xem GitHubAPIClient.list_branches)"""
+        if max_items is not None:
+            return await self._collect(self.iter_branches(owner, repo, max_items=max_items, per_page=per_page))
+
+        endpoint = f"repos/{owner}/{repo}/branches"
+        return await self._make_request("GET", endpoint, cacheable=True, params={"per_page": per_page})
+
+    def iter_branches(self, owner: str, repo: str, max_items: Optional[int] = None,
+                      per_page: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Duyệt lazy các branch qua tất cả các trang"""
+        return self.iter_paginated(f"repos/{owner}/{repo}/branches", max_items=max_items,
+                                   per_page=per_page, cacheable=True)
+
+    async def list_commits(self, owner: str, repo: str, sha: str = "", path: str = "", per_page: int = 30,
+                           max_items: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Liệt kê commits của repository (xem GitHubAPIClient.list_commits)"""
+        if max_items is not None:
+            return await self._collect(self.iter_commits(owner, repo, sha, path, max_items=max_items, per_page=per_page))
+
+        endpoint = f"repos/{owner}/{repo}/commits"
+        params = {"per_page": per_page}
+        if sha:
+            params["sha"] = sha
+        if path:
+            params["path"] = path
+
+        return await self._make_request("GET", endpoint, params=params)
+
+    def iter_commits(self, owner: str, repo: str, sha: str = "", path: str = "",
+                     max_items: Optional[int] = None, per_page: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Duyệt lazy commits qua tất cả các trang"""
+        params = {}
+        if sha:
+            params["sha"] = sha
+        if path:
+            params["path"] = path
+        return self.iter_paginated(f"repos/{owner}/{repo}/commits", params,
+                                   max_items=max_items, per_page=per_page)
+
+    async def get_commit(self, owner: str, repo: str, sha: str) -> Dict[str, Any]:
+        """Lấy thông tin chi tiết của một commit"""
+        return await self._make_request("GET", f"repos/{owner}/{repo}/commits/{sha}")
+
+    async def list_pull_requests(self, owner: str, repo: str, state: str = "open", per_page: int = 30,
+                                 max_items: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Liệt kê pull requests (xem GitHubAPIClient.list_pull_requests)"""
+        if max_items is not None:
+            return await self._collect(self.iter_pull_requests(owner, repo, state, max_items=max_items, per_page=per_page))
+
+        endpoint = f"repos/{owner}/{repo}/pulls"
+        params = {"state": state, "per_page": per_page}
+
+        return await self._make_request("GET", endpoint, cacheable=True, params=params)
+
+    def iter_pull_requests(self, owner: str, repo: str, state: str = "open", max_items: Optional[int] = None,
+                           per_page: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Duyệt lazy pull requests qua tất cả các trang"""
+        return self.iter_paginated(f"repos/{owner}/{repo}/pulls", {"state": state},
+                                   max_items=max_items, per_page=per_page, cacheable=True)
+
+    async def get_pull_request(self, owner: str, repo: str, number: int) -> Dict[str, Any]:
+        """Lấy thông tin chi tiết của một pull request"""
+        return await self._make_request("GET", f"repos/{owner}/{repo}/pulls/{number}")
+
+    async def get_pull_request_diff(self, owner: str, repo: str, number: int) -> str:
+        """Lấy diff của pull request ở dạng text (xem GitHubAPIClient.get_pull_request_diff)"""
+        token = self._get_token()
+        scope = token_scope(token)
+        headers = self._get_headers(token)
+        headers["Accept"] = DIFF_MEDIA_TYPE
+        url = f"{self.base_url}/repos/{owner}/{repo}/pulls/{number}"
+
+        cache_key, cache_entry = self.response_cache.prepare_request(scope, url, None, headers)
+        response = await self._send("GET", url, headers, scope)
+        body, _ = self.response_cache.resolve_response(
+            cache_key, cache_entry, response.status_code, response.headers, response.content
+        )
+
+        if response.status_code == 406:
+            raise PullRequestDiffTooLargeError(f"Diff của pull request #{number} vượt giới hạn của GitHub")
+        raise_for_github_status(response.status_code, response.text, "Pull request không tồn tại")
+
+        return body.decode("utf-8", errors="replace")
+
+    def iter_pull_request_files(self, owner: str, repo: str, number: int, max_items: Optional[int] = None,
+                                per_page: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Duyệt lazy các file thay đổi của pull request"""
+        return self.iter_paginated(f"repos/{owner}/{repo}/pulls/{number}/files", max_items=max_items,
+                                   per_page=per_page, cacheable=True)
+
+    async def clone_repository(self, owner: str, repo: str, destination_path: Optional[str] = None,
+                               profile: Optional[CloneProfile] = None) -> Dict[str, Any]:
+        """
+        Clone repository về local (xem GitHubAPIClient.clone_repository)
+
+        git chạy dạng asyncio subprocess: không giữ worker thread, gửi tiến độ
+        qua TaskUpdater và bị kill khi task bị cancel
+        """
+        profile = profile or CloneProfile()
+        try:
+            token = session_manager.get_token(self.session_id)
+            if not token:
+                return {"success": False, "error": "Session không tồn tại"}
+
+            repo_path = build_clone_path(self.session_id, repo, destination_path)
+
+            stats = await clone_with_profile_async(owner, repo, token, repo_path, profile, self.mirror_cache)
+
+            return {
+                "success": True,
+                "message": f"Repository đã được clone thành công",
+                "local_path": repo_path,
+                "clone_url": f"https://github.com/{owner}/{repo}.git",
+                "profile": profile.to_dict(),
+                **stats
+            }
+
+        except GitCommandError as e:
+            return {
+                "success": False,
+                "error": f"Lỗi khi clone repository: {str(e)}"
+            }
+        except subprocess.TimeoutExpired:
+            return {
+                "success": False,
+                "error": f"Clone repository timeout (quá {profile.timeout:g} giây), thử profile shallow/blobless hoặc sparse_paths"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Lỗi không xác định: {str(e)}"
+            }
+
+    async def list_issues(self, owner: str, repo: str, state: str = "open", per_page: int = 30,
+                          max_items: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Liệt kê issues của repository (xem GitHubAPIClient.list_issues)"""
+        if max_items is not None:
+            return await self._collect(self.iter_issues(owner, repo, state, max_items=max_items, per_page=per_page))
+
+        endpoint = f"repos/{owner}/{repo}/issues"
+        params = {"state": state, "per_page": per_page}
+
+        return await self._make_request("GET", endpoint, params=params)
+
+    def iter_issues(self, owner: str, repo: str, state: str = "open", max_items: Optional[int] = None,
+                    per_page: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Duyệt lazy issues qua tất cả các trang"""
+        return self.iter_paginated(f"repos/{owner}/{repo}/issues", {"state": state},
+                                   max_items=max_items, per_page=per_page)
+
+    async def get_issue(self, owner: str, repo: str, number: int) -> Dict[str, Any]:
+        """Lấy thông tin chi tiết của một issue"""
+        return await self._make_request("GET", f"repos/{owner}/{repo}/issues/{number}")
+
+
+def create_async_github_client(session_id: str) -> AsyncGitHubAPIClient:
+    """
+    Factory function để tạo async GitHub API client
+
+    Args:
+        session_id: ID của session
+
+    Returns:
+        AsyncGitHubAPIClient instance
+    """
+    return AsyncGitHubAPIClient(session_id)
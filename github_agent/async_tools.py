@@ -0,0 +1,756 @@
+"""
+Async GitHub Tools - phiên bản asyncio của các *_session tools
+ADK runner await trực tiếp các tool này trên event loop, nên nhiều
+conversation và nhiều function call song song không chặn lẫn nhau
+"""
+import asyncio
+import json
+import time
+from typing import List, Optional, Tuple
+from .session_manager import session_manager
+from .async_github_api_client import AsyncGitHubAPIClient, create_async_github_client
+from .repo_context import CONTEXT_FIELD, RepoContext, repo_context_stats
+from .git_clone import build_clone_profile
+from .pagination import acollect_items
+from .fanout import afan_out
+from .projection import (
+    DEFAULT_OUTPUT_MAX_TOKENS,
+    PULL_REQUEST_LIST_SCHEMA,
+    PULL_REQUEST_SCHEMA,
+    REPOSITORY_SCHEMA,
+    project_payload,
+)
+from .diff_parser import (
+    DEFAULT_DIFF_MAX_FILES,
+    DEFAULT_DIFF_MAX_TOKENS,
+    MAX_PULL_REQUEST_FILES,
+    PullRequestDiffTooLargeError,
+    files_from_api,
+    parse_unified_diff,
+)
+from .tools import (
+    validate_github_url,
+    validate_github_token,
+    build_pull_request_diff_result,
+    format_tree_listing,
+    load_session_context,
+    search_local_code,
+    search_relevant_code,
+    start_session_prefetch,
+)
+
+
+def _resolve_session_context(session_id: str) -> Tuple[Optional[RepoContext], Optional[str]]:
+    """
+    Lấy context repository của session (xem tools.load_session_context)
+
+    Args:
+        session_id: ID của session
+
+    Returns:
+        Tuple (context, error_json) - một trong hai là None
+    """
+    session_info = session_manager.get_session_info(session_id)
+    if not session_info:
+        return None, json.dumps({
+            "success": False,
+            "error": "Session không tồn tại hoặc đã hết hạn"
+        }, ensure_ascii=False)
+
+    context = load_session_context(session_info)
+    if context is None:
+        return None, json.dumps({
+            "success": False,
+            "error": "GitHub URL trong session không hợp lệ"
+        }, ensure_ascii=False)
+
+    repo_context_stats.record(session_id, tool_calls=1)
+    return context, None
+
+
+async def _session_ref(session_id: str, client: AsyncGitHubAPIClient, context: RepoContext, ref: str,
+                       pin_head: bool = False) -> str:
+    """Resolve ref của tool theo context của session (xem tools._session_ref)"""
+    if not context.is_default_ref(ref):
+        return ref
+
+    changed = False
+    if not context.default_branch:
+        repo_info = await client.get_repository_info(context.owner, context.repo)
+        context.default_branch = repo_info.get("default_branch") or ""
+        repo_context_stats.record(session_id, context_resolves=1)
+        changed = True
+    if context.head_is_fresh():
+        repo_context_stats.record(session_id, head_hits=1)
+    elif pin_head and context.default_branch:
+        context.head_sha = await client.resolve_commit_sha(context.owner, context.repo, context.default_branch)
+        context.head_resolved_at = time.time()
+        repo_context_stats.record(session_id, head_resolves=1)
+        changed = True
+    if changed:
+        session_manager.update_session(session_id, **{CONTEXT_FIELD: context.to_fields()})
+
+    repo_context_stats.record(session_id, default_refs=1)
+    return context.resolve_ref(ref)
+
+
+async def create_github_session(github_url: str, token: str) -> str:
+    """
+    Tạo session mới và lưu trữ PAT cho user
+
+    Args:
+        github_url: GitHub repository URL
+        token: GitHub Personal Access Token
+
+    Returns:
+        JSON string chứa thông tin session
+    """
+    try:
+        # Validate inputs
+        url_validation = validate_github_url(github_url)
+        if not url_validation["valid"]:
+            return json.dumps({
+                "success": False,
+                "error": f"GitHub URL không hợp lệ: {url_validation['error']}"
+            }, ensure_ascii=False)
+
+        token_validation = validate_github_token(token)
+        if not token_validation["valid"]:
+            return json.dumps({
+                "success": False,
+                "error": f"GitHub token không hợp lệ: {token_validation['error']}"
+            }, ensure_ascii=False)
+
+        # Tạo session mới
+        session_id = session_manager.create_session(github_url, token)
+
+        # Test connection để đảm bảo token hoạt động
+        try:
+            client = create_async_github_client(session_id)
+            repo_info = await client.get_repository_info(url_validation["owner"], url_validation["repo"])
+            context = RepoContext(url_validation["owner"], url_validation["repo"],
+                                  repo_info.get("default_branch") or "")
+
+            # Cập nhật thông tin session với repo info và context đã resolve
+            session_manager.update_session(session_id,
+                owner=url_validation["owner"],
+                repo=url_validation["repo"],
+                repo_full_name=repo_info.get("full_name"),
+                repo_description=repo_info.get("description"),
+                **{CONTEXT_FIELD: context.to_fields()}
+            )
+            start_session_prefetch(session_id, token)
+
+            return json.dumps({
+                "success": True,
+                "session_id": session_id,
+                "message": "Session đã được tạo thành công",
+                "repository": {
+                    "owner": url_validation["owner"],
+                    "repo": url_validation["repo"],
+                    "full_name": repo_info.get("full_name"),
+                    "description": repo_info.get("description"),
+                    "default_branch": context.default_branch,
+                    "stars": repo_info.get("stargazers_count"),
+                    "language": repo_info.get("language")
+                }
+            }, ensure_ascii=False)
+
+        except Exception as api_error:
+            # Xóa session nếu không thể kết nối
+            session_manager.delete_session(session_id)
+            return json.dumps({
+                "success": False,
+                "error": f"Không thể kết nối tới GitHub với token này: {str(api_error)}"
+            }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi tạo session: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def get_repository_info_session(session_id: str, max_tokens: int = DEFAULT_OUTPUT_MAX_TOKENS) -> str:
+    """
+    Lấy thông tin repository sử dụng session (chỉ các field cần thiết)
+
+    Args:
+        session_id: ID của session
+        max_tokens: Token budget của output (ước lượng)
+
+    Returns:
+        JSON string chứa thông tin repository
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        client = create_async_github_client(session_id)
+        repo_info = await client.get_repository_info(context.owner, context.repo)
+
+        return json.dumps(project_payload({
+            "success": True,
+            "repository": repo_info
+        }, "repository", REPOSITORY_SCHEMA, max_tokens), ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi lấy thông tin repository: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def get_repository_overview_session(session_id: str, max_items: int = 30) -> str:
+    """
+    Lấy overview của repository: thông tin repository, branches, PR mở và issue mở
+
+    Dùng một GraphQL query thay cho nhiều REST call, chỉ trả về các field cần thiết
+
+    Args:
+        session_id: ID của session
+        max_items: Số branch/PR/issue tối đa của mỗi danh sách
+
+    Returns:
+        JSON string chứa overview và chi phí GraphQL
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        client = create_async_github_client(session_id)
+        overview = await client.get_repository_overview(context.owner, context.repo, max_items)
+
+        return json.dumps({
+            "success": True,
+            **overview
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi lấy overview repository: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def clone_repository_session(session_id: str, destination_path: Optional[str] = None, profile: str = "",
+                                   depth: int = 0, filter: str = "", ref: str = "", single_branch: bool = False,
+                                   sparse_paths: Optional[List[str]] = None, timeout: int = 0) -> str:
+    """
+    Clone repository sử dụng session
+
+    Args:
+        session_id: ID của session
+        destination_path: Đường dẫn đích (optional)
+        profile: Clone profile có sẵn: full, shallow (depth 1, một branch), blobless, treeless
+        depth: Số commit lịch sử cần lấy (0 = toàn bộ)
+        filter: Partial clone filter ("blob:none" hoặc "tree:0")
+        ref: Branch/tag/commit SHA cần checkout
+        single_branch: Chỉ lấy một branch
+        sparse_paths: Chỉ checkout các path/pattern này (sparse-checkout)
+        timeout: Timeout cho mỗi lệnh git (giây, 0 = mặc định)
+
+    Returns:
+        JSON string chứa thông tin về quá trình clone
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        client = create_async_github_client(session_id)
+        clone_profile = build_clone_profile(profile, depth, filter, ref, single_branch, sparse_paths, timeout)
+        result = await client.clone_repository(
+            context.owner,
+            context.repo,
+            destination_path,
+            clone_profile
+        )
+
+        return json.dumps(result, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi clone repository: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def get_repository_content_session(session_id: str, path: str = "", ref: str = "") -> str:
+    """
+    Lấy nội dung thư mục/file trong repository sử dụng session
+
+    Args:
+        session_id: ID của session
+        path: Đường dẫn file/folder (mặc định là root)
+        ref: Branch/commit reference (mặc định là default branch)
+
+    Returns:
+        JSON string chứa thông tin files/folders
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        client = create_async_github_client(session_id)
+        ref = await _session_ref(session_id, client, context, ref)
+
+        # Trả lời local nếu đã có tree index của commit này
+        index = client.get_cached_tree_index(context.owner, context.repo, ref)
+        listing = index.list_directory(path) if index is not None else None
+        if listing is not None:
+            return json.dumps({
+                "success": True,
+                "content": [entry.to_content_item() for entry in listing],
+                "source": "tree_index"
+            }, ensure_ascii=False)
+
+        content = await client.get_repository_content(
+            context.owner,
+            context.repo,
+            path,
+            ref
+        )
+
+        return json.dumps({
+            "success": True,
+            "content": content
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi lấy nội dung repository: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def get_repository_tree_session(session_id: str, ref: str = "", path: str = "", pattern: str = "",
+                                      max_entries: int = 500) -> str:
+    """
+    Lấy toàn bộ cây thư mục của repository trong một lần gọi (Git Trees API)
+
+    Index được cache theo commit SHA nên các lần gọi sau cho cùng commit
+    (kể cả get_repository_content_session) được trả lời local
+
+    Args:
+        session_id: ID của session
+        ref: Branch/tag/commit SHA (mặc định là default branch)
+        path: Chỉ lấy các entry nằm dưới thư mục này
+        pattern: Glob pattern để lọc (ví dụ "*.py", "src/**/test_*.py")
+        max_entries: Số entry tối đa trả về
+
+    Returns:
+        JSON string chứa summary và danh sách path/type/size
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        client = create_async_github_client(session_id)
+        ref = await _session_ref(session_id, client, context, ref, pin_head=True)
+        index = await client.get_tree_index(context.owner, context.repo, ref)
+
+        return json.dumps(format_tree_listing(index, path, pattern, max_entries), ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi lấy cây thư mục repository: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def get_file_content_session(session_id: str, path: str, ref: str = "", start_line: int = 1) -> str:
+    """
+    Lấy nội dung file cụ thể trong repository sử dụng session
+
+    Args:
+        session_id: ID của session
+        path: Đường dẫn tới file
+        ref: Branch/commit reference (mặc định là default branch)
+        start_line: Dòng bắt đầu khi đọc file lớn theo từng đoạn (từ 1)
+
+    Returns:
+        JSON string chứa nội dung file
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        client = create_async_github_client(session_id)
+        file_info = await client.read_file(
+            context.owner,
+            context.repo,
+            path,
+            await _session_ref(session_id, client, context, ref),
+            start_line
+        )
+
+        return json.dumps({
+            "success": True,
+            "file": file_info
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi lấy nội dung file: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def list_pull_requests_session(session_id: str, state: str = "open", per_page: int = 10, max_items: int = 0,
+                                     max_tokens: int = DEFAULT_OUTPUT_MAX_TOKENS) -> str:
+    """
+    Liệt kê pull requests sử dụng session (chỉ các field cần thiết)
+
+    Args:
+        session_id: ID của session
+        state: Trạng thái PR (open, closed, all)
+        per_page: Số PR trên mỗi page (khi chỉ lấy trang đầu)
+        max_items: Nếu > 0, tự động đi qua các trang và trả về tối đa số PR này
+        max_tokens: Token budget của output (ước lượng); PR ở cuối bị bỏ nếu vượt
+
+    Returns:
+        JSON string chứa danh sách pull requests
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        client = create_async_github_client(session_id)
+        truncated = False
+        if max_items > 0:
+            pull_requests, truncated = await acollect_items(client.iter_pull_requests(
+                context.owner,
+                context.repo,
+                state,
+                max_items=max_items + 1
+            ), max_items)
+        else:
+            pull_requests = await client.list_pull_requests(
+                context.owner,
+                context.repo,
+                state,
+                per_page
+            )
+
+        return json.dumps(project_payload({
+            "success": True,
+            "pull_requests": pull_requests,
+            "count": len(pull_requests),
+            "truncated": truncated
+        }, "pull_requests", PULL_REQUEST_LIST_SCHEMA, max_tokens), ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi lấy danh sách pull requests: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def _list_session_items(session_id: str, key: str, error_label: str, iterate, max_items: int) -> str:
+    """
+    Helper chung cho các list tool có auto-pagination
+
+    Args:
+        session_id: ID của session
+        key: Tên field chứa danh sách trong output
+        error_label: Mô tả dùng trong message lỗi
+        iterate: Hàm (client, context, max_items) -> async iterator item
+        max_items: Số item tối đa trả về
+
+    Returns:
+        JSON string chứa danh sách, count và cờ truncated
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        client = create_async_github_client(session_id)
+        max_items = max(1, max_items)
+        items, truncated = await acollect_items(
+            iterate(client, context, max_items + 1),
+            max_items
+        )
+
+        return json.dumps({
+            "success": True,
+            key: items,
+            "count": len(items),
+            "truncated": truncated
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi lấy danh sách {error_label}: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def list_branches_session(session_id: str, max_items: int = 100) -> str:
+    """
+    Liệt kê branches sử dụng session, tự động đi qua các trang
+
+    Args:
+        session_id: ID của session
+        max_items: Số branch tối đa trả về
+
+    Returns:
+        JSON string chứa danh sách branches
+    """
+    return await _list_session_items(
+        session_id, "branches", "branches",
+        lambda client, context, limit: client.iter_branches(context.owner, context.repo, max_items=limit),
+        max_items
+    )
+
+
+async def list_commits_session(session_id: str, ref: str = "", path: str = "", max_items: int = 30) -> str:
+    """
+    Liệt kê commits sử dụng session, tự động đi qua các trang
+
+    Args:
+        session_id: ID của session
+        ref: Branch/commit SHA bắt đầu (mặc định là default branch)
+        path: Chỉ lấy commits thay đổi file/folder này
+        max_items: Số commit tối đa trả về
+
+    Returns:
+        JSON string chứa danh sách commits
+    """
+    async def iterate(client, context, limit):
+        sha = await _session_ref(session_id, client, context, ref)
+        async for commit in client.iter_commits(context.owner, context.repo, sha, path, max_items=limit):
+            yield commit
+
+    return await _list_session_items(session_id, "commits", "commits", iterate, max_items)
+
+
+async def list_issues_session(session_id: str, state: str = "open", max_items: int = 30) -> str:
+    """
+    Liệt kê issues sử dụng session, tự động đi qua các trang
+
+    Args:
+        session_id: ID của session
+        state: Trạng thái issue (open, closed, all)
+        max_items: Số issue tối đa trả về
+
+    Returns:
+        JSON string chứa danh sách issues
+    """
+    return await _list_session_items(
+        session_id, "issues", "issues",
+        lambda client, context, limit: client.iter_issues(context.owner, context.repo, state, max_items=limit),
+        max_items
+    )
+
+
+async def get_pull_request_session(session_id: str, number: int, max_tokens: int = DEFAULT_OUTPUT_MAX_TOKENS) -> str:
+    """
+    Lấy thông tin chi tiết pull request sử dụng session (chỉ các field cần thiết)
+
+    Args:
+        session_id: ID của session
+        number: Số của pull request
+        max_tokens: Token budget của output (ước lượng); body dài bị cắt nếu vượt
+
+    Returns:
+        JSON string chứa thông tin chi tiết pull request
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        client = create_async_github_client(session_id)
+        pull_request = await client.get_pull_request(
+            context.owner,
+            context.repo,
+            number
+        )
+
+        return json.dumps(project_payload({
+            "success": True,
+            "pull_request": pull_request
+        }, "pull_request", PULL_REQUEST_SCHEMA, max_tokens), ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi lấy thông tin pull request: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def get_pull_request_diff_session(session_id: str, number: int, path_glob: str = "", file_offset: int = 0,
+                                        max_files: int = DEFAULT_DIFF_MAX_FILES,
+                                        max_tokens: int = DEFAULT_DIFF_MAX_TOKENS) -> str:
+    """
+    Lấy diff của pull request sử dụng session, dạng cấu trúc theo file/hunk có phân trang
+
+    File generated, vendored, lockfile và binary chỉ được tóm tắt (stats), không
+    trả về patch. Dùng next_file_offset trong kết quả để lấy trang tiếp theo
+
+    Args:
+        session_id: ID của session
+        number: Số của pull request
+        path_glob: Chỉ lấy các file khớp glob (ví dụ "src/*.py")
+        file_offset: Vị trí file bắt đầu của trang
+        max_files: Số file tối đa mỗi trang
+        max_tokens: Giới hạn token (ước lượng) của các patch trong trang
+
+    Returns:
+        JSON string chứa thông tin PR, stats, files (hunks) và thông tin trang
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        client = create_async_github_client(session_id)
+        owner, repo = context.owner, context.repo
+
+        # Thông tin PR và diff độc lập nên lấy song song
+        calls = await afan_out({
+            "pull_request": client.get_pull_request(owner, repo, number),
+            "diff": client.get_pull_request_diff(owner, repo, number),
+        })
+
+        if isinstance(calls["diff"].error, PullRequestDiffTooLargeError):
+            # Diff quá lớn: lấy patch theo từng file qua files endpoint
+            items, _ = await acollect_items(
+                client.iter_pull_request_files(owner, repo, number, max_items=MAX_PULL_REQUEST_FILES),
+                MAX_PULL_REQUEST_FILES
+            )
+            files = files_from_api(items)
+            source = "files_api"
+        else:
+            files = parse_unified_diff(calls["diff"].unwrap())
+            source = "diff"
+
+        return json.dumps(build_pull_request_diff_result(
+            number, calls["pull_request"], files, source, path_glob, file_offset, max_files, max_tokens
+        ), ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi lấy diff pull request: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def search_code_session(session_id: str, query: str) -> str:
+    """
+    Tìm kiếm code trong repository sử dụng session
+
+    Args:
+        session_id: ID của session
+        query: Từ khóa tìm kiếm
+
+    Returns:
+        JSON string chứa kết quả tìm kiếm
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        client = create_async_github_client(session_id)
+        search_results = await client.search_code(
+            query,
+            context.owner,
+            context.repo
+        )
+
+        return json.dumps({
+            "success": True,
+            "search_results": search_results
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi tìm kiếm code: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def search_local_code_session(session_id: str, query: str, regex: bool = False, case_sensitive: bool = False,
+                                    path_glob: str = "", context_lines: int = 2, max_results: int = 50,
+                                    local_path: str = "") -> str:
+    """
+    Tìm kiếm code trong bản clone local bằng trigram index (không tốn GitHub API quota)
+
+    Index được build ở lần tìm đầu tiên, lưu trên đĩa theo commit và cập nhật
+    incremental theo các file thay đổi khi HEAD của bản clone đổi
+
+    Args:
+        session_id: ID của session
+        query: Chuỗi cần tìm hoặc regex
+        regex: Query là regex
+        case_sensitive: Phân biệt hoa thường
+        path_glob: Chỉ tìm trong các path khớp glob (ví dụ "*.py", "src/*")
+        context_lines: Số dòng context trước/sau mỗi kết quả
+        max_results: Số kết quả tối đa
+        local_path: Thư mục clone trong thư mục của session (mặc định: bản clone mặc định)
+
+    Returns:
+        JSON string chứa các kết quả (path, line, text, before, after)
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        result = await asyncio.to_thread(
+            search_local_code, session_id, context.owner, context.repo, query,
+            regex=regex, case_sensitive=case_sensitive, path_glob=path_glob,
+            context_lines=context_lines, max_results=max_results, local_path=local_path
+        )
+        return json.dumps(result, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi tìm kiếm code local: {str(e)}"
+        }, ensure_ascii=False)
+
+
+async def search_relevant_code_session(session_id: str, question: str, top_k: int = 5, path_glob: str = "",
+                                       local_path: str = "") -> str:
+    """
+    Tìm các đoạn code liên quan nhất tới câu hỏi ngôn ngữ tự nhiên trong bản clone local (BM25)
+
+    Ví dụ "where is authentication handled": trả về top-k chunk kèm khoảng dòng,
+    thay cho nhiều lần search + đọc file thăm dò. Không tốn GitHub API quota
+
+    Args:
+        session_id: ID của session
+        question: Câu hỏi hoặc từ khóa
+        top_k: Số đoạn code trả về
+        path_glob: Chỉ tìm trong các path khớp glob (ví dụ "*.py", "src/*")
+        local_path: Thư mục clone trong thư mục của session (mặc định: bản clone mặc định)
+
+    Returns:
+        JSON string chứa các chunk (path, start_line, end_line, score, content)
+    """
+    try:
+        context, error = _resolve_session_context(session_id)
+        if error:
+            return error
+
+        result = await asyncio.to_thread(
+            search_relevant_code, session_id, context.owner, context.repo, question,
+            top_k=top_k, path_glob=path_glob, local_path=local_path
+        )
+        return json.dumps(result, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi tìm code liên quan: {str(e)}"
+        }, ensure_ascii=False)
@@ -0,0 +1,321 @@
+"""
+Blob cache trên đĩa, content-addressed theo git blob SHA
+Nội dung giống nhau chỉ được tải một lần cho cả deployment, bất kể bao nhiêu
+session/branch/path cùng trỏ tới. Ghi atomic (temp file + rename) và verify SHA
+khi đọc nên nhiều worker process có thể dùng chung một thư mục cache
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Any, BinaryIO, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: chỉ khóa trong process
+    fcntl = None
+
+# Thư mục cache, dùng chung giữa các worker process
+DEFAULT_CACHE_DIR = os.getenv(
+    "GITHUB_AGENT_BLOB_CACHE_DIR", os.path.join(tempfile.gettempdir(), "github_agent_blobs")
+)
+# Tổng dung lượng tối đa của cache (bytes), 0 để tắt
+DEFAULT_MAX_BYTES = int(os.getenv("GITHUB_AGENT_BLOB_CACHE_BYTES", str(512 * 1024 * 1024)))
+# Blob lớn hơn ngưỡng này không được cache
+DEFAULT_MAX_BLOB_BYTES = int(os.getenv("GITHUB_AGENT_BLOB_CACHE_MAX_BLOB", str(16 * 1024 * 1024)))
+# Khi evict, dọn tới tỉ lệ này của max_bytes để không phải evict liên tục
+EVICT_LOW_WATERMARK = 0.9
+# Tính lại dung lượng thực tế trên đĩa sau mỗi khoảng này (giây), vì process khác cũng ghi
+RESCAN_INTERVAL = 60.0
+CHUNK_SIZE = 64 * 1024
+
+_BLOB_SHA_RE = re.compile(r"[0-9a-f]{40}")
+
+
+def git_blob_sha(data: bytes) -> str:
+    """
+    Tính git blob SHA của nội dung (giống `git hash-object`)
+
+    Args:
+        data: Nội dung file
+
+    Returns:
+        SHA-1 hex 40 ký tự
+    """
+    digest = hashlib.sha1(b"blob %d\0" % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class BlobCache:
+    """Blob store theo SHA với giới hạn dung lượng và LRU eviction theo mtime"""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_blob_bytes: int = DEFAULT_MAX_BLOB_BYTES):
+        """
+        Args:
+            directory: Thư mục lưu blob
+            max_bytes: Tổng dung lượng tối đa (0 để tắt cache)
+            max_blob_bytes: Kích thước tối đa của một blob được cache
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_blob_bytes = max_blob_bytes
+        self._lock = threading.Lock()
+        # Lock riêng cho eviction để việc quét đĩa không chặn get/put
+        self._evict_lock = threading.Lock()
+        # Ước lượng dung lượng đang dùng, được tính lại định kỳ từ đĩa
+        self._approx_bytes: Optional[int] = None
+        self._scanned_at = 0.0
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "corrupt": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, sha: str) -> str:
+        # Chia thư mục theo 2 ký tự đầu giống .git/objects
+        return os.path.join(self.directory, sha[:2], sha)
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def get(self, sha: str) -> Optional[bytes]:
+        """
+        Đọc blob theo SHA
+
+        Args:
+            sha: Git blob SHA
+
+        Returns:
+            Nội dung blob hoặc None nếu chưa có
+        """
+        if not self.enabled or not _BLOB_SHA_RE.fullmatch(sha or ""):
+            return None
+        path = self._path(sha)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self._count("misses")
+            return None
+
+        if git_blob_sha(data) != sha:
+            # File hỏng (ví dụ đĩa đầy khi ghi): xóa để tải lại
+            self._count("corrupt")
+            self._count("misses")
+            self._remove(path)
+            return None
+
+        try:
+            # mtime là thời điểm truy cập gần nhất cho LRU giữa các process
+            os.utime(path)
+        except OSError:
+            pass
+        self._count("hits")
+        return data
+
+    def put(self, sha: str, data: bytes) -> bool:
+        """
+        Lưu blob (bỏ qua nếu đã có, quá lớn hoặc SHA không khớp nội dung)
+
+        Args:
+            sha: Git blob SHA do GitHub trả về
+            data: Nội dung đã decode
+
+        Returns:
+            True nếu blob có trong cache sau khi gọi
+        """
+        if not self.enabled or len(data) > self.max_blob_bytes or not _BLOB_SHA_RE.fullmatch(sha or ""):
+            return False
+
+        if os.path.exists(self._path(sha)):
+            return True
+        return self._write(sha, [data], len(data)) is not None
+
+    def open(self, sha: str) -> Optional[BinaryIO]:
+        """
+        Mở blob để đọc dạng stream (cho file lớn, không đọc hết vào bộ nhớ)
+
+        Nội dung đã được verify SHA khi ghi nên không verify lại ở đây
+
+        Args:
+            sha: Git blob SHA
+
+        Returns:
+            File object (binary) hoặc None nếu chưa có
+        """
+        if not self.enabled or not _BLOB_SHA_RE.fullmatch(sha or ""):
+            return None
+        path = self._path(sha)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self._count("misses")
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count("hits")
+        return f
+
+    def put_stream(self, stream: BinaryIO, size: int) -> Optional[str]:
+        """
+        Lưu blob từ file object, tính SHA trong lúc copy (bộ nhớ cố định)
+
+        Args:
+            stream: File object đọc được, đang ở đầu nội dung
+            size: Tổng số byte của nội dung
+
+        Returns:
+            Git blob SHA của nội dung, hoặc None nếu không cache được
+        """
+        if not self.enabled or size > self.max_blob_bytes:
+            return None
+
+        def chunks():
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+        return self._write(None, chunks(), size)
+
+    def _write(self, sha: Optional[str], chunks: Iterable[bytes], size: int) -> Optional[str]:
+        """
+        Ghi blob atomic: temp file trong cùng thư mục rồi rename
+
+        Args:
+            sha: SHA mong đợi, None để dùng SHA tính được từ nội dung
+            chunks: Nội dung blob
+            size: Tổng số byte
+
+        Returns:
+            SHA của blob đã lưu hoặc None nếu lỗi/không khớp
+        """
+        digest = hashlib.sha1(b"blob %d\0" % size)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            try:
+                written = 0
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in chunks:
+                        digest.update(chunk)
+                        f.write(chunk)
+                        written += len(chunk)
+                actual_sha = digest.hexdigest()
+                if written != size or (sha is not None and actual_sha != sha):
+                    self._remove(tmp_path)
+                    return None
+                path = self._path(actual_sha)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # rename là atomic: reader không bao giờ thấy file ghi dở
+                os.replace(tmp_path, path)
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+        except OSError:
+            return None
+
+        with self._lock:
+            self._counters["stores"] += 1
+            if self._approx_bytes is not None:
+                self._approx_bytes += size
+            needs_scan = (
+                self._approx_bytes is None
+                or self._approx_bytes > self.max_bytes
+                or time.monotonic() - self._scanned_at > RESCAN_INTERVAL
+            )
+        if needs_scan:
+            self._evict()
+        return actual_sha
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Tính lại dung lượng trên đĩa và xóa các blob ít dùng nhất nếu vượt giới hạn"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._evict_lock, open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                # Chỉ một process evict tại một thời điểm
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                blobs = []
+                total = 0
+                evicted = 0
+                for bucket in os.scandir(self.directory):
+                    if not bucket.is_dir():
+                        if bucket.name.startswith(".tmp-"):
+                            # Temp file bị bỏ lại bởi process đã chết
+                            try:
+                                if time.time() - bucket.stat().st_mtime > 3600:
+                                    self._remove(bucket.path)
+                            except OSError:
+                                pass
+                        continue
+                    for entry in os.scandir(bucket.path):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        blobs.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+
+                if total > self.max_bytes:
+                    target = self.max_bytes * EVICT_LOW_WATERMARK
+                    blobs.sort()
+                    for _, size, path in blobs:
+                        if total <= target:
+                            break
+                        self._remove(path)
+                        total -= size
+                        evicted += 1
+
+                with self._lock:
+                    self._counters["evictions"] += evicted
+                    self._approx_bytes = total
+                    self._scanned_at = time.monotonic()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_ratio": round(self._counters["hits"] / lookups, 3) if lookups else None,
+                "approx_bytes": self._approx_bytes,
+                "max_bytes": self.max_bytes,
+                "directory": self.directory,
+            }
+
+
+_blob_cache: Optional[BlobCache] = None
+_blob_cache_lock = threading.Lock()
+
+
+def get_blob_cache() -> BlobCache:
+    """
+    Lấy blob cache dùng chung của process
+
+    Returns:
+        BlobCache instance
+    """
+    global _blob_cache
+    if _blob_cache is None:
+        with _blob_cache_lock:
+            if _blob_cache is None:
+                _blob_cache = BlobCache()
+    return _blob_cache
@@ -0,0 +1,313 @@
+"""
+BM25 index cho truy vấn ngôn ngữ tự nhiên trên repository đã clone
+File được chia thành các chunk theo dòng, identifier được tách theo camelCase/
+snake_case để câu hỏi như "where is authentication handled" khớp với
+`authenticate_user`, `AuthHandler`... Chạy hoàn toàn trên CPU, không gọi network
+"""
+import fnmatch
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Dict, Any, List, Optional, Tuple
+
+from .code_index import DEFAULT_INDEX_DIR, CodeIndexManager, read_text_file
+
+# Số dòng của mỗi chunk và số dòng chồng lên chunk kế tiếp
+CHUNK_LINES = int(os.getenv("GITHUB_AGENT_BM25_CHUNK_LINES", "40"))
+CHUNK_OVERLAP = 10
+
+# Tham số BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+INDEX_FORMAT_VERSION = 1
+COMPACT_RATIO = 0.3
+
+_WORD_RE = re.compile(r"[A-Za-z0-9_]+")
+_IDENTIFIER_PART_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+# Hậu tố được cắt để "handled", "handler", "handling" cùng về "handl"
+_SUFFIXES = ("ations", "ation", "ings", "ions", "ing", "ion", "ers", "er", "ed", "es", "e", "s")
+_MIN_STEM = 3
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i if in is it of on or so that the this to
+what when where which who why with use used using code file files function functions
+self def return import none null true false var let const
+""".split())
+
+
+def stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tách text thành term: mỗi identifier cho các phần camelCase/snake_case
+    và cả identifier ghép (getUserName -> get, user, name, getusername)
+
+    Args:
+        text: Code hoặc câu hỏi
+
+    Returns:
+        List term (có lặp, để tính term frequency)
+    """
+    terms = []
+    for word in _WORD_RE.findall(text):
+        parts = [part.lower() for piece in word.split("_") for part in _IDENTIFIER_PART_RE.findall(piece)]
+        if len(parts) > 1:
+            terms.append("".join(parts))
+        for part in parts:
+            if len(part) > 1 and part not in STOPWORDS:
+                terms.append(stem(part))
+    return terms
+
+
+def chunk_spans(line_count: int, chunk_lines: int = CHUNK_LINES,
+                overlap: int = CHUNK_OVERLAP) -> List[Tuple[int, int]]:
+    """Các khoảng dòng (start, end) từ 1, inclusive, của các chunk trong file"""
+    if line_count <= chunk_lines:
+        return [(1, max(1, line_count))]
+    step = chunk_lines - overlap
+    spans = []
+    for start in range(0, line_count, step):
+        end = min(line_count, start + chunk_lines)
+        spans.append((start + 1, end))
+        if end == line_count:
+            break
+    return spans
+
+
+class BM25Index:
+    """BM25 index trên các chunk của một checkout"""
+
+    def __init__(self, commit: str = ""):
+        self.commit = commit
+        # chunk id -> (path, start_line, end_line, số term), None khi đã xóa
+        self.chunks: List[Optional[Tuple[str, int, int, int]]] = []
+        # term -> {chunk id: term frequency}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self._files: Dict[str, Tuple[str, List[int]]] = {}
+        self._total_terms = 0
+        self._deleted = 0
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self.chunks) - self._deleted
+
+    def indexed_files(self) -> Dict[str, str]:
+        """Map path -> blob sha của các file đang được index"""
+        return {path: blob_sha for path, (blob_sha, _) in self._files.items()}
+
+    def remove(self, path: str) -> None:
+        entry = self._files.pop(path, None)
+        if entry is None:
+            return
+        for chunk_id in entry[1]:
+            self._total_terms -= self.chunks[chunk_id][3]
+            self.chunks[chunk_id] = None
+            self._deleted += 1
+        # Postings của chunk đã xóa được bỏ khi compact
+
+    def add(self, path: str, blob_sha: str, text: str) -> None:
+        self.remove(path)
+        lines = text.splitlines()
+        # Term của path được tính vào mọi chunk của file
+        path_terms = tokenize(path)
+        chunk_ids = []
+        for start, end in chunk_spans(len(lines)):
+            terms = path_terms + tokenize("\n".join(lines[start - 1:end]))
+            if not terms:
+                continue
+            chunk_id = len(self.chunks)
+            self.chunks.append((path, start, end, len(terms)))
+            self._total_terms += len(terms)
+            chunk_ids.append(chunk_id)
+            frequencies: Dict[str, int] = {}
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            for term, frequency in frequencies.items():
+                self.postings.setdefault(term, {})[chunk_id] = frequency
+        self._files[path] = (blob_sha, chunk_ids)
+
+    def compact(self) -> None:
+        """Đánh số lại chunk và loại bỏ postings của chunk đã xóa"""
+        remap: Dict[int, int] = {}
+        chunks: List[Optional[Tuple[str, int, int, int]]] = []
+        for chunk_id, chunk in enumerate(self.chunks):
+            if chunk is not None:
+                remap[chunk_id] = len(chunks)
+                chunks.append(chunk)
+        postings: Dict[str, Dict[int, int]] = {}
+        for term, posting in self.postings.items():
+            kept = {remap[chunk_id]: tf for chunk_id, tf in posting.items() if chunk_id in remap}
+            if kept:
+                postings[term] = kept
+        self.chunks = chunks
+        self.postings = postings
+        self._files = {
+            path: (blob_sha, [remap[chunk_id] for chunk_id in chunk_ids])
+            for path, (blob_sha, chunk_ids) in self._files.items()
+        }
+        self._deleted = 0
+
+    def maybe_compact(self) -> None:
+        if self.chunks and self._deleted / len(self.chunks) > COMPACT_RATIO:
+            self.compact()
+
+    def rank(self, query: str, top_k: int = 5, path_glob: str = "") -> List[Tuple[float, int]]:
+        """
+        Xếp hạng chunk theo BM25
+
+        Args:
+            query: Câu hỏi hoặc từ khóa
+            top_k: Số chunk trả về
+            path_glob: Chỉ xét các path khớp glob
+
+        Returns:
+            List (score, chunk id) giảm dần theo score
+        """
+        chunk_count = self.chunk_count
+        if not chunk_count:
+            return []
+        average_length = self._total_terms / chunk_count
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            live = [(chunk_id, tf) for chunk_id, tf in posting.items() if self.chunks[chunk_id] is not None]
+            if not live:
+                continue
+            idf = math.log(1 + (chunk_count - len(live) + 0.5) / (len(live) + 0.5))
+            for chunk_id, tf in live:
+                length = self.chunks[chunk_id][3]
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+
+        if path_glob:
+            scores = {
+                chunk_id: score for chunk_id, score in scores.items()
+                if fnmatch.fnmatchcase(self.chunks[chunk_id][0], path_glob)
+            }
+        # Lấy dư để bỏ các chunk chồng lên chunk đã chọn của cùng file
+        ranked = heapq.nlargest(top_k * 3, ((score, chunk_id) for chunk_id, score in scores.items()))
+        selected: List[Tuple[float, int]] = []
+        for score, chunk_id in ranked:
+            path, start, end, _ = self.chunks[chunk_id]
+            if any(
+                self.chunks[other][0] == path and self.chunks[other][1] <= end and start <= self.chunks[other][2]
+                for _, other in selected
+            ):
+                continue
+            selected.append((score, chunk_id))
+            if len(selected) >= top_k:
+                break
+        return selected
+
+    def to_bytes(self) -> bytes:
+        self.compact()
+        payload = {
+            "version": INDEX_FORMAT_VERSION,
+            "commit": self.commit,
+            "chunks": self.chunks,
+            "files": {path: blob_sha for path, (blob_sha, _) in self._files.items()},
+            # JSON chỉ có key kiểu string: lưu postings dạng [chunk id, tf, chunk id, tf...]
+            "postings": {
+                term: [value for item in posting.items() for value in item]
+                for term, posting in self.postings.items()
+            },
+        }
+        return zlib.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"), 1)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BM25Index":
+        payload = json.loads(zlib.decompress(data))
+        if payload.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError("BM25 index format không tương thích")
+        index = cls(payload["commit"])
+        index.chunks = [tuple(chunk) for chunk in payload["chunks"]]
+        index._total_terms = sum(chunk[3] for chunk in index.chunks)
+        chunk_ids: Dict[str, List[int]] = {}
+        for chunk_id, chunk in enumerate(index.chunks):
+            chunk_ids.setdefault(chunk[0], []).append(chunk_id)
+        index._files = {
+            path: (blob_sha, chunk_ids.get(path, [])) for path, blob_sha in payload["files"].items()
+        }
+        index.postings = {
+            term: dict(zip(flat[::2], flat[1::2])) for term, flat in payload["postings"].items()
+        }
+        return index
+
+
+def search_bm25(index: BM25Index, checkout_path: str, query: str, top_k: int = 5,
+                path_glob: str = "", max_chunk_chars: int = 4000) -> Dict[str, Any]:
+    """
+    Trả về top-k chunk liên quan nhất tới câu hỏi
+
+    Args:
+        index: BM25 index của checkout
+        checkout_path: Thư mục checkout
+        query: Câu hỏi ngôn ngữ tự nhiên hoặc từ khóa
+        top_k: Số chunk trả về
+        path_glob: Chỉ tìm trong path khớp glob (ví dụ "*.py", "src/*")
+        max_chunk_chars: Cắt nội dung mỗi chunk tới số ký tự này
+
+    Returns:
+        Dict chứa chunks (path, start_line, end_line, score, content) và thống kê
+    """
+    if not tokenize(query):
+        raise ValueError("Query không có từ khóa nào để tìm")
+    started = time.perf_counter()
+    results = []
+    for score, chunk_id in index.rank(query, top_k, path_glob):
+        path, start, end, _ = index.chunks[chunk_id]
+        text = read_text_file(checkout_path, path)
+        if text is None:
+            continue
+        content = "\n".join(text.splitlines()[start - 1:end])
+        results.append({
+            "path": path,
+            "start_line": start,
+            "end_line": end,
+            "score": round(score, 3),
+            "content": content[:max_chunk_chars],
+            "content_truncated": len(content) > max_chunk_chars,
+        })
+    return {
+        "chunks": results,
+        "count": len(results),
+        "indexed_files": len(index.indexed_files()),
+        "indexed_chunks": index.chunk_count,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+_bm25_index_manager: Optional[CodeIndexManager] = None
+_bm25_index_manager_lock = threading.Lock()
+
+
+def get_bm25_index_manager() -> CodeIndexManager:
+    """
+    Lấy manager của BM25 index dùng chung của process (lưu cạnh trigram index)
+
+    Returns:
+        CodeIndexManager quản lý BM25Index
+    """
+    global _bm25_index_manager
+    if _bm25_index_manager is None:
+        with _bm25_index_manager_lock:
+            if _bm25_index_manager is None:
+                _bm25_index_manager = CodeIndexManager(
+                    directory=os.path.join(DEFAULT_INDEX_DIR, "bm25"),
+                    index_class=BM25Index,
+                    searcher=search_bm25,
+                )
+    return _bm25_index_manager
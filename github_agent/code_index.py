@@ -0,0 +1,600 @@
+"""
+Trigram index cho code search trên repository đã clone
+Thay cho search/code API (giới hạn ~10 request/phút, chỉ default branch, bỏ
+qua file lớn): lọc file ứng viên bằng trigram rồi verify bằng regex theo dòng.
+Index được cập nhật incremental theo các path thay đổi và lưu trên đĩa theo commit
+"""
+import array
+import base64
+import fnmatch
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Iterable, List, Optional, Set, Tuple
+
+try:
+    import re._parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+from .large_file import SNIFF_BYTES, is_binary
+
+# Thư mục lưu index theo commit, dùng chung giữa các worker process
+DEFAULT_INDEX_DIR = os.getenv(
+    "GITHUB_AGENT_CODE_INDEX_DIR", os.path.join(tempfile.gettempdir(), "github_agent_code_index")
+)
+# File lớn hơn ngưỡng này không được index (bytes)
+DEFAULT_MAX_FILE_BYTES = int(os.getenv("GITHUB_AGENT_CODE_INDEX_MAX_FILE", str(1024 * 1024)))
+# Số commit được giữ trên đĩa cho mỗi repository
+DEFAULT_KEEP_COMMITS = int(os.getenv("GITHUB_AGENT_CODE_INDEX_KEEP", "3"))
+# Số index được giữ trong bộ nhớ
+DEFAULT_MAX_LOADED = int(os.getenv("GITHUB_AGENT_CODE_INDEX_MAX_LOADED", "8"))
+
+INDEX_FORMAT_VERSION = 1
+# Compact postings khi tỉ lệ document đã xóa vượt ngưỡng này
+COMPACT_RATIO = 0.3
+
+# Mode của file thường trong git (bỏ qua symlink 120000 và submodule 160000)
+_REGULAR_FILE_MODES = ("100644", "100755")
+
+
+def trigrams(text: str) -> Set[str]:
+    """Tập trigram (lowercase) của text"""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _literal_runs(parsed: Any) -> Optional[List[str]]:
+    """
+    Lấy các đoạn literal bắt buộc phải xuất hiện trong mọi match của regex
+
+    Returns:
+        List literal, hoặc None nếu không rút ra được (ví dụ alternation ở top-level)
+    """
+    runs: List[str] = []
+    current: List[str] = []
+    for op, arg in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(arg))
+            continue
+        if current:
+            runs.append("".join(current))
+            current = []
+        if op is sre_parse.SUBPATTERN:
+            # Group: literal bên trong group cũng bắt buộc
+            inner = _literal_runs(arg[-1])
+            if inner:
+                runs.extend(inner)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and arg[0] >= 1:
+            # x{1,} / x+ : nội dung lặp xuất hiện ít nhất một lần
+            inner = _literal_runs(arg[2])
+            if inner:
+                runs.extend(inner)
+    if current:
+        runs.append("".join(current))
+    return runs
+
+
+def required_trigrams(pattern: str, regex: bool) -> Set[str]:
+    """
+    Trigram bắt buộc của query, dùng để lọc file ứng viên
+
+    Args:
+        pattern: Query
+        regex: Query là regex hay literal
+
+    Returns:
+        Tập trigram (rỗng = không lọc được, phải quét mọi file)
+    """
+    if not regex:
+        return trigrams(pattern)
+    try:
+        runs = _literal_runs(sre_parse.parse(pattern))
+    except (re.error, TypeError, ValueError):
+        return set()
+    result: Set[str] = set()
+    for run in runs or []:
+        result |= trigrams(run)
+    return result
+
+
+class CodeIndex:
+    """Trigram index của một checkout tại một commit"""
+
+    def __init__(self, commit: str = ""):
+        self.commit = commit
+        # doc id -> (path, blob sha), None khi document đã bị xóa
+        self.docs: List[Optional[Tuple[str, str]]] = []
+        self.postings: Dict[str, array.array] = {}
+        self._path_to_doc: Dict[str, int] = {}
+        self._deleted = 0
+
+    @property
+    def file_count(self) -> int:
+        return len(self._path_to_doc)
+
+    def indexed_files(self) -> Dict[str, str]:
+        """Map path -> blob sha của các file đang được index"""
+        return {path: self.docs[doc_id][1] for path, doc_id in self._path_to_doc.items()}
+
+    def remove(self, path: str) -> None:
+        doc_id = self._path_to_doc.pop(path, None)
+        if doc_id is not None:
+            # Chỉ đánh dấu xóa, postings được lọc khi query hoặc compact
+            self.docs[doc_id] = None
+            self._deleted += 1
+
+    def add(self, path: str, blob_sha: str, text: str) -> None:
+        self.remove(path)
+        doc_id = len(self.docs)
+        self.docs.append((path, blob_sha))
+        self._path_to_doc[path] = doc_id
+        # doc id tăng dần nên postings luôn được sort khi append
+        for trigram in trigrams(text):
+            posting = self.postings.get(trigram)
+            if posting is None:
+                posting = self.postings[trigram] = array.array("I")
+            posting.append(doc_id)
+
+    def compact(self) -> None:
+        """Đánh số lại document và loại bỏ postings của document đã xóa"""
+        remap: Dict[int, int] = {}
+        docs: List[Optional[Tuple[str, str]]] = []
+        for doc_id, doc in enumerate(self.docs):
+            if doc is not None:
+                remap[doc_id] = len(docs)
+                docs.append(doc)
+        postings: Dict[str, array.array] = {}
+        for trigram, posting in self.postings.items():
+            kept = array.array("I", (remap[doc_id] for doc_id in posting if doc_id in remap))
+            if kept:
+                postings[trigram] = kept
+        self.docs = docs
+        self.postings = postings
+        self._path_to_doc = {doc[0]: doc_id for doc_id, doc in enumerate(docs)}
+        self._deleted = 0
+
+    def maybe_compact(self) -> None:
+        if self.docs and self._deleted / len(self.docs) > COMPACT_RATIO:
+            self.compact()
+
+    def candidates(self, required: Set[str]) -> List[int]:
+        """
+        Doc id có thể khớp query (giao các postings của trigram bắt buộc)
+
+        Args:
+            required: Trigram bắt buộc (rỗng = mọi document)
+        """
+        if not required:
+            return [doc_id for doc_id, doc in enumerate(self.docs) if doc is not None]
+        postings = []
+        for trigram in required:
+            posting = self.postings.get(trigram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        # Bắt đầu từ posting ngắn nhất
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                return []
+        return sorted(doc_id for doc_id in result if self.docs[doc_id] is not None)
+
+    def to_bytes(self) -> bytes:
+        self.compact()
+        payload = {
+            "version": INDEX_FORMAT_VERSION,
+            "commit": self.commit,
+            "docs": self.docs,
+            "postings": {
+                trigram: base64.b64encode(posting.tobytes()).decode("ascii")
+                for trigram, posting in self.postings.items()
+            },
+        }
+        return zlib.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"), 1)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CodeIndex":
+        payload = json.loads(zlib.decompress(data))
+        if payload.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError("Code index format không tương thích")
+        index = cls(payload["commit"])
+        index.docs = [tuple(doc) if doc else None for doc in payload["docs"]]
+        index._path_to_doc = {doc[0]: doc_id for doc_id, doc in enumerate(index.docs) if doc}
+        for trigram, encoded in payload["postings"].items():
+            posting = array.array("I")
+            posting.frombytes(base64.b64decode(encoded))
+            index.postings[trigram] = posting
+        return index
+
+
+def _git_output(args: List[str], cwd: str) -> str:
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise ValueError(f"git {args[0]} thất bại: {result.stderr.strip()}")
+    return result.stdout
+
+
+def head_commit(checkout_path: str) -> str:
+    """Commit SHA của HEAD trong checkout"""
+    return _git_output(["rev-parse", "HEAD"], checkout_path).strip()
+
+
+def changed_paths_between(checkout_path: str, old_commit: str, new_commit: str) -> Optional[List[str]]:
+    """
+    Các path thay đổi giữa hai commit (ví dụ sau một lần fetch)
+
+    Returns:
+        List path, None nếu không tính được (commit cũ không có trong clone shallow...)
+    """
+    try:
+        output = _git_output(["diff", "--name-only", "--no-renames", "-z", old_commit, new_commit], checkout_path)
+    except (ValueError, subprocess.TimeoutExpired):
+        return None
+    return [path for path in output.split("\0") if path]
+
+
+def tracked_files(checkout_path: str, max_file_bytes: int = DEFAULT_MAX_FILE_BYTES) -> Dict[str, str]:
+    """
+    Các file được track và có trên đĩa (bỏ qua path ngoài sparse-checkout)
+
+    Returns:
+        Map path -> blob sha
+    """
+    files = {}
+    for record in _git_output(["ls-files", "-s", "-z"], checkout_path).split("\0"):
+        if not record:
+            continue
+        meta, path = record.split("\t", 1)
+        mode, blob_sha, stage = meta.split()
+        if mode not in _REGULAR_FILE_MODES or stage != "0":
+            continue
+        try:
+            if os.path.getsize(os.path.join(checkout_path, path)) > max_file_bytes:
+                continue
+        except OSError:
+            continue
+        files[path] = blob_sha
+    return files
+
+
+def read_text_file(checkout_path: str, path: str) -> Optional[str]:
+    """Đọc file text, None nếu binary hoặc không đọc được"""
+    try:
+        with open(os.path.join(checkout_path, path), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if is_binary(data[:SNIFF_BYTES]):
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+def sync_index(index: CodeIndex, checkout_path: str, commit: str,
+               changed_paths: Optional[Iterable[str]] = None,
+               max_file_bytes: int = DEFAULT_MAX_FILE_BYTES) -> Dict[str, int]:
+    """
+    Cập nhật index theo checkout, chỉ đọc lại các file có blob sha thay đổi
+
+    Args:
+        index: Index cần cập nhật
+        checkout_path: Thư mục checkout
+        commit: Commit hiện tại của checkout
+        changed_paths: Chỉ kiểm tra các path này (ví dụ từ git diff sau fetch)
+        max_file_bytes: Bỏ qua file lớn hơn ngưỡng
+
+    Returns:
+        Số file added/updated/removed
+    """
+    current = tracked_files(checkout_path, max_file_bytes)
+    indexed = index.indexed_files()
+    paths = set(changed_paths) if changed_paths is not None else set(current) | set(indexed)
+
+    stats = {"added": 0, "updated": 0, "removed": 0}
+    for path in paths:
+        blob_sha = current.get(path)
+        if blob_sha is None:
+            if path in indexed:
+                index.remove(path)
+                stats["removed"] += 1
+            continue
+        if indexed.get(path) == blob_sha:
+            continue
+        text = read_text_file(checkout_path, path)
+        if text is None:
+            if path in indexed:
+                index.remove(path)
+                stats["removed"] += 1
+            continue
+        stats["updated" if path in indexed else "added"] += 1
+        index.add(path, blob_sha, text)
+
+    index.commit = commit
+    index.maybe_compact()
+    return stats
+
+
+def search_index(index: CodeIndex, checkout_path: str, query: str, regex: bool = False,
+                 case_sensitive: bool = False, path_glob: str = "", context_lines: int = 2,
+                 max_results: int = 50) -> Dict[str, Any]:
+    """
+    Tìm query trong checkout với index
+
+    Args:
+        index: Trigram index của checkout
+        checkout_path: Thư mục checkout
+        query: Chuỗi literal hoặc regex
+        regex: Query là regex
+        case_sensitive: Phân biệt hoa thường
+        path_glob: Chỉ tìm trong path khớp glob (ví dụ "*.py", "src/**")
+        context_lines: Số dòng context trước/sau mỗi match
+        max_results: Số match tối đa
+
+    Returns:
+        Dict chứa matches (path, line, text, before, after) và thống kê
+    """
+    flags = 0 if case_sensitive else re.IGNORECASE
+    try:
+        compiled = re.compile(query if regex else re.escape(query), flags)
+    except re.error as e:
+        raise ValueError(f"Regex không hợp lệ: {e}")
+
+    started = time.perf_counter()
+    candidates = index.candidates(required_trigrams(query, regex))
+    matches: List[Dict[str, Any]] = []
+    files_matched = 0
+    truncated = False
+    for doc_id in candidates:
+        path = index.docs[doc_id][0]
+        if path_glob and not fnmatch.fnmatchcase(path, path_glob):
+            continue
+        text = read_text_file(checkout_path, path)
+        if text is None:
+            continue
+        lines = text.splitlines()
+        found = False
+        for number, line in enumerate(lines):
+            if not compiled.search(line):
+                continue
+            found = True
+            if len(matches) >= max_results:
+                truncated = True
+                break
+            matches.append({
+                "path": path,
+                "line": number + 1,
+                "text": line,
+                "before": lines[max(0, number - context_lines):number],
+                "after": lines[number + 1:number + 1 + context_lines],
+            })
+        files_matched += found
+        if truncated:
+            break
+
+    return {
+        "matches": matches,
+        "count": len(matches),
+        "files_matched": files_matched,
+        "candidate_files": len(candidates),
+        "indexed_files": index.file_count,
+        "truncated": truncated,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+class CodeIndexManager:
+    """
+    Quản lý index theo repository/commit: cache trong bộ nhớ và lưu trên đĩa
+
+    index_class cần có commit, indexed_files(), add(), remove(), maybe_compact(),
+    to_bytes() và from_bytes() (CodeIndex, bm25_index.BM25Index)
+    """
+
+    def __init__(self, directory: str = DEFAULT_INDEX_DIR, max_loaded: int = DEFAULT_MAX_LOADED,
+                 keep_commits: int = DEFAULT_KEEP_COMMITS, index_class: type = CodeIndex,
+                 searcher: Callable[..., Dict[str, Any]] = search_index):
+        """
+        Args:
+            directory: Thư mục lưu index
+            max_loaded: Số index giữ trong bộ nhớ
+            keep_commits: Số commit được giữ trên đĩa cho mỗi repository
+            index_class: Kiểu index
+            searcher: Hàm search(index, checkout_path, query, **kwargs)
+        """
+        self.directory = directory
+        self.index_class = index_class
+        self.searcher = searcher
+        self.max_loaded = max_loaded
+        self.keep_commits = keep_commits
+        # (repo_key, checkout_path) -> index đang dùng cho checkout đó
+        self._loaded: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[Tuple[str, str], threading.RLock] = {}
+        self._counters = {"builds": 0, "incremental_updates": 0, "disk_loads": 0, "queries": 0}
+
+    def _repo_dir(self, repo_key: str) -> str:
+        return os.path.join(self.directory, repo_key.replace("/", "__").lower())
+
+    def _index_path(self, repo_key: str, commit: str) -> str:
+        return os.path.join(self._repo_dir(repo_key), f"{commit}.idx")
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def _load_from_disk(self, repo_key: str, commit: str) -> Optional[Any]:
+        """Load index của đúng commit, nếu không có thì index mới nhất của repository"""
+        repo_dir = self._repo_dir(repo_key)
+        exact = self._index_path(repo_key, commit)
+        candidates = [exact] if os.path.exists(exact) else []
+        if not candidates and os.path.isdir(repo_dir):
+            stored = [os.path.join(repo_dir, name) for name in os.listdir(repo_dir) if name.endswith(".idx")]
+            candidates = sorted(stored, key=os.path.getmtime, reverse=True)[:1]
+        for path in candidates:
+            try:
+                with open(path, "rb") as f:
+                    index = self.index_class.from_bytes(f.read())
+            except (OSError, ValueError, zlib.error):
+                continue
+            self._count("disk_loads")
+            return index
+        return None
+
+    def _save(self, repo_key: str, index: Any) -> None:
+        """Ghi index atomic và chỉ giữ keep_commits commit gần nhất"""
+        repo_dir = self._repo_dir(repo_key)
+        os.makedirs(repo_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=repo_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(index.to_bytes())
+            os.replace(tmp_path, self._index_path(repo_key, index.commit))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        stored = sorted(
+            (os.path.join(repo_dir, name) for name in os.listdir(repo_dir) if name.endswith(".idx")),
+            key=os.path.getmtime, reverse=True,
+        )
+        for path in stored[self.keep_commits:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _checkout_lock(self, key: Tuple[str, str]) -> threading.RLock:
+        # Build/cập nhật và query trên cùng checkout chạy tuần tự (index bị sửa tại chỗ)
+        with self._lock:
+            return self._build_locks.setdefault(key, threading.RLock())
+
+    def get_index(self, repo_key: str, checkout_path: str,
+                  changed_paths: Optional[Iterable[str]] = None) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Lấy index cho checkout, build hoặc cập nhật incremental nếu HEAD đã đổi
+
+        Args:
+            repo_key: "owner/repo"
+            checkout_path: Thư mục checkout
+            changed_paths: Các path đã thay đổi (optional, để cập nhật nhanh hơn)
+
+        Returns:
+            Tuple (index, thông tin build: action, commit, thời gian, số file thay đổi)
+        """
+        checkout_path = os.path.realpath(checkout_path)
+        commit = head_commit(checkout_path)
+        key = (repo_key, checkout_path)
+        with self._checkout_lock(key):
+            with self._lock:
+                index = self._loaded.get(key)
+                if index is not None:
+                    self._loaded.move_to_end(key)
+            if index is not None and index.commit == commit:
+                return index, {"action": "cached", "commit": commit}
+
+            started = time.perf_counter()
+            if index is not None:
+                # Index của chính checkout này: chỉ kiểm tra các path thay đổi giữa hai commit
+                if changed_paths is None:
+                    changed_paths = changed_paths_between(checkout_path, index.commit, commit)
+                action = "updated"
+            else:
+                # Index trên đĩa có thể thuộc checkout khác (sparse-checkout khác): đối chiếu mọi file
+                changed_paths = None
+                index = self._load_from_disk(repo_key, commit)
+                action = "loaded" if index is not None and index.commit == commit else "updated"
+            if index is None:
+                action = "built"
+                index = self.index_class(commit)
+                self._count("builds")
+            changes = sync_index(index, checkout_path, commit, changed_paths)
+            if action == "updated":
+                self._count("incremental_updates")
+            if action != "loaded" or any(changes.values()):
+                self._save(repo_key, index)
+
+            with self._lock:
+                self._loaded[key] = index
+                self._loaded.move_to_end(key)
+                while len(self._loaded) > self.max_loaded:
+                    self._loaded.popitem(last=False)
+
+        return index, {
+            "action": action,
+            "commit": commit,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            **changes,
+        }
+
+    def search(self, repo_key: str, checkout_path: str, query: str, **kwargs) -> Dict[str, Any]:
+        """
+        Tìm kiếm trong checkout (build/cập nhật index nếu cần)
+
+        Args:
+            repo_key: "owner/repo"
+            checkout_path: Thư mục checkout
+            query: Query
+            **kwargs: Tham số của searcher
+
+        Returns:
+            Kết quả searcher kèm thông tin index
+        """
+        checkout_path = os.path.realpath(checkout_path)
+        with self._checkout_lock((repo_key, checkout_path)):
+            index, index_info = self.get_index(repo_key, checkout_path)
+            result = self.searcher(index, checkout_path, query, **kwargs)
+        self._count("queries")
+        result["index"] = index_info
+        return result
+
+    def forget_checkouts(self, root: str) -> int:
+        """
+        Bỏ các index trong bộ nhớ của checkout nằm dưới root (index trên đĩa được giữ)
+
+        Args:
+            root: Thư mục chứa các checkout (ví dụ thư mục clone của một session)
+
+        Returns:
+            Số index đã bỏ
+        """
+        prefix = os.path.join(os.path.realpath(root), "")
+        with self._lock:
+            keys = [key for key in self._loaded if key[1].startswith(prefix)]
+            for key in keys:
+                del self._loaded[key]
+            for key in [key for key in self._build_locks if key[1].startswith(prefix)]:
+                del self._build_locks[key]
+        return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "loaded": len(self._loaded), "directory": self.directory}
+
+
+_code_index_manager: Optional[CodeIndexManager] = None
+_code_index_manager_lock = threading.Lock()
+
+
+def get_code_index_manager() -> CodeIndexManager:
+    """
+    Lấy code index manager dùng chung của process
+
+    Returns:
+        CodeIndexManager instance
+    """
+    global _code_index_manager
+    if _code_index_manager is None:
+        with _code_index_manager_lock:
+            if _code_index_manager is None:
+                _code_index_manager = CodeIndexManager()
+    return _code_index_manager
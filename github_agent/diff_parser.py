@@ -0,0 +1,356 @@
+"""
+Parse unified diff của pull request thành cấu trúc theo file/hunk
+Tool trả về từng trang file trong giới hạn byte/token, lọc theo glob và chỉ tóm
+tắt (không in patch) các file generated, vendored và lockfile, thay vì nhét
+toàn bộ diff dạng text vào một chuỗi markdown
+"""
+import fnmatch
+import os
+import re
+from typing import Dict, Any, Iterable, List, Optional
+
+from .projection import BYTES_PER_TOKEN, estimate_tokens
+
+DIFF_MEDIA_TYPE = "application/vnd.github.v3.diff"
+
+# Giới hạn mặc định cho mỗi trang diff trả về model (token ước lượng)
+DEFAULT_DIFF_MAX_TOKENS = int(os.getenv("GITHUB_AGENT_DIFF_MAX_TOKENS", "12000"))
+DEFAULT_DIFF_MAX_FILES = 30
+# pulls/{n}/files trả về tối đa 3000 file
+MAX_PULL_REQUEST_FILES = 3000
+
+_HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$")
+_DIFF_GIT_RE = re.compile(r"^diff --git (?:\"?a/)(.+?)\"? (?:\"?b/)(.+?)\"?$")
+
+LOCKFILE_NAMES = frozenset((
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb",
+    "poetry.lock", "uv.lock", "Pipfile.lock", "pdm.lock", "Cargo.lock", "Gemfile.lock",
+    "composer.lock", "go.sum", "mix.lock", "pubspec.lock", "Podfile.lock", "packages.lock.json",
+    "flake.lock",
+))
+VENDORED_DIRS = ("vendor/", "vendors/", "third_party/", "thirdparty/", "third-party/", "node_modules/",
+                 "external/", "extern/", "bower_components/", ".yarn/")
+GENERATED_PATTERNS = (
+    "*.min.js", "*.min.css", "*.map", "*_pb2.py", "*_pb2_grpc.py", "*.pb.go", "*.pb.cc", "*.pb.h",
+    "*.generated.*", "*.g.dart", "*.designer.cs", "*.snap", "dist/*", "build/*", "*/dist/*",
+    "*/build/*", "__generated__/*", "*/__generated__/*", "gen/*", "*/gen/*",
+)
+# Marker trong nội dung file generated (ví dụ Go: "Code generated ... DO NOT EDIT")
+_GENERATED_MARKER_RE = re.compile(r"@generated|Code generated .* DO NOT EDIT|auto-generated|autogenerated",
+                                  re.IGNORECASE)
+_MARKER_SCAN_LINES = 10
+
+
+class PullRequestDiffTooLargeError(ValueError):
+    """GitHub từ chối trả diff vì vượt giới hạn (HTTP 406), cần dùng pulls/{n}/files"""
+
+
+def classify_path(path: str) -> Optional[str]:
+    """
+    Phân loại file không cần review chi tiết
+
+    Args:
+        path: Đường dẫn file
+
+    Returns:
+        "lockfile", "vendored", "generated" hoặc None
+    """
+    name = path.rsplit("/", 1)[-1]
+    if name in LOCKFILE_NAMES:
+        return "lockfile"
+    if any(path.startswith(prefix) or f"/{prefix}" in path for prefix in VENDORED_DIRS):
+        return "vendored"
+    if any(fnmatch.fnmatchcase(path, pattern) for pattern in GENERATED_PATTERNS):
+        return "generated"
+    return None
+
+
+class DiffHunk:
+    """Một hunk của diff"""
+
+    __slots__ = ("old_start", "old_lines", "new_start", "new_lines", "section", "lines")
+
+    def __init__(self, old_start: int, old_lines: int, new_start: int, new_lines: int, section: str = ""):
+        self.old_start = old_start
+        self.old_lines = old_lines
+        self.new_start = new_start
+        self.new_lines = new_lines
+        # Context của hunk (tên hàm/class sau @@)
+        self.section = section
+        self.lines: List[str] = []
+
+    @property
+    def header(self) -> str:
+        header = f"@@ -{self.old_start},{self.old_lines} +{self.new_start},{self.new_lines} @@"
+        return f"{header} {self.section}" if self.section else header
+
+    @property
+    def additions(self) -> int:
+        return sum(1 for line in self.lines if line.startswith("+"))
+
+    @property
+    def deletions(self) -> int:
+        return sum(1 for line in self.lines if line.startswith("-"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "header": self.header,
+            "old_start": self.old_start,
+            "new_start": self.new_start,
+            "additions": self.additions,
+            "deletions": self.deletions,
+            "patch": "\n".join(self.lines),
+        }
+
+
+class DiffFile:
+    """Thay đổi của một file trong diff"""
+
+    __slots__ = ("path", "old_path", "status", "binary", "patch_omitted", "hunks", "category",
+                 "_additions", "_deletions")
+
+    def __init__(self, path: str, old_path: Optional[str] = None, status: str = "modified"):
+        self.path = path
+        self.old_path = old_path
+        # added, removed, modified, renamed
+        self.status = status
+        self.binary = False
+        # GitHub không trả patch (file quá lớn) trong files endpoint
+        self.patch_omitted = False
+        self.hunks: List[DiffHunk] = []
+        self.category = classify_path(path)
+        # Stats từ API (files endpoint) khi không có patch
+        self._additions: Optional[int] = None
+        self._deletions: Optional[int] = None
+
+    @property
+    def additions(self) -> int:
+        if self._additions is not None:
+            return self._additions
+        return sum(hunk.additions for hunk in self.hunks)
+
+    @property
+    def deletions(self) -> int:
+        if self._deletions is not None:
+            return self._deletions
+        return sum(hunk.deletions for hunk in self.hunks)
+
+    @property
+    def summarized(self) -> bool:
+        """File chỉ được tóm tắt (không trả về patch)"""
+        return self.binary or self.patch_omitted or self.category is not None
+
+    def detect_generated_marker(self) -> None:
+        """Nhận diện file generated qua marker trong các dòng thêm vào đầu file"""
+        if self.category is not None or not self.hunks or self.hunks[0].new_start > 1:
+            return
+        head = self.hunks[0].lines[:_MARKER_SCAN_LINES]
+        if any(_GENERATED_MARKER_RE.search(line) for line in head if not line.startswith("-")):
+            self.category = "generated"
+
+    def summary(self) -> Dict[str, Any]:
+        result = {
+            "path": self.path,
+            "status": self.status,
+            "additions": self.additions,
+            "deletions": self.deletions,
+        }
+        if self.old_path and self.old_path != self.path:
+            result["old_path"] = self.old_path
+        if self.binary:
+            result["binary"] = True
+        if self.patch_omitted:
+            result["patch_omitted"] = True
+        if self.category:
+            result["category"] = self.category
+        return result
+
+
+def _parse_hunk_header(line: str) -> Optional[DiffHunk]:
+    match = _HUNK_HEADER_RE.match(line)
+    if not match:
+        return None
+    old_start, old_lines, new_start, new_lines, section = match.groups()
+    return DiffHunk(int(old_start), int(old_lines if old_lines is not None else 1),
+                    int(new_start), int(new_lines if new_lines is not None else 1), section.strip())
+
+
+def parse_patch(diff_file: DiffFile, patch: str) -> DiffFile:
+    """Parse phần hunk của một file (ví dụ field patch của pulls/{n}/files)"""
+    hunk: Optional[DiffHunk] = None
+    for line in patch.splitlines():
+        if line.startswith("@@"):
+            hunk = _parse_hunk_header(line)
+            if hunk is not None:
+                diff_file.hunks.append(hunk)
+        elif hunk is not None:
+            hunk.lines.append(line)
+    diff_file.detect_generated_marker()
+    return diff_file
+
+
+def parse_unified_diff(text: str) -> List[DiffFile]:
+    """
+    Parse unified diff (git format) thành list DiffFile
+
+    Args:
+        text: Diff dạng text (media type application/vnd.github.v3.diff)
+
+    Returns:
+        List DiffFile theo thứ tự trong diff
+    """
+    files: List[DiffFile] = []
+    current: Optional[DiffFile] = None
+    hunk: Optional[DiffHunk] = None
+    for line in text.splitlines():
+        if line.startswith("diff --git "):
+            if current is not None:
+                current.detect_generated_marker()
+            match = _DIFF_GIT_RE.match(line)
+            old_path, path = match.groups() if match else ("", line[len("diff --git "):])
+            current = DiffFile(path, old_path)
+            files.append(current)
+            hunk = None
+        elif current is None:
+            continue
+        elif hunk is not None and line[:1] in ("", " ", "+", "-", "\\"):
+            # Dòng context rỗng có thể bị mất dấu cách đầu dòng
+            hunk.lines.append(line)
+        elif line.startswith("@@"):
+            hunk = _parse_hunk_header(line)
+            if hunk is not None:
+                current.hunks.append(hunk)
+        elif line.startswith("new file mode"):
+            current.status = "added"
+        elif line.startswith("deleted file mode"):
+            current.status = "removed"
+        elif line.startswith("rename from "):
+            current.old_path = line[len("rename from "):]
+            current.status = "renamed"
+        elif line.startswith("rename to "):
+            current.path = line[len("rename to "):]
+            current.category = classify_path(current.path)
+        elif line.startswith(("Binary files ", "GIT binary patch")):
+            current.binary = True
+        elif line.startswith("+++ b/"):
+            current.path = line[len("+++ b/"):]
+            current.category = classify_path(current.path)
+    if current is not None:
+        current.detect_generated_marker()
+    return files
+
+
+def files_from_api(items: Iterable[Dict[str, Any]]) -> List[DiffFile]:
+    """
+    Dựng DiffFile từ response của pulls/{n}/files (dùng khi diff vượt giới hạn của GitHub)
+
+    Args:
+        items: Các item có filename, status, additions, deletions, patch, previous_filename
+
+    Returns:
+        List DiffFile
+    """
+    files = []
+    for item in items:
+        diff_file = DiffFile(item["filename"], item.get("previous_filename"), item.get("status", "modified"))
+        diff_file._additions = item.get("additions")
+        diff_file._deletions = item.get("deletions")
+        if item.get("patch"):
+            parse_patch(diff_file, item["patch"])
+        elif item.get("changes"):
+            # GitHub bỏ patch của file binary hoặc quá lớn
+            diff_file.patch_omitted = True
+        files.append(diff_file)
+    return files
+
+
+def _truncate_hunk(hunk: Dict[str, Any], max_tokens: int) -> Dict[str, Any]:
+    """Giữ các dòng đầu của patch vừa max_tokens, ghi số dòng bị bỏ vào truncated_lines"""
+    patch = hunk["patch"]
+    data = patch.encode("utf-8")[:max(0, max_tokens) * BYTES_PER_TOKEN]
+    kept = data.decode("utf-8", errors="ignore")
+    if len(kept) < len(patch) and "\n" in kept:
+        # Cắt ở cuối dòng; dòng đầu tiên quá dài (minified...) thì cắt giữa dòng
+        kept = kept[:kept.rindex("\n")]
+    total_lines = patch.count("\n") + 1
+    kept_lines = kept.count("\n") + 1 if kept else 0
+    return {**hunk, "patch": kept, "truncated_lines": total_lines - kept_lines}
+
+
+def build_diff_page(files: List[DiffFile], path_glob: str = "", file_offset: int = 0,
+                    max_files: int = DEFAULT_DIFF_MAX_FILES,
+                    max_tokens: int = DEFAULT_DIFF_MAX_TOKENS) -> Dict[str, Any]:
+    """
+    Chọn một trang file của diff trong giới hạn token
+
+    Trang luôn có ít nhất một file; nếu patch của file đầu trang vượt giới hạn
+    thì chỉ trả về các hunk đầu tiên vừa giới hạn (hunk đầu tiên quá lớn được cắt
+    bớt dòng, số dòng bị bỏ nằm trong truncated_lines của hunk)
+
+    Args:
+        files: Các file đã parse
+        path_glob: Chỉ lấy file khớp glob (ví dụ "src/*.py")
+        file_offset: Vị trí file bắt đầu (trong danh sách đã lọc)
+        max_files: Số file tối đa của trang
+        max_tokens: Giới hạn token ước lượng của các patch trong trang
+
+    Returns:
+        Dict chứa stats toàn diff, files của trang và thông tin phân trang
+    """
+    selected = [f for f in files if not path_glob or fnmatch.fnmatchcase(f.path, path_glob)]
+    by_category: Dict[str, int] = {}
+    for diff_file in selected:
+        if diff_file.category:
+            by_category[diff_file.category] = by_category.get(diff_file.category, 0) + 1
+    stats = {
+        "files": len(selected),
+        "additions": sum(f.additions for f in selected),
+        "deletions": sum(f.deletions for f in selected),
+        "summarized_files": sum(1 for f in selected if f.summarized),
+        "by_category": by_category,
+    }
+
+    page: List[Dict[str, Any]] = []
+    used_tokens = 0
+    index = max(0, file_offset)
+    while index < len(selected) and len(page) < max_files:
+        diff_file = selected[index]
+        entry = diff_file.summary()
+        if not diff_file.summarized:
+            hunks = [hunk.to_dict() for hunk in diff_file.hunks]
+            cost = sum(estimate_tokens(hunk["patch"]) for hunk in hunks)
+            if used_tokens + cost > max_tokens:
+                if page:
+                    # File sau sẽ bắt đầu trang kế tiếp
+                    break
+                # File đầu trang quá lớn: giữ các hunk đầu vừa giới hạn
+                kept = []
+                for hunk in hunks:
+                    hunk_cost = estimate_tokens(hunk["patch"])
+                    if used_tokens + hunk_cost > max_tokens:
+                        if not kept:
+                            # Hunk đầu tiên một mình đã vượt giới hạn: cắt bớt dòng
+                            hunk = _truncate_hunk(hunk, max_tokens - used_tokens)
+                            used_tokens += estimate_tokens(hunk["patch"])
+                            kept.append(hunk)
+                        break
+                    used_tokens += hunk_cost
+                    kept.append(hunk)
+                entry["omitted_hunks"] = len(hunks) - len(kept)
+                hunks = kept
+                cost = 0
+            used_tokens += cost
+            entry["hunks"] = hunks
+        page.append(entry)
+        index += 1
+
+    return {
+        "stats": stats,
+        "files": page,
+        "page": {
+            "file_offset": max(0, file_offset),
+            "returned_files": len(page),
+            "next_file_offset": index if index < len(selected) else None,
+            "estimated_tokens": used_tokens,
+        },
+    }
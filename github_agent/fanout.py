@@ -0,0 +1,193 @@
+"""
+Fan-out các GitHub call độc lập trong một tool
+Chạy song song (thread pool cho client sync, asyncio cho client async) để độ trễ
+của tool là round trip chậm nhất thay vì tổng các round trip. Mỗi call có
+timeout riêng và lỗi của một call không làm hỏng kết quả của các call khác
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Timeout mặc định của mỗi call (giây)
+DEFAULT_CALL_TIMEOUT = float(os.getenv("GITHUB_AGENT_FANOUT_TIMEOUT", "30"))
+# Số thread của pool dùng cho client sync
+MAX_FANOUT_WORKERS = int(os.getenv("GITHUB_AGENT_FANOUT_WORKERS", "8"))
+
+_in_worker = threading.local()
+
+
+class CallTimeoutError(ValueError):
+    """Một call trong fan-out vượt timeout"""
+
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f"{name} quá {timeout:g} giây")
+        self.name = name
+        self.timeout = timeout
+
+
+class CallResult:
+    """Kết quả của một call trong fan-out"""
+
+    __slots__ = ("value", "error", "elapsed")
+
+    def __init__(self, value: Any = None, error: Optional[BaseException] = None, elapsed: float = 0.0):
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def unwrap(self) -> Any:
+        """Trả về value, hoặc raise lại lỗi của call"""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class FanOutStats:
+    """Thống kê fan-out: số call, timeout, lỗi và thời gian tiết kiệm so với chạy tuần tự"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fan_outs = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.saved_seconds = 0.0
+
+    def record(self, results: Dict[str, CallResult], wall: float) -> None:
+        with self._lock:
+            self.fan_outs += 1
+            self.calls += len(results)
+            self.timeouts += sum(1 for r in results.values() if isinstance(r.error, CallTimeoutError))
+            self.failures += sum(1 for r in results.values() if r.error is not None)
+            self.saved_seconds += max(0.0, sum(r.elapsed for r in results.values()) - wall)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "fan_outs": self.fan_outs,
+                "calls": self.calls,
+                "timeouts": self.timeouts,
+                "failures": self.failures,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+fanout_stats = FanOutStats()
+
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_fanout_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    Lấy thread pool dùng chung cho fan_out
+
+    Returns:
+        ThreadPoolExecutor
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=MAX_FANOUT_WORKERS, thread_name_prefix="github-fanout"
+                )
+    return _executor
+
+
+def _run_call(fn: Callable[[], Any]) -> CallResult:
+    started = time.monotonic()
+    previous = getattr(_in_worker, "active", False)
+    _in_worker.active = True
+    try:
+        return CallResult(fn(), None, time.monotonic() - started)
+    except Exception as e:
+        return CallResult(None, e, time.monotonic() - started)
+    finally:
+        _in_worker.active = previous
+
+
+def fan_out(calls: Dict[str, Callable[[], Any]], timeout: float = DEFAULT_CALL_TIMEOUT,
+            timeouts: Optional[Dict[str, float]] = None) -> Dict[str, CallResult]:
+    """
+    Chạy các call độc lập song song trên thread pool
+
+    Call vượt timeout được trả về với CallTimeoutError; thread của call đó vẫn
+    chạy tới khi request kết thúc (transport có timeout riêng) nhưng tool không chờ.
+    Fan-out lồng nhau (gọi từ trong một call) chạy tuần tự, không áp timeout, để
+    tránh deadlock pool
+
+    Args:
+        calls: Map tên -> hàm không tham số
+        timeout: Timeout mặc định của mỗi call (giây)
+        timeouts: Timeout riêng theo tên call
+
+    Returns:
+        Map tên -> CallResult
+    """
+    timeouts = timeouts or {}
+    started = time.monotonic()
+    if len(calls) <= 1 or getattr(_in_worker, "active", False):
+        results = {name: _run_call(fn) for name, fn in calls.items()}
+        fanout_stats.record(results, time.monotonic() - started)
+        return results
+
+    executor = get_fanout_executor()
+    # Copy context để contextvar (progress reporter...) có hiệu lực trong worker
+    futures = {
+        name: executor.submit(contextvars.copy_context().run, _run_call, fn)
+        for name, fn in calls.items()
+    }
+    results: Dict[str, CallResult] = {}
+    for name, future in futures.items():
+        call_timeout = timeouts.get(name, timeout)
+        remaining = max(0.0, started + call_timeout - time.monotonic())
+        try:
+            results[name] = future.result(timeout=remaining)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            results[name] = CallResult(None, CallTimeoutError(name, call_timeout), call_timeout)
+    fanout_stats.record(results, time.monotonic() - started)
+    return results
+
+
+async def afan_out(calls: Dict[str, Awaitable[Any]], timeout: float = DEFAULT_CALL_TIMEOUT,
+                   timeouts: Optional[Dict[str, float]] = None) -> Dict[str, CallResult]:
+    """
+    Phiên bản asyncio của fan_out: call vượt timeout bị cancel
+
+    Args:
+        calls: Map tên -> coroutine
+        timeout: Timeout mặc định của mỗi call (giây)
+        timeouts: Timeout riêng theo tên call
+
+    Returns:
+        Map tên -> CallResult
+    """
+    timeouts = timeouts or {}
+    started = time.monotonic()
+
+    async def run(name: str, awaitable: Awaitable[Any]) -> CallResult:
+        call_started = time.monotonic()
+        call_timeout = timeouts.get(name, timeout)
+        try:
+            value = await asyncio.wait_for(awaitable, call_timeout)
+        except asyncio.TimeoutError:
+            return CallResult(None, CallTimeoutError(name, call_timeout), time.monotonic() - call_started)
+        except Exception as e:
+            return CallResult(None, e, time.monotonic() - call_started)
+        return CallResult(value, None, time.monotonic() - call_started)
+
+    # CancelledError của tool vẫn được truyền ra và cancel mọi call
+    values = await asyncio.gather(*(run(name, awaitable) for name, awaitable in calls.items()))
+    results = dict(zip(calls, values))
+    fanout_stats.record(results, time.monotonic() - started)
+    return results
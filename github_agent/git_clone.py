@@ -0,0 +1,298 @@
+"""
+Clone profile cho clone_repository: shallow, partial (blobless/treeless),
+single-branch/ref và sparse-checkout, kèm thống kê dung lượng tải và thời gian
+"""
+import asyncio
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+
+from .mirror_cache import (
+    DEFAULT_GIT_TIMEOUT,
+    MirrorCache,
+    acquire_async,
+    git_verbosity,
+    github_remote_url,
+    run_git,
+    run_git_async,
+)
+from .progress import GitProgressReporter, has_progress_reporter, report_progress
+
+# Filter của partial clone được hỗ trợ
+CLONE_FILTERS = ("blob:none", "tree:0")
+
+# Số clone chạy đồng thời tối đa trong process (bảo vệ đĩa và network)
+MAX_CONCURRENT_CLONES = int(os.getenv("GITHUB_AGENT_MAX_CONCURRENT_CLONES", "4"))
+
+_COMMIT_SHA_RE = re.compile(r"[0-9a-f]{40}")
+
+_clone_slots = threading.BoundedSemaphore(MAX_CONCURRENT_CLONES)
+
+# (args, cwd, cần token)
+GitCommand = Tuple[List[str], Optional[str], bool]
+
+
+class CloneProfile:
+    """Các tùy chọn clone"""
+
+    __slots__ = ("depth", "filter", "ref", "single_branch", "sparse_paths", "timeout")
+
+    def __init__(self, depth: int = 0, filter: str = "", ref: str = "", single_branch: bool = False,
+                 sparse_paths: Optional[List[str]] = None, timeout: float = DEFAULT_GIT_TIMEOUT):
+        """
+        Args:
+            depth: Số commit lịch sử (0 = toàn bộ)
+            filter: Partial clone filter ("blob:none" hoặc "tree:0")
+            ref: Branch/tag/commit SHA cần checkout (rỗng = default branch)
+            single_branch: Chỉ lấy một branch
+            sparse_paths: Pattern của sparse-checkout (chỉ checkout các path này)
+            timeout: Timeout cho mỗi lệnh git (giây)
+        """
+        if depth < 0:
+            raise ValueError("depth phải >= 0")
+        if filter and filter not in CLONE_FILTERS:
+            raise ValueError(f"filter không hợp lệ: {filter} (hỗ trợ: {', '.join(CLONE_FILTERS)})")
+        if timeout <= 0:
+            raise ValueError("timeout phải > 0")
+        self.depth = depth
+        self.filter = filter
+        self.ref = ref
+        self.single_branch = single_branch
+        self.sparse_paths = [path for path in (sparse_paths or []) if path.strip()]
+        self.timeout = timeout
+
+    @property
+    def is_full(self) -> bool:
+        """Clone đầy đủ lịch sử và object (dùng được bare mirror)"""
+        return not (self.depth or self.filter or self.single_branch)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "filter": self.filter,
+            "ref": self.ref,
+            "single_branch": self.single_branch,
+            "sparse_paths": self.sparse_paths,
+            "timeout": self.timeout,
+        }
+
+
+# Các profile có sẵn, tham số riêng lẻ sẽ override
+CLONE_PRESETS: Dict[str, Dict[str, Any]] = {
+    "full": {},
+    "shallow": {"depth": 1, "single_branch": True},
+    "blobless": {"filter": "blob:none"},
+    "treeless": {"filter": "tree:0"},
+}
+
+
+def build_clone_profile(profile: str = "", depth: int = 0, filter: str = "", ref: str = "",
+                        single_branch: bool = False, sparse_paths: Optional[List[str]] = None,
+                        timeout: float = 0) -> CloneProfile:
+    """
+    Tạo CloneProfile từ tên preset và các tham số override
+
+    Args:
+        profile: Tên preset (full, shallow, blobless, treeless)
+        depth, filter, ref, single_branch, sparse_paths, timeout: Override preset (giá trị rỗng/0 = giữ preset)
+
+    Returns:
+        CloneProfile
+    """
+    if profile and profile not in CLONE_PRESETS:
+        raise ValueError(f"Clone profile không hợp lệ: {profile} (hỗ trợ: {', '.join(CLONE_PRESETS)})")
+    options = dict(CLONE_PRESETS.get(profile or "full", {}))
+    if depth:
+        options["depth"] = depth
+    if filter:
+        options["filter"] = filter
+    if single_branch:
+        options["single_branch"] = True
+    if sparse_paths:
+        options["sparse_paths"] = sparse_paths
+    return CloneProfile(ref=ref, timeout=timeout or DEFAULT_GIT_TIMEOUT, **options)
+
+
+def directory_size(path: str) -> int:
+    """Tổng dung lượng file trong thư mục (bytes)"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def checkout_commands(repo_path: str, profile: CloneProfile, progress: bool = False) -> List[GitCommand]:
+    """Áp dụng sparse-checkout rồi checkout ref trong clone --no-checkout"""
+    commands: List[GitCommand] = []
+    if profile.sparse_paths:
+        # Non-cone mode để hỗ trợ pattern dạng glob
+        commands.append((["sparse-checkout", "set", "--no-cone", *profile.sparse_paths], repo_path, False))
+    # Partial clone tải blob còn thiếu khi checkout nên cần token
+    commands.append((["checkout", git_verbosity(progress), *([profile.ref] if profile.ref else [])], repo_path, True))
+    return commands
+
+
+def direct_clone_commands(owner: str, repo: str, repo_path: str, profile: CloneProfile,
+                          progress: bool = False) -> List[GitCommand]:
+    """
+    Các lệnh git để clone trực tiếp từ GitHub với depth/filter/single-branch của profile
+
+    Args:
+        owner: Tên owner của repository
+        repo: Tên repository
+        repo_path: Thư mục đích
+        profile: Clone profile
+        progress: Dùng --progress thay cho --quiet
+
+    Returns:
+        List (args, cwd, cần token)
+    """
+    options = ["--no-checkout", git_verbosity(progress)]
+    if profile.depth:
+        options.append(f"--depth={profile.depth}")
+    if profile.filter:
+        options.append(f"--filter={profile.filter}")
+    if profile.single_branch:
+        options.append("--single-branch")
+
+    url = github_remote_url(owner, repo)
+    if _COMMIT_SHA_RE.fullmatch(profile.ref):
+        # Không clone --branch theo SHA được: init rồi fetch đúng commit
+        fetch_options = [option for option in options if option.startswith(("--depth", "--filter"))]
+        commands = [
+            (["init", "--quiet", repo_path], None, False),
+            (["remote", "add", "origin", url], repo_path, False),
+            (["fetch", git_verbosity(progress), *fetch_options, "origin", profile.ref], repo_path, True),
+        ]
+    else:
+        if profile.ref:
+            options.append(f"--branch={profile.ref}")
+        commands = [(["clone", *options, url, repo_path], None, True)]
+    return commands + checkout_commands(repo_path, profile, progress)
+
+
+def _run_commands(commands: List[GitCommand], token: str, timeout: float) -> None:
+    for args, cwd, needs_token in commands:
+        run_git(args, token=token if needs_token else None, cwd=cwd, timeout=timeout)
+
+
+async def _run_commands_async(commands: List[GitCommand], token: str, timeout: float,
+                              on_output: Optional[Callable[[str], Awaitable[None]]] = None) -> None:
+    for args, cwd, needs_token in commands:
+        await run_git_async(args, token=token if needs_token else None, cwd=cwd, timeout=timeout,
+                            on_output=on_output)
+
+
+def _uses_mirror(owner: str, repo: str, profile: CloneProfile, mirror_cache: MirrorCache) -> bool:
+    # Profile đầy đủ, hoặc mirror đã có sẵn trên đĩa (checkout local rẻ hơn mọi lần tải)
+    return profile.is_full or os.path.isdir(mirror_cache.mirror_path(owner, repo))
+
+
+def _cleanup_failed_clone(repo_path: str, existed: bool) -> None:
+    # Chỉ dọn thư mục do lần clone này tạo ra
+    if not existed:
+        shutil.rmtree(repo_path, ignore_errors=True)
+
+
+def clone_with_profile(owner: str, repo: str, token: str, repo_path: str, profile: CloneProfile,
+                       mirror_cache: MirrorCache) -> Dict[str, Any]:
+    """
+    Clone repository theo profile
+
+    Profile đầy đủ (hoặc khi mirror đã có sẵn trên đĩa) checkout từ bare mirror
+    dùng chung, vì checkout local rẻ hơn mọi lần tải qua network. Các profile
+    shallow/partial clone trực tiếp từ GitHub để không phải tạo mirror đầy đủ.
+    Số clone chạy đồng thời bị giới hạn bởi GITHUB_AGENT_MAX_CONCURRENT_CLONES
+
+    Args:
+        owner: Tên owner của repository
+        repo: Tên repository
+        token: GitHub PAT của session
+        repo_path: Thư mục đích
+        profile: Clone profile
+        mirror_cache: Mirror cache dùng chung
+
+    Returns:
+        Dict chứa strategy, transfer_bytes, duration và thông tin mirror (nếu có)
+    """
+    started = time.monotonic()
+    existed = os.path.exists(repo_path)
+    with _clone_slots:
+        queued = time.monotonic() - started
+        try:
+            if _uses_mirror(owner, repo, profile, mirror_cache):
+                objects_path = os.path.join(mirror_cache.mirror_path(owner, repo), "objects")
+                before = directory_size(objects_path)
+                mirror = mirror_cache.checkout(owner, repo, token, repo_path, profile.timeout, no_checkout=True)
+                _run_commands(checkout_commands(repo_path, profile), token, profile.timeout)
+                # Dung lượng tải = phần object mới của mirror
+                transfer_bytes = max(0, directory_size(objects_path) - before)
+            else:
+                mirror = None
+                _run_commands(direct_clone_commands(owner, repo, repo_path, profile), token, profile.timeout)
+                transfer_bytes = directory_size(os.path.join(repo_path, ".git", "objects"))
+        except BaseException:
+            _cleanup_failed_clone(repo_path, existed)
+            raise
+    return _clone_stats(mirror, transfer_bytes, started, queued)
+
+
+async def clone_with_profile_async(owner: str, repo: str, token: str, repo_path: str, profile: CloneProfile,
+                                   mirror_cache: MirrorCache) -> Dict[str, Any]:
+    """
+    Phiên bản asyncio của clone_with_profile
+
+    git chạy dạng asyncio subprocess với --progress, tiến độ được gửi qua
+    report_progress (TaskState.working update) và process bị kill khi task bị cancel
+    """
+    started = time.monotonic()
+    existed = os.path.exists(repo_path)
+    on_output = GitProgressReporter(f"Clone {owner}/{repo}") if has_progress_reporter() else None
+    if not _clone_slots.acquire(blocking=False):
+        await report_progress(f"Clone {owner}/{repo}: đang chờ slot clone (tối đa {MAX_CONCURRENT_CLONES})")
+        await acquire_async(_clone_slots)
+    try:
+        queued = time.monotonic() - started
+        try:
+            if _uses_mirror(owner, repo, profile, mirror_cache):
+                objects_path = os.path.join(mirror_cache.mirror_path(owner, repo), "objects")
+                before = await asyncio.to_thread(directory_size, objects_path)
+                mirror = await mirror_cache.checkout_async(owner, repo, token, repo_path, profile.timeout,
+                                                           no_checkout=True, on_output=on_output)
+                await _run_commands_async(checkout_commands(repo_path, profile, on_output is not None),
+                                          token, profile.timeout, on_output)
+                transfer_bytes = max(0, await asyncio.to_thread(directory_size, objects_path) - before)
+            else:
+                mirror = None
+                commands = direct_clone_commands(owner, repo, repo_path, profile, on_output is not None)
+                await _run_commands_async(commands, token, profile.timeout, on_output)
+                transfer_bytes = await asyncio.to_thread(
+                    directory_size, os.path.join(repo_path, ".git", "objects")
+                )
+        except BaseException:
+            # Gồm cả CancelledError: git đã bị kill, dọn checkout dở dang
+            _cleanup_failed_clone(repo_path, existed)
+            raise
+    finally:
+        _clone_slots.release()
+    return _clone_stats(mirror, transfer_bytes, started, queued)
+
+
+def _clone_stats(mirror: Optional[Dict[str, Any]], transfer_bytes: int, started: float,
+                 queued: float) -> Dict[str, Any]:
+    stats = {
+        "strategy": "mirror" if mirror else "direct",
+        "transfer_bytes": transfer_bytes,
+        "duration": round(time.monotonic() - started, 3),
+        "queued": round(queued, 3),
+    }
+    if mirror:
+        stats["mirror"] = mirror
+    return stats
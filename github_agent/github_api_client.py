@@ -2,28 +2,187 @@
 GitHub API Client để thay thế github-mcp-server
 Sử dụng GitHub REST API trực tiếp với session-based PAT
 """
-import requests
 import json
 import base64
+import functools
+import re
 import subprocess
 import tempfile
+import time
 import os
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, BinaryIO, Iterator, List, Optional, Tuple
 from urllib.parse import quote, urlparse
 from .session_manager import session_manager
+from .repo_context import repo_context_stats
+from .http_transport import HTTPTransport, get_transport
+from .response_cache import ResponseCache, get_response_cache, token_scope
+from .rate_limiter import RateLimitScheduler, get_rate_limit_scheduler, resource_for_url
+from .pagination import iter_items, page_size_for, parse_next_link
+from .tree_index import RepositoryTreeIndex, TreeEntry, TreeIndexCache, TreeWalker, get_tree_index_cache
+from .blob_cache import BlobCache, get_blob_cache
+from .mirror_cache import GitCommandError, MirrorCache, get_mirror_cache
+from .git_clone import CloneProfile, clone_with_profile
+from .diff_parser import DIFF_MEDIA_TYPE, PullRequestDiffTooLargeError
+from .graphql_queries import OverviewBuilder, check_response, record_query_cost
+from .single_flight import FlightResult, SingleFlight, flight_key, get_public_repos, get_single_flight
+from .large_file import (
+    CHUNK_SIZE,
+    DEFAULT_LARGE_FILE_BYTES,
+    RAW_MEDIA_TYPE,
+    build_excerpt,
+    spool_chunks,
+)
+
+COMMIT_SHA_RE = re.compile(r"[0-9a-f]{40}")
+
+
+def raise_for_github_status(status_code: int, text: str,
+                            not_found_message: str = "Repository hoặc resource không tồn tại") -> None:
+    """
+    Chuyển HTTP status lỗi của GitHub API thành ValueError
+    
+    Args:
+        status_code: HTTP status code
+        text: Body của response (dùng cho message lỗi)
+        not_found_message: Message khi gặp 404
+    """
+    if status_code == 401:
+        raise ValueError("GitHub token không hợp lệ hoặc đã hết hạn")
+    elif status_code == 404:
+        raise ValueError(not_found_message)
+    elif status_code >= 400:
+        raise ValueError(f"GitHub API error: {status_code} - {text}")
+
+
+def wrap_content_listing(result: Any) -> List[Dict[str, Any]]:
+    """Nếu contents API trả về single file, wrap trong list"""
+    if isinstance(result, dict):
+        return [result]
+    return result
+
+
+def decode_blob_text(data: bytes) -> str:
+    """Decode nội dung file thành text, file binary trả về placeholder"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return "[Binary file - không thể hiển thị]"
+
+
+def decode_file_content(result: Dict[str, Any], blob_cache: Optional[BlobCache] = None) -> Dict[str, Any]:
+    """
+    Decode base64 content của contents API nếu có
+    
+    Args:
+        result: Response của contents API
+        blob_cache: Lưu nội dung đã decode vào blob cache theo SHA (optional)
+    """
+    if "content" in result and result.get("encoding") == "base64":
+        # Bỏ bản base64 khỏi kết quả, chỉ giữ nội dung đã decode
+        data = base64.b64decode(result.pop("content"))
+        if blob_cache is not None and result.get("sha"):
+            blob_cache.put(result["sha"], data)
+        result["decoded_content"] = decode_blob_text(data)
+    return result
+
+
+def file_content_from_blob(entry: TreeEntry, data: bytes) -> Dict[str, Any]:
+    """Dựng kết quả giống contents API từ tree entry và nội dung trong blob cache"""
+    return {
+        "name": entry.name,
+        "path": entry.path,
+        "sha": entry.sha,
+        "size": len(data),
+        "type": "file",
+        "decoded_content": decode_blob_text(data),
+        "source": "blob_cache",
+    }
+
+
+def file_excerpt_result(path: str, sha: Optional[str], excerpt: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """Kết quả đọc file lớn: metadata của file + đoạn trích từ build_excerpt"""
+    return {
+        "name": path.rsplit("/", 1)[-1],
+        "path": path,
+        "sha": sha,
+        "type": "file",
+        **excerpt,
+        "source": source,
+    }
+
+
+def needs_excerpt(result: Any, start_line: int = 1, threshold: int = DEFAULT_LARGE_FILE_BYTES) -> bool:
+    """
+    Kết quả của contents API có cần chuyển sang chế độ đoạn trích không
+    
+    Contents API trả về encoding "none" (không có content) cho file trên 1 MB
+    """
+    if not isinstance(result, dict) or result.get("type") != "file":
+        return False
+    return start_line > 1 or result.get("encoding") == "none" or (result.get("size") or 0) > threshold
+
+
+def session_clone_root(session_id: str) -> str:
+    """Thư mục temp chứa các bản clone mặc định của session"""
+    return os.path.join(tempfile.gettempdir(), "github_agent_sessions", session_id)
+
+
+def build_clone_path(session_id: str, repo: str, destination_path: Optional[str] = None) -> str:
+    """
+    Tính đường dẫn clone, mặc định theo session ID trong temp folder
+    
+    Args:
+        session_id: ID của session
+        repo: Tên repository
+        destination_path: Đường dẫn đích (optional)
+        
+    Returns:
+        Đường dẫn thư mục repository sau khi clone
+    """
+    if destination_path is None:
+        destination_path = session_clone_root(session_id)
+        os.makedirs(destination_path, exist_ok=True)
+    return os.path.join(destination_path, repo)
 
 class GitHubAPIClient:
     """Client để tương tác với GitHub API"""
     
-    def __init__(self, session_id: str):
+    def __init__(self, session_id: str, transport: Optional[HTTPTransport] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 scheduler: Optional[RateLimitScheduler] = None,
+                 tree_index_cache: Optional[TreeIndexCache] = None,
+                 blob_cache: Optional[BlobCache] = None,
+                 mirror_cache: Optional[MirrorCache] = None,
+                 single_flight: Optional[SingleFlight] = None,
+                 token: Optional[str] = None):
         self.session_id = session_id
+        # Token cố định cho client không gắn session (warm pool)
+        self.token = token
         self.base_url = "https://api.github.com"
+        # Transport dùng chung giữa các client/session để tái sử dụng connection
+        self.transport = transport or get_transport()
+        self.response_cache = response_cache or get_response_cache()
+        # Scheduler dùng chung để các session cùng token chia sẻ budget
+        self.scheduler = scheduler or get_rate_limit_scheduler()
+        self.tree_index_cache = tree_index_cache or get_tree_index_cache()
+        self.blob_cache = blob_cache or get_blob_cache()
+        self.mirror_cache = mirror_cache or get_mirror_cache()
+        # GET trùng đang chạy (kể cả từ session khác) chỉ gửi một lần
+        self.single_flight = single_flight or get_single_flight()
+        self.public_repos = get_public_repos()
         
-    def _get_headers(self) -> Dict[str, str]:
-        """Lấy headers với authentication từ session"""
+    def _get_token(self) -> str:
+        """Lấy PAT của session"""
+        if self.token:
+            return self.token
         token = session_manager.get_token(self.session_id)
         if not token:
             raise ValueError(f"Session {self.session_id} không tồn tại hoặc đã hết hạn")
+        return token
+    
+    def _get_headers(self, token: Optional[str] = None) -> Dict[str, str]:
+        """Lấy headers với authentication từ session"""
+        token = token or self._get_token()
         
         return {
             "Authorization": f"token {token}",
@@ -31,21 +190,142 @@ class GitHubAPIClient:
             "User-Agent": "GitHub-Agent/1.0"
         }
     
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """Thực hiện HTTP request tới GitHub API"""
-        headers = self._get_headers()
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+    def _send(self, method: str, url: str, headers: Dict[str, str], scope: str, cost: int = 1, **kwargs):
+        """
+        Gửi request qua rate limit scheduler
+        
+        Chờ nếu budget của token sắp cạn, retry với jittered backoff khi gặp
+        secondary rate limit (403/429) hoặc lỗi 5xx
+        
+        Raises:
+            GitHubRateLimitError: Nếu vẫn bị rate limit sau khi retry
+        """
+        resource = resource_for_url(url)
+        attempt = 0
+        while True:
+            wait = self.scheduler.acquire(scope, resource, cost)
+            if wait:
+                time.sleep(wait)
+            
+            response = self.transport.request(method, url, headers=headers, **kwargs)
+            if self.session_id:
+                repo_context_stats.record(self.session_id, api_calls=1)
+            self.scheduler.update_from_headers(scope, response.headers, resource)
+            
+            delay = self.scheduler.retry_delay(attempt, response)
+            if delay is None:
+                break
+            # Trả connection về pool (cần cho response dạng stream)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+        
+        self.scheduler.raise_if_rate_limited(response)
+        return response
+    
+    def get_rate_limit_budget(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Lấy rate limit budget hiện tại của token trong session
+        
+        Returns:
+            Dict theo resource (core, search, graphql) với limit/remaining/reset
+        """
+        return self.scheduler.get_budget(token_scope(self._get_token()))
+    
+    def _request(self, method: str, endpoint: str, cacheable: bool = False, accept: Optional[str] = None,
+                 parse_json: bool = True, **kwargs) -> Tuple[Any, Optional[str]]:
+        """
+        Thực hiện HTTP request tới GitHub API
         
-        response = requests.request(method, url, headers=headers, **kwargs)
+        Args:
+            method: HTTP method
+            endpoint: Endpoint tương đối so với base_url, hoặc URL đầy đủ (từ header Link)
+            cacheable: Dùng response cache với conditional request (chỉ cho GET)
+            accept: Media type thay cho mặc định (ví dụ diff, sha)
+            parse_json: False để trả về body dạng text
+            **kwargs: Tham số truyền cho transport
+            
+        Returns:
+            Tuple (JSON body hoặc text, header Link)
+        """
+        token = self._get_token()
+        scope = token_scope(token)
+        headers = self._get_headers(token)
+        if accept:
+            headers["Accept"] = accept
+        if endpoint.startswith(("http://", "https://")):
+            url = endpoint
+        else:
+            url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        
+        if method == "GET" and not kwargs.get("stream"):
+            key = flight_key(self.public_repos.flight_scope(scope, url), url, kwargs.get("params"), headers["Accept"])
+            status_code, body, link = self.single_flight.do(
+                key, lambda: self._fetch(method, url, headers, scope, cacheable, **kwargs), scope
+            )
+        else:
+            status_code, body, link = self._fetch(method, url, headers, scope, cacheable, **kwargs)
         
-        if response.status_code == 401:
-            raise ValueError("GitHub token không hợp lệ hoặc đã hết hạn")
-        elif response.status_code == 404:
-            raise ValueError("Repository hoặc resource không tồn tại")
-        elif response.status_code >= 400:
-            raise ValueError(f"GitHub API error: {response.status_code} - {response.text}")
+        raise_for_github_status(status_code, body.decode("utf-8", errors="replace") if status_code >= 400 else "")
         
-        return response.json() if response.content else {}
+        if not parse_json:
+            return body.decode("utf-8", errors="replace"), link
+        return (json.loads(body) if body else {}), link
+    
+    def _fetch(self, method: str, url: str, headers: Dict[str, str], scope: str, cacheable: bool,
+               **kwargs) -> FlightResult:
+        """
+        Gửi request, qua response cache (conditional request) nếu cacheable
+        
+        Returns:
+            Tuple (status code, body, header Link)
+        """
+        cache_key = cache_entry = None
+        if cacheable and method == "GET":
+            cache_key, cache_entry = self.response_cache.prepare_request(
+                scope, url, kwargs.get("params"), headers
+            )
+        
+        response = self._send(method, url, headers, scope, **kwargs)
+        
+        body, link = response.content, response.headers.get("Link")
+        if cache_key is not None:
+            body, link = self.response_cache.resolve_response(
+                cache_key, cache_entry, response.status_code, response.headers, body
+            )
+        return response.status_code, body, link
+    
+    def _make_request(self, method: str, endpoint: str, cacheable: bool = False, **kwargs) -> Dict[str, Any]:
+        """Thực hiện HTTP request tới GitHub API, chỉ trả về JSON body"""
+        return self._request(method, endpoint, cacheable=cacheable, **kwargs)[0]
+    
+    def _fetch_page(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                    cacheable: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Lấy một trang của list endpoint, trả về (items, URL trang kế tiếp)"""
+        items, link = self._request("GET", endpoint, cacheable=cacheable, params=params)
+        return items, parse_next_link(link)
+    
+    def iter_paginated(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                       max_items: Optional[int] = None, per_page: Optional[int] = None,
+                       cacheable: bool = False, prefetch: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Duyệt lazy tất cả item của một list endpoint theo header Link
+        
+        Args:
+            endpoint: Endpoint của list
+            params: Query params (không gồm per_page)
+            max_items: Số item tối đa (None = tất cả)
+            per_page: Số item mỗi trang (mặc định chọn theo max_items)
+            cacheable: Dùng response cache cho từng trang
+            prefetch: Tải trước trang kế tiếp
+            
+        Returns:
+            Iterator các item; dừng iterate sớm sẽ không tải thêm trang
+        """
+        params = dict(params or {})
+        params["per_page"] = page_size_for(max_items, per_page)
+        fetch_page = functools.partial(self._fetch_page, cacheable=cacheable)
+        return iter_items(fetch_page, endpoint, params, max_items, prefetch)
     
     def get_repository_info(self, owner: str, repo: str) -> Dict[str, Any]:
         """
@@ -58,9 +338,62 @@ class GitHubAPIClient:
         Returns:
             Dict chứa thông tin repository
         """
-        return self._make_request("GET", f"repos/{owner}/{repo}")
+        repo_info = self._make_request("GET", f"repos/{owner}/{repo}", cacheable=True)
+        self.public_repos.mark(owner, repo, repo_info.get("private") is False)
+        return repo_info
+    
+    def graphql(self, query: str, variables: Optional[Dict[str, Any]] = None, cost: int = 1) -> Dict[str, Any]:
+        """
+        Gửi GraphQL query
+        
+        Chi phí thực (field rateLimit nếu query có chọn) được ghi vào budget
+        GraphQL của scheduler, tách biệt với budget REST
+        
+        Args:
+            query: GraphQL query
+            variables: Biến của query
+            cost: Số điểm ước lượng, để scheduler giãn request trước khi cạn budget
+            
+        Returns:
+            Field data của response
+            
+        Raises:
+            GraphQLError: Nếu response chỉ có lỗi
+        """
+        token = self._get_token()
+        scope = token_scope(token)
+        response = self._send("POST", f"{self.base_url}/graphql", self._get_headers(token), scope,
+                              cost=cost, json={"query": query, "variables": variables or {}})
+        
+        raise_for_github_status(response.status_code, response.text)
+        
+        data = check_response(response.json())
+        record_query_cost(self.scheduler, scope, data)
+        return data
+    
+    def get_repository_overview(self, owner: str, repo: str, max_items: int = 30) -> Dict[str, Any]:
+        """
+        Lấy overview của repository qua GraphQL: thông tin repository, branches,
+        PR mở và issue mở trong một round trip (thêm query theo cursor khi
+        max_items vượt một trang), chỉ với các field tool trả về
+        
+        Args:
+            owner: Tên owner của repository
+            repo: Tên repository
+            max_items: Số branch/PR/issue tối đa của mỗi danh sách
+            
+        Returns:
+            Dict chứa repository, branches, pull_requests, issues và chi phí GraphQL
+        """
+        builder = OverviewBuilder(owner, repo, max_items)
+        request = builder.next_query()
+        while request is not None:
+            query, variables, cost = request
+            builder.feed(self.graphql(query, variables, cost))
+            request = builder.next_query()
+        return builder.result()
     
-    def get_repository_content(self, owner: str, repo: str, path: str = "", ref: str = "main") -> List[Dict[str, Any]]:
+    def get_repository_content(self, owner: str, repo: str, path: str = "", ref: str = "") -> List[Dict[str, Any]]:
         """
         Lấy nội dung thư mục hoặc file trong repository
         
@@ -68,25 +401,25 @@ class GitHubAPIClient:
             owner: Tên owner của repository
             repo: Tên repository
             path: Đường dẫn file/folder (mặc định là root)
-            ref: Branch/commit reference (mặc định là main)
+            ref: Branch/commit reference (mặc định là default branch)
             
         Returns:
             List chứa thông tin files/folders
         """
         endpoint = f"repos/{owner}/{repo}/contents/{path}"
-        params = {"ref": ref} if ref != "main" else {}
+        params = {"ref": ref} if ref else {}
         
-        result = self._make_request("GET", endpoint, params=params)
+        result = self._make_request("GET", endpoint, cacheable=True, params=params)
         
-        # Nếu là single file, wrap trong list
-        if isinstance(result, dict):
-            return [result]
-        return result
+        return wrap_content_listing(result)
     
-    def get_file_content(self, owner: str, repo: str, path: str, ref: str = "main") -> Dict[str, Any]:
+    def get_file_content(self, owner: str, repo: str, path: str, ref: str = "") -> Dict[str, Any]:
         """
         Lấy nội dung của một file cụ thể
         
+        Nếu đã có tree index của ref thì lấy blob SHA từ index và đọc blob cache
+        trước, không cần gọi network
+        
         Args:
             owner: Tên owner của repository
             repo: Tên repository
@@ -96,19 +429,198 @@ class GitHubAPIClient:
         Returns:
             Dict chứa thông tin và nội dung file
         """
+        index = self.get_cached_tree_index(owner, repo, ref)
+        entry = index.get(path) if index is not None else None
+        if entry is not None and entry.type == "blob":
+            data = self.blob_cache.get(entry.sha)
+            if data is not None:
+                return file_content_from_blob(entry, data)
+        
         endpoint = f"repos/{owner}/{repo}/contents/{path}"
-        params = {"ref": ref} if ref != "main" else {}
+        params = {"ref": ref} if ref else {}
+        
+        result = self._make_request("GET", endpoint, cacheable=True, params=params)
+        
+        return decode_file_content(result, self.blob_cache)
+    
+    def _download_raw(self, owner: str, repo: str, path: str, ref: str = "") -> Tuple[BinaryIO, int]:
+        """
+        Stream nội dung raw của file vào spooled temp file
+        
+        Raw media type hỗ trợ file tới 100 MB (contents API JSON chỉ tới 1 MB)
+        
+        Returns:
+            Tuple (file đã seek về đầu, số byte)
+        """
+        token = self._get_token()
+        scope = token_scope(token)
+        headers = self._get_headers(token)
+        headers["Accept"] = RAW_MEDIA_TYPE
+        url = f"{self.base_url}/repos/{owner}/{repo}/contents/{path}"
+        params = {"ref": ref} if ref else {}
+        
+        response = self._send("GET", url, headers, scope, params=params, stream=True)
+        try:
+            raise_for_github_status(response.status_code, response.text if response.status_code >= 400 else "",
+                                    "File không tồn tại")
+            return spool_chunks(response.iter_content(CHUNK_SIZE))
+        finally:
+            response.close()
+    
+    def get_file_excerpt(self, owner: str, repo: str, path: str, ref: str = "", start_line: int = 1,
+                         sha: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Đọc file lớn với bộ nhớ cố định, trả về metadata và đoạn trích
+        
+        Đọc từ blob cache nếu biết SHA, nếu không thì stream raw content vào
+        spooled temp file (rồi lưu vào blob cache cho lần sau)
+        
+        Args:
+            owner: Tên owner của repository
+            repo: Tên repository
+            path: Đường dẫn tới file
+            ref: Branch/commit reference
+            start_line: Dòng bắt đầu của đoạn trích
+            sha: Blob SHA nếu đã biết
+            
+        Returns:
+            Dict chứa metadata (size, binary, total_lines...) và đoạn trích
+        """
+        if sha is None:
+            index = self.get_cached_tree_index(owner, repo, ref)
+            entry = index.get(path) if index is not None else None
+            sha = entry.sha if entry is not None and entry.type == "blob" else None
+        
+        cached = self.blob_cache.open(sha) if sha else None
+        if cached is not None:
+            with cached:
+                return file_excerpt_result(path, sha, build_excerpt(cached, start_line, path=path), "blob_cache")
+        
+        spool, size = self._download_raw(owner, repo, path, ref)
+        with spool:
+            stored_sha = self.blob_cache.put_stream(spool, size)
+            spool.seek(0)
+            excerpt = build_excerpt(spool, start_line, path=path)
+        return file_excerpt_result(path, stored_sha or sha, excerpt, "raw")
+    
+    def read_file(self, owner: str, repo: str, path: str, ref: str = "", start_line: int = 1) -> Dict[str, Any]:
+        """
+        Đọc file cho tool: file nhỏ trả về toàn bộ nội dung, file lớn (hoặc khi
+        đọc từ giữa file) chỉ trả về metadata và đoạn trích có giới hạn
+        
+        Args:
+            owner: Tên owner của repository
+            repo: Tên repository
+            path: Đường dẫn tới file
+            ref: Branch/commit reference
+            start_line: Dòng bắt đầu (từ 1)
+            
+        Returns:
+            Dict chứa thông tin và nội dung (hoặc đoạn trích) của file
+        """
+        index = self.get_cached_tree_index(owner, repo, ref)
+        entry = index.get(path) if index is not None else None
+        if entry is not None and entry.type == "blob" and (entry.size or 0) > DEFAULT_LARGE_FILE_BYTES:
+            # Đã biết là file lớn: không tải bản base64
+            return self.get_file_excerpt(owner, repo, path, ref, start_line, entry.sha)
+        
+        result = self.get_file_content(owner, repo, path, ref)
+        if not needs_excerpt(result, start_line):
+            return result
+        return self.get_file_excerpt(owner, repo, path, ref, start_line, result.get("sha"))
+    
+    def resolve_commit_sha(self, owner: str, repo: str, ref: str = "") -> str:
+        """
+        Resolve branch/tag/commit thành commit SHA
+        
+        Args:
+            owner: Tên owner của repository
+            repo: Tên repository
+            ref: Branch/tag/SHA (rỗng là default branch)
+            
+        Returns:
+            Commit SHA (40 ký tự hex)
+        """
+        ref = ref or "HEAD"
+        if COMMIT_SHA_RE.fullmatch(ref):
+            return ref
+        
+        scope = token_scope(self._get_token())
+        commit_sha = self.tree_index_cache.resolve_ref(scope, owner, repo, ref)
+        if commit_sha:
+            return commit_sha
+        
+        # Media type sha chỉ trả về 40 ký tự, có ETag nên revalidate gần như miễn phí
+        commit_sha, _ = self._request(
+            "GET", f"repos/{owner}/{repo}/commits/{quote(ref, safe='/')}",
+            cacheable=True, accept="application/vnd.github.sha", parse_json=False
+        )
+        commit_sha = commit_sha.strip()
+        self.tree_index_cache.remember_ref(scope, owner, repo, ref, commit_sha)
+        return commit_sha
+    
+    def get_tree(self, owner: str, repo: str, tree_sha: str, recursive: bool = False) -> Dict[str, Any]:
+        """
+        Lấy git tree (Git Trees API)
         
-        result = self._make_request("GET", endpoint, params=params)
+        Args:
+            owner: Tên owner của repository
+            repo: Tên repository
+            tree_sha: SHA của tree hoặc commit
+            recursive: Lấy toàn bộ cây con trong một request
+            
+        Returns:
+            Dict chứa tree và cờ truncated
+        """
+        params = {"recursive": "1"} if recursive else {}
+        return self._make_request("GET", f"repos/{owner}/{repo}/git/trees/{tree_sha}", cacheable=True, params=params)
+    
+    def get_tree_index(self, owner: str, repo: str, ref: str = "") -> RepositoryTreeIndex:
+        """
+        Lấy path index của toàn bộ repository tại một ref
         
-        # Decode base64 content nếu có
-        if "content" in result and result["encoding"] == "base64":
-            try:
-                result["decoded_content"] = base64.b64decode(result["content"]).decode('utf-8')
-            except UnicodeDecodeError:
-                result["decoded_content"] = "[Binary file - không thể hiển thị]"
+        Index được cache theo commit SHA; nếu recursive tree bị GitHub cắt bớt
+        thì walk từng subtree
         
-        return result
+        Args:
+            owner: Tên owner của repository
+            repo: Tên repository
+            ref: Branch/tag/SHA (rỗng là default branch)
+            
+        Returns:
+            RepositoryTreeIndex
+        """
+        commit_sha = self.resolve_commit_sha(owner, repo, ref)
+        index = self.tree_index_cache.get(owner, repo, commit_sha)
+        if index is not None:
+            return index
+        
+        walker = TreeWalker(commit_sha)
+        while True:
+            batch = walker.next_requests()
+            if not batch:
+                break
+            for base_path, tree_sha, recursive in batch:
+                walker.feed(base_path, tree_sha, recursive, self.get_tree(owner, repo, tree_sha, recursive))
+        
+        index = walker.build()
+        self.tree_index_cache.put(owner, repo, index, walker.subtree_walks)
+        return index
+    
+    def get_cached_tree_index(self, owner: str, repo: str, ref: str = "") -> Optional[RepositoryTreeIndex]:
+        """
+        Lấy tree index đã có sẵn cho ref mà không gọi network
+        
+        Returns:
+            RepositoryTreeIndex hoặc None
+        """
+        ref = ref or "HEAD"
+        commit_sha = ref if COMMIT_SHA_RE.fullmatch(ref) else self.tree_index_cache.resolve_ref(
+            token_scope(self._get_token()), owner, repo, ref
+        )
+        if not commit_sha:
+            return None
+        return self.tree_index_cache.get(owner, repo, commit_sha)
     
     def search_code(self, query: str, owner: str = "", repo: str = "") -> Dict[str, Any]:
         """
@@ -132,20 +644,33 @@ class GitHubAPIClient:
         
         return self._make_request("GET", endpoint, params=params)
     
-    def list_branches(self, owner: str, repo: str) -> List[Dict[str, Any]]:
+    def list_branches(self, owner: str, repo: str, per_page: int = 100, max_items: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Liệt kê các branch của repository
         
         Args:
             owner: Tên owner của repository
             repo: Tên repository
+            per_page: Số branch trên mỗi page
+            max_items: Nếu có, tự động đi qua các trang cho tới khi đủ số branch này
             
         Returns:
             List chứa thông tin các branch
         """
-        return self._make_request("GET", f"repos/{owner}/{repo}/branches")
+        if max_items is not None:
+            return list(self.iter_branches(owner, repo, max_items=max_items, per_page=per_page))
+        
+        endpoint = f"repos/{owner}/{repo}/branches"
+        return self._make_request("GET", endpoint, cacheable=True, params={"per_page": per_page})
+    
+    def iter_branches(self, owner: str, repo: str, max_items: Optional[int] = None,
+                      per_page: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Duyệt lazy các branch qua tất cả các trang (xem iter_paginated)"""
+        return self.iter_paginated(f"repos/{owner}/{repo}/branches", max_items=max_items,
+                                   per_page=per_page, cacheable=True)
     
-    def list_commits(self, owner: str, repo: str, sha: str = "", path: str = "", per_page: int = 30) -> List[Dict[str, Any]]:
+    def list_commits(self, owner: str, repo: str, sha: str = "", path: str = "", per_page: int = 30,
+                     max_items: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Liệt kê commits của repository
         
@@ -155,10 +680,14 @@ class GitHubAPIClient:
             sha: SHA của commit/branch để lấy commits
             path: Đường dẫn file để lọc commits
             per_page: Số commits trên mỗi page
+            max_items: Nếu có, tự động đi qua các trang cho tới khi đủ số commit này
             
         Returns:
             List chứa thông tin commits
         """
+        if max_items is not None:
+            return list(self.iter_commits(owner, repo, sha, path, max_items=max_items, per_page=per_page))
+        
         endpoint = f"repos/{owner}/{repo}/commits"
         params = {"per_page": per_page}
         if sha:
@@ -168,6 +697,17 @@ class GitHubAPIClient:
             
         return self._make_request("GET", endpoint, params=params)
     
+    def iter_commits(self, owner: str, repo: str, sha: str = "", path: str = "",
+                     max_items: Optional[int] = None, per_page: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Duyệt lazy commits qua tất cả các trang (xem iter_paginated)"""
+        params = {}
+        if sha:
+            params["sha"] = sha
+        if path:
+            params["path"] = path
+        return self.iter_paginated(f"repos/{owner}/{repo}/commits", params,
+                                   max_items=max_items, per_page=per_page)
+    
     def get_commit(self, owner: str, repo: str, sha: str) -> Dict[str, Any]:
         """
         Lấy thông tin chi tiết của một commit
@@ -182,7 +722,8 @@ class GitHubAPIClient:
         """
         return self._make_request("GET", f"repos/{owner}/{repo}/commits/{sha}")
     
-    def list_pull_requests(self, owner: str, repo: str, state: str = "open", per_page: int = 30) -> List[Dict[str, Any]]:
+    def list_pull_requests(self, owner: str, repo: str, state: str = "open", per_page: int = 30,
+                           max_items: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Liệt kê pull requests
         
@@ -191,14 +732,24 @@ class GitHubAPIClient:
             repo: Tên repository
             state: Trạng thái PR (open, closed, all)
             per_page: Số PR trên mỗi page
+            max_items: Nếu có, tự động đi qua các trang cho tới khi đủ số PR này
             
         Returns:
             List chứa thông tin pull requests
         """
+        if max_items is not None:
+            return list(self.iter_pull_requests(owner, repo, state, max_items=max_items, per_page=per_page))
+        
         endpoint = f"repos/{owner}/{repo}/pulls"
         params = {"state": state, "per_page": per_page}
         
-        return self._make_request("GET", endpoint, params=params)
+        return self._make_request("GET", endpoint, cacheable=True, params=params)
+    
+    def iter_pull_requests(self, owner: str, repo: str, state: str = "open", max_items: Optional[int] = None,
+                           per_page: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Duyệt lazy pull requests qua tất cả các trang (xem iter_paginated)"""
+        return self.iter_paginated(f"repos/{owner}/{repo}/pulls", {"state": state},
+                                   max_items=max_items, per_page=per_page, cacheable=True)
     
     def get_pull_request(self, owner: str, repo: str, number: int) -> Dict[str, Any]:
         """
@@ -218,6 +769,9 @@ class GitHubAPIClient:
         """
         Lấy diff của pull request ở dạng text
         
+        Dùng conditional request nên các lần lấy lại (ví dụ để phân trang) không
+        tốn rate limit khi PR không đổi
+        
         Args:
             owner: Tên owner của repository
             repo: Tên repository  
@@ -225,76 +779,81 @@ class GitHubAPIClient:
             
         Returns:
             String chứa diff content
+            
+        Raises:
+            PullRequestDiffTooLargeError: Diff vượt giới hạn của GitHub (dùng iter_pull_request_files)
         """
-        headers = self._get_headers()
-        headers["Accept"] = "application/vnd.github.v3.diff"
+        token = self._get_token()
+        scope = token_scope(token)
+        headers = self._get_headers(token)
+        headers["Accept"] = DIFF_MEDIA_TYPE
         url = f"{self.base_url}/repos/{owner}/{repo}/pulls/{number}"
         
-        response = requests.get(url, headers=headers)
+        cache_key, cache_entry = self.response_cache.prepare_request(scope, url, None, headers)
+        response = self._send("GET", url, headers, scope)
+        body, _ = self.response_cache.resolve_response(
+            cache_key, cache_entry, response.status_code, response.headers, response.content
+        )
         
-        if response.status_code == 401:
-            raise ValueError("GitHub token không hợp lệ hoặc đã hết hạn")
-        elif response.status_code == 404:
-            raise ValueError("Pull request không tồn tại")
-        elif response.status_code >= 400:
-            raise ValueError(f"GitHub API error: {response.status_code} - {response.text}")
+        if response.status_code == 406:
+            raise PullRequestDiffTooLargeError(f"Diff của pull request #{number} vượt giới hạn của GitHub")
+        raise_for_github_status(response.status_code, response.text, "Pull request không tồn tại")
         
-        return response.text
+        return body.decode("utf-8", errors="replace")
+    
+    def iter_pull_request_files(self, owner: str, repo: str, number: int, max_items: Optional[int] = None,
+                                per_page: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Duyệt lazy các file thay đổi của pull request, kèm patch từng file (xem iter_paginated)"""
+        return self.iter_paginated(f"repos/{owner}/{repo}/pulls/{number}/files", max_items=max_items,
+                                   per_page=per_page, cacheable=True)
     
-    def clone_repository(self, owner: str, repo: str, destination_path: Optional[str] = None) -> Dict[str, Any]:
+    def clone_repository(self, owner: str, repo: str, destination_path: Optional[str] = None,
+                         profile: Optional[CloneProfile] = None) -> Dict[str, Any]:
         """
         Clone repository về local sử dụng git command với token
         
+        Clone đầy đủ lấy object từ bare mirror dùng chung của owner/repo (fetch
+        incremental), checkout của session dùng lại object qua alternates.
+        Profile shallow/partial/sparse giảm dung lượng tải cho repository lớn
+        
         Args:
             owner: Tên owner của repository
             repo: Tên repository
             destination_path: Đường dẫn đích (optional)
+            profile: Clone profile (mặc định clone đầy đủ)
             
         Returns:
             Dict chứa thông tin về quá trình clone
         """
+        profile = profile or CloneProfile()
         try:
             token = session_manager.get_token(self.session_id)
             if not token:
                 return {"success": False, "error": "Session không tồn tại"}
             
             # Tạo destination path theo session ID nếu không được cung cấp
-            if destination_path is None:
-                temp_base = os.path.join(tempfile.gettempdir(), "github_agent_sessions")
-                os.makedirs(temp_base, exist_ok=True)
-                destination_path = os.path.join(temp_base, self.session_id)
-                os.makedirs(destination_path, exist_ok=True)
-            
-            repo_path = os.path.join(destination_path, repo)
-            
-            # Tạo URL với token để clone
-            clone_url = f"https://{token}@github.com/{owner}/{repo}.git"
+            repo_path = build_clone_path(self.session_id, repo, destination_path)
             
-            # Thực hiện git clone
-            result = subprocess.run(
-                ["git", "clone", clone_url, repo_path],
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutes timeout
-            )
+            stats = clone_with_profile(owner, repo, token, repo_path, profile, self.mirror_cache)
             
-            if result.returncode == 0:
-                return {
-                    "success": True,
-                    "message": f"Repository đã được clone thành công",
-                    "local_path": repo_path,
-                    "clone_url": f"https://github.com/{owner}/{repo}.git"
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"Lỗi khi clone repository: {result.stderr}"
-                }
+            return {
+                "success": True,
+                "message": f"Repository đã được clone thành công",
+                "local_path": repo_path,
+                "clone_url": f"https://github.com/{owner}/{repo}.git",
+                "profile": profile.to_dict(),
+                **stats
+            }
                 
+        except GitCommandError as e:
+            return {
+                "success": False,
+                "error": f"Lỗi khi clone repository: {str(e)}"
+            }
         except subprocess.TimeoutExpired:
             return {
                 "success": False,
-                "error": "Clone repository timeout (quá 5 phút)"
+                "error": f"Clone repository timeout (quá {profile.timeout:g} giây), thử profile shallow/blobless hoặc sparse_paths"
             }
         except Exception as e:
             return {
@@ -302,7 +861,8 @@ class GitHubAPIClient:
                 "error": f"Lỗi không xác định: {str(e)}"
             }
     
-    def list_issues(self, owner: str, repo: str, state: str = "open", per_page: int = 30) -> List[Dict[str, Any]]:
+    def list_issues(self, owner: str, repo: str, state: str = "open", per_page: int = 30,
+                    max_items: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Liệt kê issues của repository
         
@@ -311,15 +871,25 @@ class GitHubAPIClient:
             repo: Tên repository
             state: Trạng thái issue (open, closed, all)
             per_page: Số issue trên mỗi page
+            max_items: Nếu có, tự động đi qua các trang cho tới khi đủ số issue này
             
         Returns:
             List chứa thông tin issues
         """
+        if max_items is not None:
+            return list(self.iter_issues(owner, repo, state, max_items=max_items, per_page=per_page))
+        
         endpoint = f"repos/{owner}/{repo}/issues"
         params = {"state": state, "per_page": per_page}
         
         return self._make_request("GET", endpoint, params=params)
     
+    def iter_issues(self, owner: str, repo: str, state: str = "open", max_items: Optional[int] = None,
+                    per_page: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Duyệt lazy issues qua tất cả các trang (xem iter_paginated)"""
+        return self.iter_paginated(f"repos/{owner}/{repo}/issues", {"state": state},
+                                   max_items=max_items, per_page=per_page)
+    
     def get_issue(self, owner: str, repo: str, number: int) -> Dict[str, Any]:
         """
         Lấy thông tin chi tiết của một issue
@@ -339,6 +909,9 @@ def create_github_client(session_id: str) -> GitHubAPIClient:
     """
     Factory function để tạo GitHub API client
     
+    Client nhẹ, tất cả client dùng chung một HTTPTransport nên
+    connection pool được tái sử dụng giữa các tool call và session
+    
     Args:
         session_id: ID của session
         
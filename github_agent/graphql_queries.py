@@ -0,0 +1,273 @@
+"""
+GraphQL query cho các thao tác đọc nhiều resource trong một round trip
+Chỉ chọn các field tool thực sự trả về, phân trang bằng cursor và theo dõi chi
+phí (điểm) của từng query với rate limit riêng của GraphQL
+"""
+import math
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+# Số node tối đa của một connection trong một query
+MAX_PAGE_SIZE = 100
+
+RATE_LIMIT_FIELDS = "rateLimit { cost remaining limit resetAt }"
+
+# Connection của repository dùng cho overview: field (có placeholder first/cursor) và field của node
+CONNECTIONS: Dict[str, Tuple[str, str]] = {
+    "branches": (
+        'refs(refPrefix: "refs/heads/", first: {first}, after: {cursor}, '
+        'orderBy: {{field: TAG_COMMIT_DATE, direction: DESC}})',
+        "name target { oid }",
+    ),
+    "pull_requests": (
+        "pullRequests(states: OPEN, first: {first}, after: {cursor}, "
+        "orderBy: {{field: UPDATED_AT, direction: DESC}})",
+        "number title isDraft createdAt updatedAt headRefName baseRefName url author { login }",
+    ),
+    "issues": (
+        "issues(states: OPEN, first: {first}, after: {cursor}, "
+        "orderBy: {{field: UPDATED_AT, direction: DESC}})",
+        "number title createdAt updatedAt url author { login } comments { totalCount } "
+        "labels(first: 10) { nodes { name } }",
+    ),
+}
+
+REPOSITORY_FIELDS = (
+    "nameWithOwner description url isPrivate isArchived isFork pushedAt stargazerCount forkCount "
+    "primaryLanguage { name } licenseInfo { spdxId } "
+    "repositoryTopics(first: 10) { nodes { topic { name } } } "
+    "defaultBranchRef { name target { oid } }"
+)
+
+
+class GraphQLError(ValueError):
+    """GraphQL API trả về lỗi"""
+
+
+def connection_selection(key: str, first: str, cursor: str) -> str:
+    """Selection của một connection kèm totalCount và pageInfo"""
+    field, nodes = CONNECTIONS[key]
+    return (
+        f"{key}: {field.format(first=first, cursor=cursor)} "
+        f"{{ totalCount pageInfo {{ hasNextPage endCursor }} nodes {{ {nodes} }} }}"
+    )
+
+
+def build_overview_query() -> str:
+    """Query lấy thông tin repository và trang đầu của branches, PR mở, issue mở"""
+    connections = " ".join(connection_selection(key, f"${key}", "null") for key in CONNECTIONS)
+    variables = ", ".join(f"${key}: Int!" for key in CONNECTIONS)
+    return (
+        f"query RepositoryOverview($owner: String!, $name: String!, {variables}) {{ "
+        f"{RATE_LIMIT_FIELDS} "
+        f"repository(owner: $owner, name: $name) {{ {REPOSITORY_FIELDS} {connections} }} }}"
+    )
+
+
+def build_connection_page_query(key: str) -> str:
+    """Query lấy trang tiếp theo của một connection theo cursor"""
+    return (
+        f"query RepositoryConnectionPage($owner: String!, $name: String!, $first: Int!, $cursor: String) {{ "
+        f"{RATE_LIMIT_FIELDS} "
+        f"repository(owner: $owner, name: $name) {{ {connection_selection(key, '$first', '$cursor')} }} }}"
+    )
+
+
+def estimate_query_cost(connections: int, nested_connections: int = 0) -> int:
+    """
+    Ước lượng điểm của query theo cách GitHub tính (số request con / 100, tối thiểu 1)
+
+    Args:
+        connections: Số connection ở cấp repository
+        nested_connections: Số connection lồng trong node (ví dụ labels của mỗi issue)
+
+    Returns:
+        Số điểm ước lượng
+    """
+    return max(1, math.ceil((1 + connections + nested_connections) / 100))
+
+
+def parse_reset_at(value: Optional[str]) -> Optional[float]:
+    """resetAt (ISO 8601) -> epoch seconds"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def check_response(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Lấy data từ response GraphQL
+
+    Lỗi một phần (ví dụ một field không có quyền) được bỏ qua nếu vẫn có data
+
+    Raises:
+        GraphQLError: Nếu không có data
+    """
+    data = payload.get("data") or {}
+    errors = payload.get("errors") or []
+    if errors and not any(value for key, value in data.items() if key != "rateLimit"):
+        messages = "; ".join(error.get("message", "") for error in errors)
+        if any(error.get("type") == "NOT_FOUND" for error in errors):
+            raise GraphQLError(f"Repository hoặc resource không tồn tại: {messages}")
+        raise GraphQLError(f"GitHub GraphQL error: {messages}")
+    return data
+
+
+def record_query_cost(scheduler: Any, scope: str, data: Dict[str, Any]) -> int:
+    """
+    Ghi nhận chi phí và budget GraphQL từ field rateLimit của response
+
+    Args:
+        scheduler: RateLimitScheduler
+        scope: Token scope
+        data: Field data của response
+
+    Returns:
+        Số điểm query đã dùng (0 nếu query không chọn rateLimit)
+    """
+    rate_limit = data.get("rateLimit")
+    if not rate_limit:
+        return 0
+    cost = rate_limit.get("cost") or 0
+    scheduler.record_cost(scope, "graphql", cost, rate_limit.get("remaining"), rate_limit.get("limit"),
+                          parse_reset_at(rate_limit.get("resetAt")))
+    return cost
+
+
+def _login(node: Dict[str, Any]) -> Optional[str]:
+    return (node.get("author") or {}).get("login")
+
+
+def normalize_node(key: str, node: Dict[str, Any]) -> Dict[str, Any]:
+    """Node GraphQL -> dict gọn (snake_case) cho tool"""
+    if key == "branches":
+        return {"name": node["name"], "sha": (node.get("target") or {}).get("oid")}
+    if key == "pull_requests":
+        return {
+            "number": node["number"],
+            "title": node["title"],
+            "author": _login(node),
+            "draft": node.get("isDraft"),
+            "head": node.get("headRefName"),
+            "base": node.get("baseRefName"),
+            "created_at": node.get("createdAt"),
+            "updated_at": node.get("updatedAt"),
+            "url": node.get("url"),
+        }
+    return {
+        "number": node["number"],
+        "title": node["title"],
+        "author": _login(node),
+        "comments": (node.get("comments") or {}).get("totalCount"),
+        "labels": [label["name"] for label in (node.get("labels") or {}).get("nodes") or []],
+        "created_at": node.get("createdAt"),
+        "updated_at": node.get("updatedAt"),
+        "url": node.get("url"),
+    }
+
+
+def normalize_repository(repository: Dict[str, Any]) -> Dict[str, Any]:
+    """Field repository của overview -> dict gọn cho tool"""
+    default_branch = repository.get("defaultBranchRef") or {}
+    return {
+        "full_name": repository.get("nameWithOwner"),
+        "description": repository.get("description"),
+        "url": repository.get("url"),
+        "private": repository.get("isPrivate"),
+        "archived": repository.get("isArchived"),
+        "fork": repository.get("isFork"),
+        "pushed_at": repository.get("pushedAt"),
+        "stars": repository.get("stargazerCount"),
+        "forks": repository.get("forkCount"),
+        "language": (repository.get("primaryLanguage") or {}).get("name"),
+        "license": (repository.get("licenseInfo") or {}).get("spdxId"),
+        "topics": [
+            node["topic"]["name"] for node in (repository.get("repositoryTopics") or {}).get("nodes") or []
+        ],
+        "default_branch": default_branch.get("name"),
+        "head_sha": (default_branch.get("target") or {}).get("oid"),
+    }
+
+
+# (query, variables, điểm ước lượng)
+GraphQLRequest = Tuple[str, Dict[str, Any], int]
+
+
+class OverviewBuilder:
+    """
+    Dựng overview của repository (sans-IO, dùng chung cho client sync và async)
+
+    Query đầu lấy thông tin repository và trang đầu của mọi connection trong một
+    round trip; các connection cần nhiều hơn MAX_PAGE_SIZE node được lấy tiếp theo cursor
+    """
+
+    def __init__(self, owner: str, repo: str, max_items: int = 30):
+        """
+        Args:
+            owner: Tên owner của repository
+            repo: Tên repository
+            max_items: Số branch/PR/issue tối đa của mỗi danh sách
+        """
+        self.owner = owner
+        self.repo = repo
+        self.max_items = max(1, max_items)
+        self.repository: Optional[Dict[str, Any]] = None
+        # key -> {"total_count", "nodes", "page_info"}
+        self.connections: Dict[str, Dict[str, Any]] = {}
+        self.queries = 0
+        self.cost = 0
+
+    def next_query(self) -> Optional[GraphQLRequest]:
+        """Query tiếp theo cần gửi, None khi đã đủ dữ liệu"""
+        variables = {"owner": self.owner, "name": self.repo}
+        if self.repository is None:
+            first = min(self.max_items, MAX_PAGE_SIZE)
+            # repositoryTopics + labels của mỗi issue là connection lồng
+            cost = estimate_query_cost(len(CONNECTIONS), 1 + first)
+            return build_overview_query(), {**variables, **{key: first for key in CONNECTIONS}}, cost
+        for key, state in self.connections.items():
+            if state["page_info"]["hasNextPage"] and len(state["nodes"]) < self.max_items:
+                first = min(MAX_PAGE_SIZE, self.max_items - len(state["nodes"]))
+                cost = estimate_query_cost(1, first if key == "issues" else 0)
+                cursor = state["page_info"]["endCursor"]
+                return build_connection_page_query(key), {**variables, "first": first, "cursor": cursor}, cost
+        return None
+
+    def feed(self, data: Dict[str, Any]) -> None:
+        """Nhận data của query vừa gửi"""
+        self.queries += 1
+        self.cost += (data.get("rateLimit") or {}).get("cost") or 0
+        repository = data.get("repository")
+        if repository is None:
+            raise GraphQLError("Repository không tồn tại hoặc không có quyền truy cập")
+        if self.repository is None:
+            self.repository = repository
+        for key in CONNECTIONS:
+            connection = repository.get(key)
+            if connection is None:
+                continue
+            state = self.connections.get(key)
+            if state is None:
+                self.connections[key] = {
+                    "total_count": connection["totalCount"],
+                    "nodes": list(connection["nodes"]),
+                    "page_info": connection["pageInfo"],
+                }
+            else:
+                state["nodes"].extend(connection["nodes"])
+                state["page_info"] = connection["pageInfo"]
+
+    def result(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"repository": normalize_repository(self.repository or {})}
+        for key, state in self.connections.items():
+            nodes = state["nodes"][:self.max_items]
+            result[key] = {
+                "total_count": state["total_count"],
+                "items": [normalize_node(key, node) for node in nodes],
+                "truncated": state["total_count"] > len(nodes),
+            }
+        result["graphql"] = {"queries": self.queries, "cost": self.cost}
+        return result
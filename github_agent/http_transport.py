@@ -0,0 +1,350 @@
+"""
+Shared HTTP transport cho GitHub API
+Dùng chung connection pool (keep-alive) theo từng host cho tất cả session,
+thay vì mở kết nối TCP+TLS mới cho mỗi request
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Cấu hình mặc định, có thể override qua biến môi trường
+DEFAULT_POOL_CONNECTIONS = int(os.getenv("GITHUB_AGENT_POOL_CONNECTIONS", "10"))
+DEFAULT_POOL_MAXSIZE = int(os.getenv("GITHUB_AGENT_POOL_MAXSIZE", "32"))
+DEFAULT_POOL_BLOCK = os.getenv("GITHUB_AGENT_POOL_BLOCK", "false").lower() in ("1", "true", "yes")
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("GITHUB_AGENT_CONNECT_TIMEOUT", "5"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("GITHUB_AGENT_READ_TIMEOUT", "30"))
+
+
+class PoolStats:
+    """Thống kê sử dụng connection pool (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, float]] = {}
+
+    def _host(self, host: str) -> Dict[str, float]:
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = self._hosts[host] = {
+                "checkouts": 0,
+                "new_connections": 0,
+                "wait_time_total": 0.0,
+                "wait_time_max": 0.0,
+            }
+        return stats
+
+    def record_checkout(self, host: str, wait_time: float) -> None:
+        with self._lock:
+            stats = self._host(host)
+            stats["checkouts"] += 1
+            stats["wait_time_total"] += wait_time
+            stats["wait_time_max"] = max(stats["wait_time_max"], wait_time)
+
+    def record_new_connection(self, host: str) -> None:
+        with self._lock:
+            self._host(host)["new_connections"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Lấy snapshot thống kê hiện tại
+
+        Returns:
+            Dict chứa tổng hợp và thống kê theo từng host
+        """
+        with self._lock:
+            hosts = {}
+            totals = {"checkouts": 0, "hits": 0, "new_connections": 0, "wait_time_total": 0.0}
+            for host, stats in self._hosts.items():
+                hits = max(0, int(stats["checkouts"] - stats["new_connections"]))
+                hosts[host] = {
+                    "checkouts": int(stats["checkouts"]),
+                    "hits": hits,
+                    "new_connections": int(stats["new_connections"]),
+                    "wait_time_total": round(stats["wait_time_total"], 6),
+                    "wait_time_max": round(stats["wait_time_max"], 6),
+                }
+                totals["checkouts"] += hosts[host]["checkouts"]
+                totals["hits"] += hits
+                totals["new_connections"] += hosts[host]["new_connections"]
+                totals["wait_time_total"] += stats["wait_time_total"]
+            totals["wait_time_total"] = round(totals["wait_time_total"], 6)
+            totals["hit_ratio"] = round(totals["hits"] / totals["checkouts"], 4) if totals["checkouts"] else 0.0
+            return {"totals": totals, "hosts": hosts}
+
+
+class _InstrumentedPoolMixin:
+    """Mixin ghi nhận checkout/new connection/wait time cho urllib3 connection pool"""
+
+    pool_stats: Optional[PoolStats] = None
+
+    def _get_conn(self, timeout=None):
+        started = time.perf_counter()
+        conn = super()._get_conn(timeout=timeout)
+        if self.pool_stats is not None:
+            self.pool_stats.record_checkout(self.host, time.perf_counter() - started)
+        return conn
+
+    def _new_conn(self):
+        if self.pool_stats is not None:
+            self.pool_stats.record_new_connection(self.host)
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter dùng connection pool có instrumentation"""
+
+    def __init__(self, pool_stats: PoolStats, **kwargs):
+        # Phải gán trước super().__init__ vì init_poolmanager được gọi trong đó
+        self._pool_classes = {
+            "http": type("InstrumentedHTTPConnectionPool",
+                         (_InstrumentedPoolMixin, HTTPConnectionPool), {"pool_stats": pool_stats}),
+            "https": type("InstrumentedHTTPSConnectionPool",
+                          (_InstrumentedPoolMixin, HTTPSConnectionPool), {"pool_stats": pool_stats}),
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+
+class HTTPTransport:
+    """Transport HTTP dùng chung với connection pool theo host và timeout mặc định"""
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = DEFAULT_POOL_BLOCK,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+    ):
+        """
+        Args:
+            pool_connections: Số host được giữ pool đồng thời
+            pool_maxsize: Số connection tối đa giữ lại cho mỗi host
+            pool_block: Chờ connection rảnh thay vì mở thêm khi pool đầy
+            connect_timeout: Timeout kết nối mặc định (giây)
+            read_timeout: Timeout đọc response mặc định (giây)
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.pool_stats = PoolStats()
+
+        self.session = requests.Session()
+        adapter = _PooledAdapter(
+            self.pool_stats,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Thực hiện HTTP request qua pool dùng chung
+
+        Args:
+            method: HTTP method
+            url: URL đầy đủ
+            **kwargs: Tham số truyền cho requests (headers, params, timeout, stream...)
+
+        Returns:
+            requests.Response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lấy cấu hình và thống kê pool hiện tại"""
+        return {
+            "config": {
+                "pool_connections": self.pool_connections,
+                "pool_maxsize": self.pool_maxsize,
+                "pool_block": self.pool_block,
+                "connect_timeout": self.timeout[0],
+                "read_timeout": self.timeout[1],
+            },
+            **self.pool_stats.snapshot(),
+        }
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_transport: Optional[HTTPTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HTTPTransport:
+    """
+    Lấy transport dùng chung của process (khởi tạo lazy)
+
+    Returns:
+        HTTPTransport instance
+    """
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HTTPTransport()
+    return _transport
+
+
+def configure_transport(**kwargs) -> HTTPTransport:
+    """
+    Tạo lại transport dùng chung với cấu hình mới
+
+    Args:
+        **kwargs: Tham số của HTTPTransport
+
+    Returns:
+        HTTPTransport mới
+    """
+    global _transport
+    with _transport_lock:
+        old = _transport
+        _transport = HTTPTransport(**kwargs)
+    if old is not None:
+        old.close()
+    return _transport
+
+
+class _InstrumentedAsyncTransport(httpx.AsyncHTTPTransport):
+    """
+    httpx transport ghi nhận checkout/new connection/wait time qua trace extension
+    của httpcore (cùng ý nghĩa với _InstrumentedPoolMixin): wait time là thời gian
+    chờ tới khi có connection, không gồm thời gian kết nối TCP/TLS
+    """
+
+    def __init__(self, pool_stats: PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self.pool_stats = pool_stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        host = request.url.host
+        parent_trace = request.extensions.get("trace")
+        acquired = False
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            nonlocal acquired
+            if not acquired:
+                if event == "connection.connect_tcp.started":
+                    acquired = True
+                    self.pool_stats.record_checkout(host, time.perf_counter() - started)
+                    self.pool_stats.record_new_connection(host)
+                elif event.endswith(".send_request_headers.started"):
+                    # Dùng lại connection keep-alive của pool
+                    acquired = True
+                    self.pool_stats.record_checkout(host, time.perf_counter() - started)
+            if parent_trace is not None:
+                await parent_trace(event, info)
+
+        request.extensions["trace"] = trace
+        return await super().handle_async_request(request)
+
+
+# Thống kê dùng chung cho async transport của mọi event loop
+_async_pool_stats = PoolStats()
+
+
+class AsyncHTTPTransport:
+    """Transport HTTP asyncio (httpx) với connection pool và timeout mặc định"""
+
+    def __init__(
+        self,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        pool_stats: Optional[PoolStats] = None,
+    ):
+        """
+        Args:
+            pool_maxsize: Số connection keep-alive tối đa giữ lại
+            connect_timeout: Timeout kết nối mặc định (giây)
+            read_timeout: Timeout đọc response mặc định (giây)
+            pool_stats: Nơi ghi thống kê pool (mặc định dùng chung giữa các event loop)
+        """
+        self.pool_maxsize = pool_maxsize
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.pool_stats = pool_stats or _async_pool_stats
+        self.client = httpx.AsyncClient(
+            transport=_InstrumentedAsyncTransport(
+                self.pool_stats,
+                limits=httpx.Limits(
+                    max_connections=None,
+                    max_keepalive_connections=pool_maxsize,
+                ),
+            ),
+            timeout=self.timeout,
+            # Giống requests: GitHub trả 301 cho repository đã đổi tên/chuyển owner
+            follow_redirects=True,
+        )
+
+    async def request(self, method: str, url: str, stream: bool = False, **kwargs) -> httpx.Response:
+        """
+        Thực hiện HTTP request bất đồng bộ qua pool dùng chung
+
+        Args:
+            method: HTTP method
+            url: URL đầy đủ
+            stream: Không đọc body ngay (đọc bằng aiter_bytes, phải aclose sau khi dùng)
+            **kwargs: Tham số truyền cho httpx (headers, params, timeout...)
+
+        Returns:
+            httpx.Response
+        """
+        if stream:
+            request = self.client.build_request(method, url, **kwargs)
+            return await self.client.send(request, stream=True)
+        return await self.client.request(method, url, **kwargs)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def get_async_transport_stats() -> Dict[str, Any]:
+    """Cấu hình và thống kê pool của các async transport (mọi event loop)"""
+    return {
+        "config": {
+            "pool_maxsize": DEFAULT_POOL_MAXSIZE,
+            "connect_timeout": DEFAULT_CONNECT_TIMEOUT,
+            "read_timeout": DEFAULT_READ_TIMEOUT,
+        },
+        "event_loops": len(_async_transports),
+        **_async_pool_stats.snapshot(),
+    }
+
+
+# httpx.AsyncClient gắn với event loop tạo ra nó nên giữ một transport cho mỗi loop
+_async_transports: Dict[int, Tuple[asyncio.AbstractEventLoop, AsyncHTTPTransport]] = {}
+
+
+def get_async_transport() -> AsyncHTTPTransport:
+    """
+    Lấy async transport dùng chung cho event loop hiện tại
+
+    Returns:
+        AsyncHTTPTransport instance
+    """
+    loop = asyncio.get_running_loop()
+    with _transport_lock:
+        entry = _async_transports.get(id(loop))
+        if entry is None or entry[0] is not loop:
+            # Bỏ các transport của loop đã đóng
+            for key, (old_loop, _) in list(_async_transports.items()):
+                if old_loop.is_closed():
+                    del _async_transports[key]
+            entry = _async_transports[id(loop)] = (loop, AsyncHTTPTransport())
+        return entry[1]
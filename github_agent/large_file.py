@@ -0,0 +1,156 @@
+"""
+Đọc file lớn với bộ nhớ cố định
+Stream raw media type vào spooled temp file (tràn ra đĩa khi vượt ngưỡng),
+nhận diện file binary bằng vài KB đầu và chỉ trả về metadata + một đoạn trích
+có giới hạn, thay vì giữ nhiều bản base64/decoded của cả file trong bộ nhớ
+"""
+import mimetypes
+import os
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterable, Tuple
+
+# File lớn hơn ngưỡng này (bytes) chỉ trả về đoạn trích thay vì toàn bộ nội dung
+DEFAULT_LARGE_FILE_BYTES = int(os.getenv("GITHUB_AGENT_LARGE_FILE_BYTES", str(256 * 1024)))
+# Kích thước tối đa của đoạn trích trả về cho model (bytes)
+DEFAULT_EXCERPT_BYTES = int(os.getenv("GITHUB_AGENT_FILE_EXCERPT_BYTES", str(32 * 1024)))
+# Spooled temp file giữ trong RAM tới ngưỡng này rồi mới ghi ra đĩa
+DEFAULT_SPOOL_BYTES = int(os.getenv("GITHUB_AGENT_SPOOL_BYTES", str(1024 * 1024)))
+
+# Số byte đầu dùng để nhận diện binary (giống heuristic của git)
+SNIFF_BYTES = 8000
+CHUNK_SIZE = 64 * 1024
+
+RAW_MEDIA_TYPE = "application/vnd.github.raw"
+
+
+def is_binary(head: bytes) -> bool:
+    """
+    Nhận diện nội dung binary từ các byte đầu
+
+    Args:
+        head: Tối đa SNIFF_BYTES byte đầu của file
+
+    Returns:
+        True nếu có NUL byte hoặc không phải UTF-8 hợp lệ
+    """
+    if b"\0" in head:
+        return True
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # Ký tự nhiều byte bị cắt ở cuối đoạn sniff không tính là binary
+        return e.start < len(head) - 3
+    return False
+
+
+def spool_chunks(chunks: Iterable[bytes], max_memory: int = DEFAULT_SPOOL_BYTES) -> Tuple[BinaryIO, int]:
+    """
+    Ghi các chunk của response vào spooled temp file
+
+    Args:
+        chunks: Iterator các chunk bytes
+        max_memory: Ngưỡng giữ trong RAM trước khi tràn ra đĩa
+
+    Returns:
+        Tuple (file đã seek về đầu, tổng số byte)
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    size = 0
+    for chunk in chunks:
+        spool.write(chunk)
+        size += len(chunk)
+    spool.seek(0)
+    return spool, size
+
+
+def build_excerpt(stream: BinaryIO, start_line: int = 1, max_bytes: int = DEFAULT_EXCERPT_BYTES,
+                  path: str = "") -> Dict[str, Any]:
+    """
+    Đọc file theo chunk và dựng metadata + đoạn trích bắt đầu từ start_line
+
+    Chỉ giữ một chunk và đoạn trích (tối đa max_bytes) trong bộ nhớ
+
+    Args:
+        stream: File object đọc được (binary)
+        start_line: Dòng bắt đầu của đoạn trích (từ 1)
+        max_bytes: Kích thước tối đa của đoạn trích
+        path: Đường dẫn file để đoán mime type
+
+    Returns:
+        Dict chứa size, binary, mime_type, total_lines, excerpt và vị trí đoạn trích
+    """
+    start_line = max(1, start_line)
+    head = stream.read(SNIFF_BYTES)
+    binary = is_binary(head)
+    result: Dict[str, Any] = {
+        "large_file": True,
+        "binary": binary,
+        "mime_type": mimetypes.guess_type(path)[0] if path else None,
+    }
+
+    size = 0
+    line = 1
+    excerpt = bytearray()
+    last_complete_line = 0
+    complete_bytes = 0
+    cut = False
+    ends_with_newline = True
+    chunk = head
+    while chunk:
+        size += len(chunk)
+        ends_with_newline = chunk.endswith(b"\n")
+        if binary or cut:
+            line += chunk.count(b"\n")
+        elif line + chunk.count(b"\n") < start_line:
+            # Chưa tới đoạn cần trích: chỉ đếm dòng
+            line += chunk.count(b"\n")
+        else:
+            pos = 0
+            while pos < len(chunk):
+                newline = chunk.find(b"\n", pos)
+                end = len(chunk) if newline < 0 else newline + 1
+                if line >= start_line and not cut:
+                    piece = chunk[pos:end]
+                    room = max_bytes - len(excerpt)
+                    if len(piece) > room:
+                        excerpt += piece[:room]
+                        cut = True
+                    else:
+                        excerpt += piece
+                        if newline >= 0:
+                            last_complete_line = line
+                            complete_bytes = len(excerpt)
+                if newline < 0:
+                    break
+                line += 1
+                pos = end
+        chunk = stream.read(CHUNK_SIZE)
+
+    total_lines = line if size and not ends_with_newline else line - 1
+    result["size"] = size
+    result["total_lines"] = None if binary else total_lines
+    if binary:
+        result["excerpt"] = None
+        return result
+
+    if not cut and excerpt and not excerpt.endswith(b"\n"):
+        # Dòng cuối của file không có newline
+        last_complete_line = total_lines
+    if last_complete_line >= start_line:
+        end_line = last_complete_line
+        if cut:
+            # Bỏ phần dòng dở dang ở cuối, đoạn sau sẽ bắt đầu từ dòng đó
+            del excerpt[complete_bytes:]
+            cut = False
+    else:
+        # Một dòng dài hơn max_bytes: trả về phần đầu của dòng đó
+        end_line = start_line if cut else start_line - 1
+    result.update({
+        # errors="replace" vì đoạn trích có thể cắt giữa ký tự nhiều byte
+        "excerpt": excerpt.decode("utf-8", errors="replace"),
+        "excerpt_lines": [start_line, end_line] if excerpt else None,
+        "truncated": cut or end_line < total_lines,
+        "partial_line": cut,
+        "next_start_line": end_line + 1 if end_line < total_lines else None,
+    })
+    return result
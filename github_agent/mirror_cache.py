@@ -0,0 +1,380 @@
+"""
+Bare mirror dùng chung cho clone_repository
+Mỗi owner/repo có một bare mirror, được cập nhật bằng `git fetch` incremental.
+Checkout của session được tạo từ mirror bằng `git clone --shared` (alternates),
+nên clone lặp lại chỉ tốn một lần checkout local thay vì tải lại qua network
+"""
+import asyncio
+import base64
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: chỉ khóa trong process
+    fcntl = None
+
+# Thư mục chứa các bare mirror, dùng chung giữa các worker process
+DEFAULT_MIRROR_DIR = os.getenv(
+    "GITHUB_AGENT_MIRROR_DIR", os.path.join(tempfile.gettempdir(), "github_agent_mirrors")
+)
+# Timeout cho một lệnh git (giây)
+DEFAULT_GIT_TIMEOUT = float(os.getenv("GITHUB_AGENT_GIT_TIMEOUT", "300"))
+
+
+class GitCommandError(ValueError):
+    """Lệnh git thất bại"""
+
+
+def git_auth_env(token: Optional[str]) -> Dict[str, str]:
+    """
+    Environment cho git với token truyền qua http.extraHeader
+
+    Token không nằm trong argv hay .git/config của mirror/checkout
+
+    Args:
+        token: GitHub PAT
+
+    Returns:
+        Environment cho subprocess
+    """
+    env = dict(os.environ)
+    env["GIT_TERMINAL_PROMPT"] = "0"
+    if token:
+        credentials = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+        env["GIT_CONFIG_COUNT"] = "1"
+        env["GIT_CONFIG_KEY_0"] = "http.https://github.com/.extraHeader"
+        env["GIT_CONFIG_VALUE_0"] = f"Authorization: Basic {credentials}"
+    return env
+
+
+def run_git(args: List[str], token: Optional[str] = None, cwd: Optional[str] = None,
+            timeout: float = DEFAULT_GIT_TIMEOUT) -> subprocess.CompletedProcess:
+    """
+    Chạy lệnh git
+
+    Args:
+        args: Tham số sau "git"
+        token: GitHub PAT (optional)
+        cwd: Thư mục làm việc
+        timeout: Timeout (giây)
+
+    Returns:
+        CompletedProcess
+
+    Raises:
+        GitCommandError: Nếu git trả về mã lỗi
+        subprocess.TimeoutExpired: Nếu quá timeout
+    """
+    result = subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        env=git_auth_env(token),
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    if result.returncode != 0:
+        raise GitCommandError(result.stderr.strip() or f"git {args[0]} thất bại ({result.returncode})")
+    return result
+
+
+_GIT_PROGRESS_LINE_RE = re.compile(r"^(?:remote:\s*)?[A-Za-z][A-Za-z ]*:\s+\d{1,3}% ")
+
+
+async def run_git_async(args: List[str], token: Optional[str] = None, cwd: Optional[str] = None,
+                        timeout: float = DEFAULT_GIT_TIMEOUT,
+                        on_output: Optional[Callable[[str], Awaitable[None]]] = None) -> None:
+    """
+    Chạy lệnh git dạng asyncio subprocess, không block event loop
+
+    Process bị kill khi quá timeout hoặc khi task bị cancel
+
+    Args:
+        args: Tham số sau "git"
+        token: GitHub PAT (optional)
+        cwd: Thư mục làm việc
+        timeout: Timeout (giây)
+        on_output: Callback cho từng dòng stderr (output của --progress)
+
+    Raises:
+        GitCommandError: Nếu git trả về mã lỗi
+        subprocess.TimeoutExpired: Nếu quá timeout
+        asyncio.CancelledError: Nếu task bị cancel
+    """
+    process = await asyncio.create_subprocess_exec(
+        "git", *args,
+        cwd=cwd,
+        env=git_auth_env(token),
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    errors: deque = deque(maxlen=20)
+
+    async def read_stderr() -> None:
+        buffer = b""
+        while True:
+            chunk = await process.stderr.read(4096)
+            if not chunk:
+                return
+            # --progress ghi đè dòng bằng \r
+            *lines, buffer = re.split(rb"[\r\n]", buffer + chunk)
+            for raw_line in lines:
+                line = raw_line.decode("utf-8", errors="replace").strip()
+                if not line:
+                    continue
+                if not _GIT_PROGRESS_LINE_RE.match(line):
+                    errors.append(line)
+                if on_output is not None:
+                    await on_output(line)
+
+    async def communicate() -> None:
+        await read_stderr()
+        await process.wait()
+
+    try:
+        await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        raise subprocess.TimeoutExpired(["git", *args], timeout)
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    if process.returncode != 0:
+        raise GitCommandError("\n".join(errors) or f"git {args[0]} thất bại ({process.returncode})")
+
+
+async def acquire_async(lock: Any, poll_interval: float = 0.05) -> None:
+    """
+    Acquire threading lock/semaphore từ coroutine mà không block event loop
+
+    Dùng polling thay vì to_thread để cancel không làm rò lock
+    """
+    while not lock.acquire(blocking=False):
+        await asyncio.sleep(poll_interval)
+
+
+async def flock_async(lock_file: Any, poll_interval: float = 0.05) -> None:
+    """Khóa file (giữa các process) từ coroutine, tương tự acquire_async"""
+    if fcntl is None:
+        return
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            await asyncio.sleep(poll_interval)
+
+
+def git_verbosity(progress: bool) -> str:
+    return "--progress" if progress else "--quiet"
+
+
+def github_remote_url(owner: str, repo: str) -> str:
+    return f"https://github.com/{owner}/{repo}.git"
+
+
+class MirrorCache:
+    """Quản lý các bare mirror theo owner/repo (thread-safe và an toàn giữa các process)"""
+
+    def __init__(self, directory: str = DEFAULT_MIRROR_DIR):
+        """
+        Args:
+            directory: Thư mục chứa mirror
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._repo_locks: Dict[str, threading.Lock] = {}
+        self._counters = {"created": 0, "fetched": 0, "checkouts": 0, "failures": 0}
+
+    def mirror_path(self, owner: str, repo: str) -> str:
+        return os.path.join(self.directory, owner.lower(), f"{repo.lower()}.git")
+
+    def _repo_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            lock = self._repo_locks.get(path)
+            if lock is None:
+                lock = self._repo_locks[path] = threading.Lock()
+            return lock
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    # Chỉ branch và tag: refs/pull/* (mỗi PR một ref, kể cả PR của fork) không cần cho checkout
+    _REFSPECS = ["+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*"]
+
+    def _fetch_args(self, progress: bool = False) -> List[str]:
+        # Refspec truyền tường minh để mirror cũ tạo bằng `clone --mirror` (+refs/*:refs/*) cũng không kéo refs/pull/*
+        return ["fetch", "--prune", git_verbosity(progress), "origin", *self._REFSPECS]
+
+    def _create_args(self, owner: str, repo: str, tmp_path: str, progress: bool = False) -> List[str]:
+        return ["clone", "--bare", git_verbosity(progress), github_remote_url(owner, repo), tmp_path]
+
+    _CONFIG_COMMANDS = [
+        # Checkout dùng object của mirror qua alternates: không bao giờ prune
+        ["config", "gc.pruneExpire", "never"],
+        # `clone --bare` không ghi fetch refspec nào cho origin
+        ["config", "remote.origin.fetch", _REFSPECS[0]],
+        *[["config", "--add", "remote.origin.fetch", refspec] for refspec in _REFSPECS[1:]],
+    ]
+
+    def _checkout_args(self, mirror_path: str, repo_path: str, no_checkout: bool) -> List[str]:
+        # --shared: dùng object của mirror qua .git/objects/info/alternates
+        return ["clone", "--shared", "--quiet", *(["--no-checkout"] if no_checkout else []), mirror_path, repo_path]
+
+    def ensure_mirror(self, owner: str, repo: str, token: str,
+                      timeout: float = DEFAULT_GIT_TIMEOUT) -> Dict[str, Any]:
+        """
+        Tạo mirror nếu chưa có, ngược lại fetch incremental
+
+        Luôn liên hệ GitHub với token của session, nên mirror dùng chung không
+        cho phép session đọc repository mà token của nó không có quyền
+
+        Args:
+            owner: Tên owner của repository
+            repo: Tên repository
+            token: GitHub PAT của session
+            timeout: Timeout (giây)
+
+        Returns:
+            Dict chứa path, action ("created"/"fetched") và duration
+        """
+        path = self.mirror_path(owner, repo)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        started = time.monotonic()
+        with self._repo_lock(path), open(path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                # Một process cập nhật một mirror tại một thời điểm
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if os.path.isdir(path):
+                    action = "fetched"
+                    run_git(self._fetch_args(), token=token, cwd=path, timeout=timeout)
+                else:
+                    action = "created"
+                    # Clone vào thư mục tạm rồi rename để không để lại mirror dở dang
+                    tmp_path = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=".tmp-")
+                    try:
+                        run_git(self._create_args(owner, repo, tmp_path), token=token, timeout=timeout)
+                        for config_args in self._CONFIG_COMMANDS:
+                            run_git(config_args, cwd=tmp_path)
+                        os.replace(tmp_path, path)
+                    except BaseException:
+                        shutil.rmtree(tmp_path, ignore_errors=True)
+                        raise
+            except (GitCommandError, subprocess.TimeoutExpired):
+                self._count("failures")
+                raise
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        self._count(action)
+        return {"path": path, "action": action, "duration": round(time.monotonic() - started, 3)}
+
+    async def ensure_mirror_async(self, owner: str, repo: str, token: str, timeout: float = DEFAULT_GIT_TIMEOUT,
+                                  on_output: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Phiên bản asyncio của ensure_mirror, stream output --progress qua on_output"""
+        path = self.mirror_path(owner, repo)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        started = time.monotonic()
+        progress = on_output is not None
+        repo_lock = self._repo_lock(path)
+        await acquire_async(repo_lock)
+        try:
+            with open(path + ".lock", "a") as lock_file:
+                await flock_async(lock_file)
+                try:
+                    if os.path.isdir(path):
+                        action = "fetched"
+                        await run_git_async(self._fetch_args(progress), token=token, cwd=path,
+                                            timeout=timeout, on_output=on_output)
+                    else:
+                        action = "created"
+                        tmp_path = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=".tmp-")
+                        try:
+                            await run_git_async(self._create_args(owner, repo, tmp_path, progress), token=token,
+                                                timeout=timeout, on_output=on_output)
+                            for config_args in self._CONFIG_COMMANDS:
+                                await run_git_async(config_args, cwd=tmp_path)
+                            os.replace(tmp_path, path)
+                        except BaseException:
+                            shutil.rmtree(tmp_path, ignore_errors=True)
+                            raise
+                except (GitCommandError, subprocess.TimeoutExpired):
+                    self._count("failures")
+                    raise
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            repo_lock.release()
+
+        self._count(action)
+        return {"path": path, "action": action, "duration": round(time.monotonic() - started, 3)}
+
+    def checkout(self, owner: str, repo: str, token: str, repo_path: str,
+                 timeout: float = DEFAULT_GIT_TIMEOUT, no_checkout: bool = False) -> Dict[str, Any]:
+        """
+        Tạo working copy cho session từ mirror (không tải lại object qua network)
+
+        Args:
+            owner: Tên owner của repository
+            repo: Tên repository
+            token: GitHub PAT của session
+            repo_path: Thư mục đích của checkout
+            timeout: Timeout (giây)
+            no_checkout: Chưa checkout working tree (để áp dụng sparse-checkout/ref sau)
+
+        Returns:
+            Dict thông tin mirror (path, action, duration)
+        """
+        mirror = self.ensure_mirror(owner, repo, token, timeout)
+        run_git(self._checkout_args(mirror["path"], repo_path, no_checkout), timeout=timeout)
+        # origin trỏ về GitHub thay vì mirror local
+        run_git(["remote", "set-url", "origin", github_remote_url(owner, repo)], cwd=repo_path)
+        self._count("checkouts")
+        return mirror
+
+    async def checkout_async(self, owner: str, repo: str, token: str, repo_path: str,
+                             timeout: float = DEFAULT_GIT_TIMEOUT, no_checkout: bool = False,
+                             on_output: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Phiên bản asyncio của checkout"""
+        mirror = await self.ensure_mirror_async(owner, repo, token, timeout, on_output)
+        await run_git_async(self._checkout_args(mirror["path"], repo_path, no_checkout), timeout=timeout)
+        await run_git_async(["remote", "set-url", "origin", github_remote_url(owner, repo)], cwd=repo_path)
+        self._count("checkouts")
+        return mirror
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "directory": self.directory}
+
+
+_mirror_cache: Optional[MirrorCache] = None
+_mirror_cache_lock = threading.Lock()
+
+
+def get_mirror_cache() -> MirrorCache:
+    """
+    Lấy mirror cache dùng chung của process
+
+    Returns:
+        MirrorCache instance
+    """
+    global _mirror_cache
+    if _mirror_cache is None:
+        with _mirror_cache_lock:
+            if _mirror_cache is None:
+                _mirror_cache = MirrorCache()
+    return _mirror_cache
@@ -0,0 +1,170 @@
+"""
+Streaming auto-pagination cho các list endpoint của GitHub API
+Đi theo header Link: rel="next" một cách lazy, có giới hạn số item, dừng sớm
+và prefetch trang kế tiếp trong lúc trang hiện tại đang được xử lý
+"""
+import asyncio
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Số item tối đa GitHub cho phép trên một trang
+MAX_PER_PAGE = 100
+
+Page = Tuple[List[Any], Optional[str]]
+FetchPage = Callable[[str, Optional[Dict[str, Any]]], Page]
+AsyncFetchPage = Callable[[str, Optional[Dict[str, Any]]], Awaitable[Page]]
+
+_LINK_NEXT_RE = re.compile(r'<([^>]+)>\s*;\s*rel="?next"?')
+
+# Thread pool dùng chung để prefetch trang kế tiếp
+_prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="github-prefetch")
+
+
+def parse_next_link(link_header: Optional[str]) -> Optional[str]:
+    """
+    Lấy URL của trang kế tiếp từ header Link
+
+    Args:
+        link_header: Giá trị header Link
+
+    Returns:
+        URL trang kế tiếp hoặc None nếu là trang cuối
+    """
+    if not link_header:
+        return None
+    match = _LINK_NEXT_RE.search(link_header)
+    return match.group(1) if match else None
+
+
+def page_size_for(max_items: Optional[int], per_page: Optional[int] = None) -> int:
+    """Chọn per_page phù hợp với giới hạn item để tránh tải thừa"""
+    if per_page:
+        return min(per_page, MAX_PER_PAGE)
+    if max_items:
+        return min(max_items, MAX_PER_PAGE)
+    return MAX_PER_PAGE
+
+
+def iter_pages(fetch_page: FetchPage, endpoint: str, params: Optional[Dict[str, Any]] = None,
+               max_items: Optional[int] = None, prefetch: bool = True) -> Iterator[List[Any]]:
+    """
+    Duyệt lần lượt từng trang của một list endpoint
+
+    Args:
+        fetch_page: Hàm (endpoint_or_url, params) -> (items, next_url)
+        endpoint: Endpoint của trang đầu
+        params: Query params của trang đầu (các trang sau dùng URL từ Link)
+        max_items: Số item tối đa trả về (None = tất cả)
+        prefetch: Tải trước trang kế tiếp trong thread pool
+
+    Yields:
+        List item của từng trang (đã cắt theo max_items)
+    """
+    remaining = max_items
+    future: Optional[Future] = None
+    try:
+        items, next_url = fetch_page(endpoint, params)
+        while True:
+            if remaining is not None:
+                items = items[:remaining]
+                remaining -= len(items)
+            has_more = next_url is not None and (remaining is None or remaining > 0)
+            if has_more and prefetch:
+                future = _prefetch_executor.submit(fetch_page, next_url, None)
+
+            if items:
+                yield items
+            if not has_more:
+                return
+
+            if future is not None:
+                items, next_url = future.result()
+                future = None
+            else:
+                items, next_url = fetch_page(next_url, None)
+    finally:
+        # Consumer dừng sớm: bỏ trang đang prefetch
+        if future is not None:
+            future.cancel()
+
+
+def iter_items(fetch_page: FetchPage, endpoint: str, params: Optional[Dict[str, Any]] = None,
+               max_items: Optional[int] = None, prefetch: bool = True) -> Iterator[Any]:
+    """Duyệt từng item qua tất cả các trang (xem iter_pages)"""
+    for page in iter_pages(fetch_page, endpoint, params, max_items, prefetch):
+        yield from page
+
+
+async def aiter_pages(fetch_page: AsyncFetchPage, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                      max_items: Optional[int] = None, prefetch: bool = True) -> AsyncIterator[List[Any]]:
+    """Phiên bản asyncio của iter_pages, prefetch bằng asyncio task"""
+    remaining = max_items
+    task: Optional[asyncio.Task] = None
+    try:
+        items, next_url = await fetch_page(endpoint, params)
+        while True:
+            if remaining is not None:
+                items = items[:remaining]
+                remaining -= len(items)
+            has_more = next_url is not None and (remaining is None or remaining > 0)
+            if has_more and prefetch:
+                task = asyncio.ensure_future(fetch_page(next_url, None))
+
+            if items:
+                yield items
+            if not has_more:
+                return
+
+            if task is not None:
+                items, next_url = await task
+                task = None
+            else:
+                items, next_url = await fetch_page(next_url, None)
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+async def aiter_items(fetch_page: AsyncFetchPage, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                      max_items: Optional[int] = None, prefetch: bool = True) -> AsyncIterator[Any]:
+    """Phiên bản asyncio của iter_items"""
+    async for page in aiter_pages(fetch_page, endpoint, params, max_items, prefetch):
+        for item in page:
+            yield item
+
+
+def collect_items(items: Iterator[Any], limit: int) -> Tuple[List[Any], bool]:
+    """
+    Lấy tối đa `limit` item từ iterator và cho biết còn item phía sau không
+
+    Iterator nên được tạo với max_items = limit + 1
+
+    Returns:
+        Tuple (items, truncated)
+    """
+    collected = []
+    try:
+        for item in items:
+            collected.append(item)
+            if len(collected) > limit:
+                return collected[:limit], True
+        return collected, False
+    finally:
+        # Đóng generator để dừng prefetch ngay
+        if hasattr(items, "close"):
+            items.close()
+
+
+async def acollect_items(items: AsyncIterator[Any], limit: int) -> Tuple[List[Any], bool]:
+    """Phiên bản asyncio của collect_items"""
+    collected = []
+    try:
+        async for item in items:
+            collected.append(item)
+            if len(collected) > limit:
+                return collected[:limit], True
+        return collected, False
+    finally:
+        if hasattr(items, "aclose"):
+            await items.aclose()
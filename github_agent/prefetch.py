@@ -0,0 +1,179 @@
+"""
+Prefetch dự đoán sau create_github_session (opt-in: GITHUB_AGENT_PREFETCH=1)
+Ngay sau khi tạo session, model gần như luôn hỏi nội dung repository, README và
+PR đang mở. Prefetcher chạy các bước làm nóng cache đó trong thread nền (client
+sync) trong lúc model còn đang suy nghĩ, nên các tool call tiếp theo được trả
+lời từ tree index/blob cache hoặc revalidate qua ETag cache. Prefetch chỉ làm
+nóng cache: tool call async đến khi bước prefetch còn đang chạy không dùng chung
+request đó (AsyncSingleFlight tách biệt với SingleFlight của client sync).
+
+Mỗi bước chỉ chạy khi token còn nhiều budget (không bao giờ chờ rate limit), và
+phần còn lại bị hủy khi session không còn hoặc không có tool call nào trong
+GITHUB_AGENT_PREFETCH_IDLE_TIMEOUT giây
+"""
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .rate_limiter import get_rate_limit_scheduler
+from .repo_context import repo_context_stats
+from .session_manager import session_manager
+
+logger = logging.getLogger(__name__)
+
+# Bật prefetch sau create_github_session
+PREFETCH_ENABLED = os.getenv("GITHUB_AGENT_PREFETCH", "").lower() in ("1", "true", "yes")
+# Số thread chạy prefetch (dùng chung cho mọi session)
+PREFETCH_WORKERS = int(os.getenv("GITHUB_AGENT_PREFETCH_WORKERS", "2"))
+# Hủy phần prefetch còn lại nếu session không có tool call nào trong khoảng này (giây)
+PREFETCH_IDLE_TIMEOUT = float(os.getenv("GITHUB_AGENT_PREFETCH_IDLE_TIMEOUT", "120"))
+# Chỉ prefetch khi token còn ít nhất tỉ lệ này của rate limit
+PREFETCH_MIN_BUDGET = float(os.getenv("GITHUB_AGENT_PREFETCH_MIN_BUDGET", "0.5"))
+
+# Một bước prefetch: (tên, hàm)
+PrefetchStep = Tuple[str, Callable[[], Any]]
+
+
+class _PrefetchJob:
+    __slots__ = ("session_id", "scope", "steps", "cancelled", "seen_calls", "last_activity")
+
+    def __init__(self, session_id: str, scope: str, steps: List[PrefetchStep]):
+        self.session_id = session_id
+        self.scope = scope
+        self.steps = steps
+        self.cancelled = threading.Event()
+        self.seen_calls = repo_context_stats.get_stats(session_id)["tool_calls"]
+        self.last_activity = time.monotonic()
+
+    def is_idle(self, timeout: float) -> bool:
+        """Không có tool call mới của session trong timeout giây"""
+        calls = repo_context_stats.get_stats(self.session_id)["tool_calls"]
+        now = time.monotonic()
+        if calls != self.seen_calls:
+            self.seen_calls = calls
+            self.last_activity = now
+        return now - self.last_activity > timeout
+
+
+class Prefetcher:
+    """Chạy các bước prefetch của session trong thread pool riêng, mỗi session tối đa một job"""
+
+    def __init__(self, workers: int = PREFETCH_WORKERS, idle_timeout: float = PREFETCH_IDLE_TIMEOUT,
+                 min_budget: float = PREFETCH_MIN_BUDGET):
+        """
+        Args:
+            workers: Số thread chạy prefetch
+            idle_timeout: Hủy job khi session không có tool call trong khoảng này (giây)
+            min_budget: Tỉ lệ rate limit phải còn lại để chạy một bước
+        """
+        self.idle_timeout = idle_timeout
+        self.min_budget = min_budget
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="prefetch"
+        )
+        self._jobs: Dict[str, _PrefetchJob] = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "jobs": 0,
+            "steps": 0,
+            "failed_steps": 0,
+            "skipped_budget": 0,
+            "cancelled_idle": 0,
+            "cancelled_session": 0,
+            "seconds": 0.0,
+        }
+
+    def _count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def start(self, session_id: str, scope: str, steps: List[PrefetchStep]) -> bool:
+        """
+        Bắt đầu prefetch cho session
+
+        Args:
+            session_id: ID của session
+            scope: Token scope (để kiểm tra rate limit budget)
+            steps: Các bước theo thứ tự ưu tiên
+
+        Returns:
+            False nếu session đã có job đang chạy
+        """
+        job = _PrefetchJob(session_id, scope, steps)
+        with self._lock:
+            if session_id in self._jobs:
+                return False
+            self._jobs[session_id] = job
+            self._counters["jobs"] += 1
+        self._executor.submit(self._run, job)
+        return True
+
+    def cancel(self, session_id: str) -> bool:
+        """Hủy các bước chưa chạy của session (bước đang chạy vẫn chạy xong)"""
+        with self._lock:
+            job = self._jobs.get(session_id)
+        if job is None:
+            return False
+        job.cancelled.set()
+        return True
+
+    def _should_stop(self, job: _PrefetchJob) -> bool:
+        if job.cancelled.is_set() or not session_manager.has_session(job.session_id):
+            self._count("cancelled_session")
+            return True
+        if job.is_idle(self.idle_timeout):
+            self._count("cancelled_idle")
+            return True
+        if not get_rate_limit_scheduler().has_spare_budget(job.scope, self.min_budget):
+            self._count("skipped_budget")
+            return True
+        return False
+
+    def _run(self, job: _PrefetchJob) -> None:
+        started = time.monotonic()
+        try:
+            for name, step in job.steps:
+                if self._should_stop(job):
+                    break
+                try:
+                    step()
+                    self._count("steps")
+                except Exception:
+                    # Prefetch chỉ là tối ưu: lỗi để tool call thật báo lại
+                    logger.debug("Prefetch %s của session %s lỗi", name, job.session_id, exc_info=True)
+                    self._count("failed_steps")
+        finally:
+            with self._lock:
+                self._jobs.pop(job.session_id, None)
+                self._counters["seconds"] += time.monotonic() - started
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "seconds": round(self._counters["seconds"], 3),
+                "running": len(self._jobs),
+                "enabled": PREFETCH_ENABLED,
+            }
+
+
+_prefetcher: Optional[Prefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> Prefetcher:
+    """
+    Lấy prefetcher dùng chung của process
+
+    Returns:
+        Prefetcher instance
+    """
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = Prefetcher()
+    return _prefetcher
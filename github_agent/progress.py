@@ -0,0 +1,88 @@
+"""
+Chuyển tiến độ của các tool chạy lâu (clone...) tới A2A client
+GitHubAgentExecutor đặt reporter vào contextvar cho mỗi request, tool gọi
+report_progress() và reporter gửi TaskState.working update qua TaskUpdater
+"""
+import contextvars
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+ProgressReporter = Callable[[str], Awaitable[None]]
+
+_progress_reporter: contextvars.ContextVar[Optional[ProgressReporter]] = contextvars.ContextVar(
+    "github_agent_progress_reporter", default=None
+)
+
+# Dòng tiến độ của `git --progress`, ví dụ "Receiving objects:  45% (450/1000), 1.20 MiB | 2.00 MiB/s"
+GIT_PROGRESS_RE = re.compile(r"^(?:remote:\s*)?([A-Za-z][A-Za-z ]*?):\s+(\d{1,3})% \((\d+)/(\d+)\)(?:,\s*([^|]+?))?\s*(?:\||,|$)")
+
+# Khoảng thời gian tối thiểu giữa hai update trong cùng một giai đoạn (giây)
+MIN_REPORT_INTERVAL = 2.0
+
+
+def set_progress_reporter(reporter: Optional[ProgressReporter]) -> contextvars.Token:
+    """
+    Đặt reporter cho context hiện tại (task đang xử lý request)
+
+    Returns:
+        Token để reset_progress_reporter
+    """
+    return _progress_reporter.set(reporter)
+
+
+def reset_progress_reporter(token: contextvars.Token) -> None:
+    _progress_reporter.reset(token)
+
+
+def has_progress_reporter() -> bool:
+    return _progress_reporter.get() is not None
+
+
+async def report_progress(message: str) -> None:
+    """Gửi một update tiến độ, bỏ qua nếu không có reporter hoặc gửi lỗi"""
+    reporter = _progress_reporter.get()
+    if reporter is None:
+        return
+    try:
+        await reporter(message)
+    except Exception:
+        logger.debug("Không gửi được progress update", exc_info=True)
+
+
+class GitProgressReporter:
+    """Parse output `git --progress` và gửi update có throttle"""
+
+    def __init__(self, label: str, min_interval: float = MIN_REPORT_INTERVAL):
+        """
+        Args:
+            label: Tiền tố của message (ví dụ "Clone owner/repo")
+            min_interval: Khoảng thời gian tối thiểu giữa hai update cùng giai đoạn
+        """
+        self.label = label
+        self.min_interval = min_interval
+        self._phase: Optional[str] = None
+        self._percent: Optional[str] = None
+        self._reported_at = 0.0
+
+    async def __call__(self, line: str) -> None:
+        match = GIT_PROGRESS_RE.match(line)
+        if not match:
+            return
+        phase, percent, done, total, transferred = match.groups()
+        now = time.monotonic()
+        # Luôn báo khi sang giai đoạn mới hoặc hoàn tất, còn lại giới hạn tần suất
+        if phase == self._phase and (
+            percent == self._percent or (percent != "100" and now - self._reported_at < self.min_interval)
+        ):
+            return
+        self._phase = phase
+        self._percent = percent
+        self._reported_at = now
+        message = f"{self.label}: {phase} {percent}% ({done}/{total})"
+        if transferred:
+            message += f", {transferred.strip()}"
+        await report_progress(message)
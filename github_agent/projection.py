@@ -0,0 +1,263 @@
+"""
+Projection output của tool trước khi đưa cho model
+Payload của GitHub REST API chứa hàng chục field *_url, object lồng nhau (owner,
+user, head, base...) và link template mà model không cần. Mỗi tool có một
+FieldSchema chọn và làm phẳng field, sau đó output được thu gọn cho vừa token
+budget (ước lượng theo kích thước, không cần tokenizer) và có marker `omitted`
+cho biết phần đã bị bỏ
+"""
+import json
+import os
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+# Ước lượng thô: ~4 byte mỗi token với code/JSON
+BYTES_PER_TOKEN = 4
+# Token budget mặc định cho output của một tool call
+DEFAULT_OUTPUT_MAX_TOKENS = int(os.getenv("GITHUB_AGENT_OUTPUT_MAX_TOKENS", "4000"))
+# Budget nhỏ nhất được chấp nhận (marker và field bắt buộc vẫn phải vừa)
+MIN_OUTPUT_TOKENS = 200
+# Độ dài text giữ lại cho mỗi item khi danh sách vượt budget
+TEXT_PREVIEW_CHARS = 300
+TRUNCATION_MARK = "…"
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text.encode("utf-8")) + BYTES_PER_TOKEN - 1) // BYTES_PER_TOKEN
+
+
+def estimate_json_tokens(value: Any) -> int:
+    """Ước lượng số token của value khi được json.dumps như output của tool"""
+    return estimate_tokens(json.dumps(value, ensure_ascii=False))
+
+
+# Path: [(key, expand)] - expand=True khi key là list và các bước sau áp dụng cho từng phần tử
+FieldPath = List[Tuple[str, bool]]
+
+
+def _parse_path(path: str) -> FieldPath:
+    steps = []
+    for part in path.split("."):
+        expand = part.endswith("[]")
+        steps.append((part[:-2] if expand else part, expand))
+    return steps
+
+
+def _extract(value: Any, steps: FieldPath) -> Any:
+    for index, (key, expand) in enumerate(steps):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+        if expand:
+            if not isinstance(value, list):
+                return None
+            rest = steps[index + 1:]
+            values = [_extract(element, rest) if rest else element for element in value]
+            return [element for element in values if element is not None]
+    return value
+
+
+class FieldSchema:
+    """
+    Các field giữ lại cho một loại object: alias -> path
+
+    Path dùng dấu chấm cho object lồng nhau ("user.login") và [] cho list
+    ("labels[].name"). Thứ tự field là thứ tự ưu tiên: khi object vượt budget,
+    field ở cuối bị bỏ trước, `required` field đầu tiên luôn được giữ
+    """
+
+    def __init__(self, fields: Dict[str, str], text_fields: Iterable[str] = (), required: int = 1):
+        """
+        Args:
+            fields: Map alias -> path trong payload gốc
+            text_fields: Alias của các field text dài (body...) được cắt trước khi bỏ field
+            required: Số field đầu tiên không bao giờ bị bỏ
+        """
+        self.fields = fields
+        self.text_fields = tuple(text_fields)
+        self.required = required
+        self._paths = {alias: _parse_path(path) for alias, path in fields.items()}
+
+    def project(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Chọn field theo schema, bỏ field rỗng (None, "", [])"""
+        projected = {}
+        for alias, steps in self._paths.items():
+            value = _extract(item, steps)
+            if value is None or value == "" or value == []:
+                continue
+            projected[alias] = value
+        return projected
+
+
+def _truncate_text(item: Dict[str, Any], fields: Iterable[str], max_chars: int) -> List[str]:
+    truncated = []
+    for field in fields:
+        text = item.get(field)
+        if isinstance(text, str) and len(text) > max_chars:
+            item[field] = text[:max_chars] + TRUNCATION_MARK
+            truncated.append(field)
+    return truncated
+
+
+def _fit_object(payload: Dict[str, Any], key: str, schema: FieldSchema, budget: int,
+                omitted: Dict[str, Any]) -> None:
+    item = payload[key]
+    text_fields = [field for field in schema.text_fields if isinstance(item.get(field), str)]
+    if text_fields:
+        # Phần budget còn lại sau các field khác được chia đều cho các field text
+        without_text = {**payload, key: {k: v for k, v in item.items() if k not in text_fields}}
+        available = budget - estimate_json_tokens(without_text)
+        max_chars = max(TEXT_PREVIEW_CHARS, available * BYTES_PER_TOKEN // len(text_fields))
+        truncated = set()
+        # Escape JSON và marker làm ước lượng lệch: cắt thêm theo phần còn vượt
+        for _ in range(3):
+            truncated.update(_truncate_text(item, text_fields, max_chars))
+            if truncated:
+                omitted["truncated_text"] = sorted(truncated)
+            over = estimate_json_tokens(payload) - budget
+            if over <= 0:
+                return
+            if max_chars <= TEXT_PREVIEW_CHARS:
+                break
+            max_chars = max(TEXT_PREVIEW_CHARS, max_chars - over * BYTES_PER_TOKEN // len(text_fields) - 16)
+
+    dropped = []
+    for alias in reversed(list(schema.fields)[schema.required:]):
+        if estimate_json_tokens(payload) <= budget:
+            break
+        if alias in item:
+            del item[alias]
+            dropped.append(alias)
+    if dropped:
+        omitted["fields"] = dropped
+
+
+def _fit_list(payload: Dict[str, Any], key: str, schema: FieldSchema, budget: int,
+              omitted: Dict[str, Any]) -> None:
+    items = payload[key]
+    truncated = set()
+    for item in items:
+        truncated.update(_truncate_text(item, schema.text_fields, TEXT_PREVIEW_CHARS))
+    if truncated:
+        omitted["truncated_text"] = sorted(truncated)
+        if estimate_json_tokens(payload) <= budget:
+            return
+
+    # Giữ prefix dài nhất vừa budget (mỗi item thêm ", " vào output)
+    total = estimate_json_tokens({**payload, key: [], "omitted": {**omitted, "items": len(items)}})
+    keep = 0
+    for item in items:
+        total += estimate_json_tokens(item) + 1
+        if total > budget:
+            break
+        keep += 1
+    omitted["items"] = len(items) - keep
+    payload[key] = items[:keep]
+
+
+def project_payload(payload: Dict[str, Any], key: str, schema: FieldSchema,
+                    max_tokens: Optional[int] = DEFAULT_OUTPUT_MAX_TOKENS) -> Dict[str, Any]:
+    """
+    Áp dụng schema cho payload[key] (object hoặc list) và thu gọn cho vừa token budget
+
+    Thứ tự thu gọn: cắt field text dài, rồi bỏ item ở cuối (list) hoặc field ưu
+    tiên thấp (object). Khi có phần bị bỏ, payload có thêm `omitted` gồm
+    budget_tokens, truncated_text, items và/hoặc fields
+
+    Args:
+        payload: Output của tool (sửa tại chỗ)
+        key: Field chứa dữ liệu GitHub
+        schema: FieldSchema của loại object
+        max_tokens: Token budget của output; 0 hoặc None để chỉ projection
+
+    Returns:
+        payload
+    """
+    value = payload[key]
+    if isinstance(value, list):
+        payload[key] = [schema.project(item) for item in value]
+    elif isinstance(value, dict):
+        payload[key] = schema.project(value)
+    else:
+        return payload
+
+    if not max_tokens or estimate_json_tokens(payload) <= max(max_tokens, MIN_OUTPUT_TOKENS):
+        return payload
+
+    budget = max(max_tokens, MIN_OUTPUT_TOKENS)
+    omitted: Dict[str, Any] = {"budget_tokens": budget}
+    payload["omitted"] = omitted
+    if isinstance(payload[key], list):
+        _fit_list(payload, key, schema, budget, omitted)
+    else:
+        _fit_object(payload, key, schema, budget, omitted)
+    return payload
+
+
+REPOSITORY_SCHEMA = FieldSchema({
+    "full_name": "full_name",
+    "description": "description",
+    "default_branch": "default_branch",
+    "visibility": "visibility",
+    "archived": "archived",
+    "fork": "fork",
+    "parent": "parent.full_name",
+    "language": "language",
+    "stargazers_count": "stargazers_count",
+    "forks_count": "forks_count",
+    "open_issues_count": "open_issues_count",
+    "subscribers_count": "subscribers_count",
+    "size": "size",
+    "license": "license.spdx_id",
+    "topics": "topics",
+    "homepage": "homepage",
+    "html_url": "html_url",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "pushed_at": "pushed_at",
+}, text_fields=("description",), required=3)
+
+PULL_REQUEST_LIST_SCHEMA = FieldSchema({
+    "number": "number",
+    "title": "title",
+    "state": "state",
+    "draft": "draft",
+    "user": "user.login",
+    "head": "head.ref",
+    "base": "base.ref",
+    "labels": "labels[].name",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "merged_at": "merged_at",
+    "html_url": "html_url",
+}, text_fields=("title",), required=3)
+
+PULL_REQUEST_SCHEMA = FieldSchema({
+    "number": "number",
+    "title": "title",
+    "state": "state",
+    "draft": "draft",
+    "merged": "merged",
+    "mergeable": "mergeable",
+    "mergeable_state": "mergeable_state",
+    "user": "user.login",
+    "head": "head.ref",
+    "head_sha": "head.sha",
+    "base": "base.ref",
+    "labels": "labels[].name",
+    "assignees": "assignees[].login",
+    "requested_reviewers": "requested_reviewers[].login",
+    "milestone": "milestone.title",
+    "commits": "commits",
+    "additions": "additions",
+    "deletions": "deletions",
+    "changed_files": "changed_files",
+    "comments": "comments",
+    "review_comments": "review_comments",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "closed_at": "closed_at",
+    "merged_at": "merged_at",
+    "merged_by": "merged_by.login",
+    "html_url": "html_url",
+    "body": "body",
+}, text_fields=("body",), required=3)
@@ -29,14 +29,23 @@ Hỗ trợ người dùng tương tác với GitHub repositories một cách hi
 
 ### Bước 3: Thực hiện tác vụ
 4. **Sử dụng Session-based Tools**:
-   - `get_repository_info_session(session_id)`: Lấy thông tin repository
-   - `clone_repository_session(session_id, destination_path)`: Clone repository (tự động lưu vào temp folder theo session)
+   - `get_repository_info_session(session_id, max_tokens)`: Lấy thông tin repository
+   - `get_repository_overview_session(session_id, max_items)`: Tổng quan repository (thông tin, branches, PR mở, issue mở) trong một lần gọi. Ưu tiên dùng thay cho gọi riêng từng tool khi cần cái nhìn tổng thể
+   - `clone_repository_session(session_id, destination_path, profile, depth, filter, ref, single_branch, sparse_paths, timeout)`: Clone repository (tự động lưu vào temp folder theo session). Với repository lớn nên chọn profile rẻ nhất đủ dùng: `shallow` (chỉ commit mới nhất), `blobless`/`treeless` (partial clone), hoặc `sparse_paths` để chỉ checkout một số thư mục. Kết quả có `transfer_bytes` và `duration`
    - `get_repository_content_session(session_id, path, ref)`: Xem nội dung thư mục/file
-   - `get_file_content_session(session_id, path, ref)`: Đọc nội dung file cụ thể
-   - `list_pull_requests_session(session_id, state, per_page)`: Liệt kê pull requests
-   - `get_pull_request_session(session_id, number)`: Xem chi tiết pull request
-   - `get_pull_request_diff_session(session_id, number)`: Xem diff của pull request (output markdown)
-   - `search_code_session(session_id, query)`: Tìm kiếm code trong repository
+   - `get_repository_tree_session(session_id, ref, path, pattern, max_entries)`: Lấy toàn bộ cây thư mục trong một lần gọi, lọc theo path hoặc glob pattern (ưu tiên dùng khi cần khám phá nhiều thư mục)
+   - `get_file_content_session(session_id, path, ref, start_line)`: Đọc nội dung file cụ thể. File lớn chỉ trả về metadata và một đoạn trích; dùng `next_start_line` trong kết quả làm `start_line` để đọc đoạn tiếp theo
+   - `list_pull_requests_session(session_id, state, per_page, max_items, max_tokens)`: Liệt kê pull requests (max_items > 0 để tự động lấy nhiều trang)
+   - `list_branches_session(session_id, max_items)`: Liệt kê branches
+   - `list_commits_session(session_id, ref, path, max_items)`: Liệt kê commits (lọc theo branch/file)
+   - `list_issues_session(session_id, state, max_items)`: Liệt kê issues
+   - `get_pull_request_session(session_id, number, max_tokens)`: Xem chi tiết pull request
+   - Tham số `ref` để trống nghĩa là default branch thật của repository (kết quả của `create_github_session` có `default_branch`), không cần đoán `main`/`master`
+   - Output của `get_repository_info_session`, `list_pull_requests_session` và `get_pull_request_session` chỉ gồm các field cần thiết và được thu gọn theo `max_tokens`; field `omitted` cho biết phần đã bị bỏ (PR ở cuối danh sách, field, text bị cắt), hãy tăng `max_tokens` hoặc thu hẹp truy vấn nếu cần
+   - `get_pull_request_diff_session(session_id, number, path_glob, file_offset, max_files, max_tokens)`: Xem diff của pull request theo từng file/hunk kèm stats. PR lớn được chia trang: dùng `next_file_offset` làm `file_offset` để xem tiếp, `path_glob` để chỉ xem một phần. File generated/vendored/lockfile chỉ có tóm tắt
+   - `search_code_session(session_id, query)`: Tìm kiếm code qua GitHub search API (giới hạn ~10 lần/phút, chỉ default branch)
+   - `search_local_code_session(session_id, query, regex, case_sensitive, path_glob, context_lines, max_results, local_path)`: Tìm kiếm literal/regex trong bản clone local bằng trigram index, trả về file/dòng kèm context. Nhanh và không tốn quota; ưu tiên dùng sau khi đã clone repository. `local_path` chỉ nhận bản clone nằm trong thư mục clone mặc định của session
+   - `search_relevant_code_session(session_id, question, top_k, path_glob, local_path)`: Trả lời câu hỏi dạng "chức năng X được xử lý ở đâu" bằng BM25 trên bản clone local: trả về top-k đoạn code kèm `start_line`/`end_line`. Dùng trước khi đọc từng file để giảm số lần gọi
 
 ## 🔒 BẢO MẬT & SESSION MANAGEMENT
 
@@ -47,7 +56,8 @@ Hỗ trợ người dùng tương tác với GitHub repositories một cách hi
 
 ### Session Management Tools
 - `list_sessions()`: Xem danh sách session hiện tại (cho admin)
-- `cleanup_expired_sessions(max_age_hours)`: Dọn dẹp session hết hạn
+- `cleanup_expired_sessions(max_age_hours)`: Dọn dẹp ngay các session không dùng quá max_age_hours (session vẫn tự hết hạn sau TTL)
+- `get_github_api_stats()`: Xem thống kê runtime của tầng gọi GitHub API (cho admin)
 
 ## 💬 GIAO TIẾP VỚI NGƯỜI DÙNG
 
@@ -0,0 +1,347 @@
+"""
+Rate-limit-aware scheduler cho GitHub API
+Theo dõi budget còn lại của từng token từ X-RateLimit-* headers, giãn request
+trước khi cạn quota và retry với jittered backoff khi gặp secondary rate limit/5xx
+"""
+import os
+import random
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+
+# Số request luôn giữ lại, không dùng cho tới khi quota được reset
+DEFAULT_RESERVE = int(os.getenv("GITHUB_AGENT_RATE_LIMIT_RESERVE", "5"))
+# Bắt đầu giãn request khi remaining xuống dưới tỉ lệ này của limit
+DEFAULT_PACING_THRESHOLD = float(os.getenv("GITHUB_AGENT_RATE_LIMIT_PACING_THRESHOLD", "0.1"))
+# Thời gian chờ tối đa cho một request trước khi báo lỗi (giây)
+DEFAULT_MAX_WAIT = float(os.getenv("GITHUB_AGENT_RATE_LIMIT_MAX_WAIT", "60"))
+DEFAULT_MAX_RETRIES = int(os.getenv("GITHUB_AGENT_MAX_RETRIES", "3"))
+DEFAULT_BACKOFF_BASE = float(os.getenv("GITHUB_AGENT_BACKOFF_BASE", "1"))
+DEFAULT_BACKOFF_MAX = float(os.getenv("GITHUB_AGENT_BACKOFF_MAX", "30"))
+
+RETRYABLE_SERVER_ERRORS = (500, 502, 503, 504)
+
+
+class GitHubRateLimitError(ValueError):
+    """GitHub rate limit đã cạn và không thể chờ trong giới hạn cho phép"""
+
+
+def resource_for_url(url: str) -> str:
+    """
+    Xác định rate limit resource của GitHub cho một URL
+
+    Returns:
+        "search", "graphql" hoặc "core"
+    """
+    path = urlparse(url).path.lstrip("/")
+    if path.startswith("search/"):
+        return "search"
+    if path.startswith("graphql"):
+        return "graphql"
+    return "core"
+
+
+class TokenBudget:
+    """Budget rate limit của một token cho một resource"""
+
+    __slots__ = ("limit", "remaining", "reset_at", "updated_at")
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.updated_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_at": self.reset_at,
+            "reset_in": max(0.0, round(self.reset_at - time.time(), 1)) if self.reset_at else None,
+            "updated_at": self.updated_at,
+        }
+
+
+class RateLimitScheduler:
+    """Scheduler theo token (thread-safe), dùng chung cho client sync và async"""
+
+    def __init__(
+        self,
+        reserve: int = DEFAULT_RESERVE,
+        pacing_threshold: float = DEFAULT_PACING_THRESHOLD,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+    ):
+        """
+        Args:
+            reserve: Số request giữ lại trước khi reset
+            pacing_threshold: Tỉ lệ remaining/limit bắt đầu giãn request
+            max_wait: Thời gian chờ tối đa cho một lần chờ (giây)
+            max_retries: Số lần retry tối đa cho secondary limit/5xx
+            backoff_base: Backoff cơ sở (giây)
+            backoff_max: Backoff tối đa (giây)
+        """
+        self.reserve = reserve
+        self.pacing_threshold = pacing_threshold
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._budgets: Dict[Tuple[str, str], TokenBudget] = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "requests": 0,
+            "paced": 0,
+            "paced_seconds": 0.0,
+            "retries": 0,
+            "rate_limited": 0,
+            "graphql_points": 0,
+        }
+
+    def _budget(self, scope: str, resource: str) -> TokenBudget:
+        budget = self._budgets.get((scope, resource))
+        if budget is None:
+            budget = self._budgets[(scope, resource)] = TokenBudget()
+        return budget
+
+    def acquire(self, scope: str, resource: str = "core", cost: int = 1) -> float:
+        """
+        Giữ chỗ một request và tính thời gian cần chờ trước khi gửi
+
+        Args:
+            scope: Token scope
+            resource: Rate limit resource
+            cost: Số điểm ước lượng của request (GraphQL tính theo điểm)
+
+        Returns:
+            Số giây cần chờ (0 nếu gửi ngay)
+
+        Raises:
+            GitHubRateLimitError: Nếu phải chờ lâu hơn max_wait
+        """
+        now = time.time()
+        with self._lock:
+            self._counters["requests"] += 1
+            budget = self._budget(scope, resource)
+            if budget.remaining is None or budget.reset_at is None:
+                return 0.0
+
+            if budget.reset_at <= now:
+                # Cửa sổ rate limit đã reset, chưa biết budget mới
+                budget.remaining = None
+                return 0.0
+
+            reset_in = budget.reset_at - now
+            delay = 0.0
+            if budget.remaining - cost < self.reserve:
+                delay = reset_in
+            elif budget.limit and budget.remaining < budget.limit * self.pacing_threshold:
+                # Chia đều phần budget còn lại cho tới lúc reset
+                delay = reset_in / (budget.remaining - self.reserve)
+
+            if delay > self.max_wait:
+                self._counters["rate_limited"] += 1
+                raise GitHubRateLimitError(
+                    f"GitHub rate limit ({resource}) sắp cạn, cần chờ {int(reset_in)} giây tới khi reset"
+                )
+
+            # Trừ trước để các request song song cùng thấy budget đã giảm
+            budget.remaining -= cost
+            if delay > 0:
+                self._counters["paced"] += 1
+                self._counters["paced_seconds"] += delay
+            return delay
+
+    def has_spare_budget(self, scope: str, min_fraction: float, resource: str = "core", cost: int = 1) -> bool:
+        """
+        Token còn đủ budget cho request không cần thiết ngay (prefetch...)
+
+        Args:
+            scope: Token scope
+            min_fraction: Tỉ lệ limit phải còn lại sau request
+            resource: Rate limit resource
+            cost: Số điểm ước lượng của request
+
+        Returns:
+            True nếu chưa biết budget hoặc remaining sau request vẫn trên ngưỡng
+        """
+        with self._lock:
+            budget = self._budgets.get((scope, resource))
+            if budget is None or budget.remaining is None or budget.reset_at is None:
+                return True
+            if budget.reset_at <= time.time():
+                return True
+            floor = max(self.reserve, (budget.limit or 0) * min_fraction)
+            return budget.remaining - cost >= floor
+
+    def update_from_headers(self, scope: str, headers: Any, resource: str = "core") -> None:
+        """
+        Cập nhật budget từ X-RateLimit-* headers của response
+
+        Args:
+            scope: Token scope
+            headers: Headers của response
+            resource: Resource mặc định nếu response không có X-RateLimit-Resource
+        """
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        resource = headers.get("X-RateLimit-Resource") or resource
+        with self._lock:
+            budget = self._budget(scope, resource)
+            try:
+                budget.remaining = int(remaining)
+                if headers.get("X-RateLimit-Limit") is not None:
+                    budget.limit = int(headers.get("X-RateLimit-Limit"))
+                if headers.get("X-RateLimit-Reset") is not None:
+                    budget.reset_at = float(headers.get("X-RateLimit-Reset"))
+            except (TypeError, ValueError):
+                return
+            budget.updated_at = time.time()
+
+    def record_cost(self, scope: str, resource: str, cost: int, remaining: Optional[int] = None,
+                    limit: Optional[int] = None, reset_at: Optional[float] = None) -> None:
+        """
+        Ghi nhận chi phí thực của một request (ví dụ field rateLimit của GraphQL)
+
+        Args:
+            scope: Token scope
+            resource: Rate limit resource
+            cost: Số điểm request đã dùng
+            remaining, limit, reset_at: Budget mới do GitHub trả về (nếu có)
+        """
+        with self._lock:
+            if resource == "graphql":
+                self._counters["graphql_points"] += cost
+            if remaining is None:
+                return
+            budget = self._budget(scope, resource)
+            budget.remaining = remaining
+            if limit is not None:
+                budget.limit = limit
+            if reset_at is not None:
+                budget.reset_at = reset_at
+            budget.updated_at = time.time()
+
+    @staticmethod
+    def is_rate_limited(response: Any) -> bool:
+        """Response (requests/httpx) có phải là primary/secondary rate limit không"""
+        if response.status_code == 429:
+            return True
+        if response.status_code != 403:
+            return False
+        headers = response.headers
+        return (
+            headers.get("Retry-After") is not None
+            or headers.get("X-RateLimit-Remaining") == "0"
+            or "rate limit" in response.text.lower()
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: tránh nhiều session cùng retry một lúc
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def retry_delay(self, attempt: int, response: Any) -> Optional[float]:
+        """
+        Tính thời gian chờ trước khi retry
+
+        Args:
+            attempt: Số lần đã retry (bắt đầu từ 0)
+            response: Response (requests/httpx) vừa nhận
+
+        Returns:
+            Số giây cần chờ, hoặc None nếu không retry
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        headers = response.headers
+        if self.is_rate_limited(response):
+            delay = None
+            retry_after = headers.get("Retry-After")
+            if retry_after is not None:
+                try:
+                    delay = float(retry_after)
+                except ValueError:
+                    delay = None
+            elif headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+                try:
+                    delay = max(0.0, float(headers.get("X-RateLimit-Reset")) - time.time())
+                except ValueError:
+                    delay = None
+            if delay is None:
+                delay = self._backoff(attempt)
+            if delay > self.max_wait:
+                return None
+            delay += random.uniform(0, self.backoff_base)
+        elif response.status_code in RETRYABLE_SERVER_ERRORS:
+            delay = self._backoff(attempt)
+        else:
+            return None
+
+        with self._lock:
+            self._counters["retries"] += 1
+        return delay
+
+    def raise_if_rate_limited(self, response: Any) -> None:
+        """
+        Raise GitHubRateLimitError nếu response cuối cùng vẫn bị rate limit
+
+        Raises:
+            GitHubRateLimitError
+        """
+        if not self.is_rate_limited(response):
+            return
+        with self._lock:
+            self._counters["rate_limited"] += 1
+        retry_after = response.headers.get("Retry-After") or response.headers.get("X-RateLimit-Reset")
+        raise GitHubRateLimitError(
+            f"GitHub rate limit exceeded ({response.status_code}), thử lại sau"
+            + (f" (Retry-After/Reset: {retry_after})" if retry_after else "")
+        )
+
+    def get_budget(self, scope: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Lấy budget hiện tại của một token
+
+        Returns:
+            Dict theo resource
+        """
+        with self._lock:
+            return {
+                resource: budget.to_dict()
+                for (budget_scope, resource), budget in self._budgets.items()
+                if budget_scope == scope
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lấy counters và budget của tất cả token (theo token scope đã hash)"""
+        with self._lock:
+            budgets: Dict[str, Dict[str, Any]] = {}
+            for (scope, resource), budget in self._budgets.items():
+                budgets.setdefault(scope, {})[resource] = budget.to_dict()
+            counters = dict(self._counters)
+            counters["paced_seconds"] = round(counters["paced_seconds"], 3)
+            return {**counters, "budgets": budgets}
+
+
+_scheduler: Optional[RateLimitScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_rate_limit_scheduler() -> RateLimitScheduler:
+    """
+    Lấy scheduler dùng chung của process
+
+    Returns:
+        RateLimitScheduler instance
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RateLimitScheduler()
+    return _scheduler
@@ -0,0 +1,110 @@
+"""
+Context repository đã resolve của mỗi session
+Owner/repo và default branch được resolve một lần (khi tạo session hoặc ở tool
+call đầu tiên) rồi lưu trong session, nên dùng chung được giữa các worker. Head
+SHA của default branch được giữ GITHUB_AGENT_REPO_CONTEXT_TTL giây: các tool call
+trong khoảng đó đọc cùng một commit và tra tree index theo SHA không cần network.
+Ref bỏ trống được resolve theo default branch thật của repository
+"""
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+# Thời gian head SHA của default branch được dùng lại (giây), 0 để không cache
+REPO_CONTEXT_TTL = float(os.getenv("GITHUB_AGENT_REPO_CONTEXT_TTL", "60"))
+# Field của session chứa context
+CONTEXT_FIELD = "repo_context"
+
+
+class RepoContext:
+    """Owner, repo, default branch và head SHA (kèm thời điểm resolve) của repository trong session"""
+
+    __slots__ = ("owner", "repo", "default_branch", "head_sha", "head_resolved_at")
+
+    def __init__(self, owner: str, repo: str, default_branch: str = "", head_sha: str = "",
+                 head_resolved_at: float = 0.0):
+        self.owner = owner
+        self.repo = repo
+        self.default_branch = default_branch
+        self.head_sha = head_sha
+        self.head_resolved_at = head_resolved_at
+
+    @classmethod
+    def from_fields(cls, fields: Any) -> Optional["RepoContext"]:
+        """Đọc context từ field repo_context của session, None nếu chưa có"""
+        if not isinstance(fields, dict) or not fields.get("owner") or not fields.get("repo"):
+            return None
+        return cls(
+            fields["owner"],
+            fields["repo"],
+            fields.get("default_branch") or "",
+            fields.get("head_sha") or "",
+            float(fields.get("head_resolved_at") or 0.0),
+        )
+
+    def to_fields(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def head_is_fresh(self, ttl: float = REPO_CONTEXT_TTL) -> bool:
+        # Wall clock vì context được lưu trong session store và đọc ở worker khác
+        return bool(self.head_sha) and time.time() - self.head_resolved_at < ttl
+
+    def is_default_ref(self, ref: str) -> bool:
+        """
+        Ref có trỏ tới default branch không: rỗng, "HEAD" hoặc tên default branch
+        (ref khác, kể cả "main" khi default branch khác, là branch/tag thật)
+        """
+        return ref in ("", "HEAD") or ref == self.default_branch
+
+    def resolve_ref(self, ref: str) -> str:
+        """
+        Ref dùng để gọi API: ref của default branch được thay bằng head SHA còn hạn,
+        nếu không thì bằng tên default branch; ref khác giữ nguyên
+        """
+        if not self.is_default_ref(ref):
+            return ref
+        if self.head_is_fresh():
+            return self.head_sha
+        return self.default_branch or ref
+
+
+class RepoContextStats:
+    """
+    Đếm theo session (một conversation) số tool call, số request GitHub API và
+    số lần context/head SHA phải resolve qua network
+    """
+
+    COUNTERS = ("tool_calls", "api_calls", "context_resolves", "head_resolves", "head_hits", "default_refs")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict[str, int]] = {}
+        self._totals = dict.fromkeys(self.COUNTERS, 0)
+
+    def record(self, session_id: str, **counts: int) -> None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = dict.fromkeys(self.COUNTERS, 0)
+            for name, value in counts.items():
+                session[name] += value
+                self._totals[name] += value
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def get_stats(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            if session_id is not None:
+                return dict(self._sessions.get(session_id) or dict.fromkeys(self.COUNTERS, 0))
+            sessions = len(self._sessions)
+            per_session = {
+                f"{name}_per_session": round(sum(s[name] for s in self._sessions.values()) / sessions, 2)
+                for name in ("tool_calls", "api_calls")
+            } if sessions else {}
+            return {**self._totals, "sessions": sessions, **per_session}
+
+
+repo_context_stats = RepoContextStats()
@@ -0,0 +1,223 @@
+"""
+Response cache cho các endpoint đọc của GitHub API
+Lưu ETag/Last-Modified và revalidate bằng If-None-Match/If-Modified-Since.
+Response 304 không bị GitHub tính vào rate limit nên cache hit gần như miễn phí
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlencode
+
+# Tổng dung lượng body tối đa được giữ trong cache (bytes)
+DEFAULT_MAX_BYTES = int(os.getenv("GITHUB_AGENT_RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+CacheKey = Tuple[str, str, str]
+
+
+class CacheEntry:
+    """Một response đã cache cùng validators"""
+
+    __slots__ = ("etag", "last_modified", "body", "link")
+
+    def __init__(self, etag: Optional[str], last_modified: Optional[str], body: bytes,
+                 link: Optional[str] = None):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+        # Header Link để phân trang vẫn đúng khi dùng lại body từ 304
+        self.link = link
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers dùng để revalidate entry với GitHub"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def token_scope(token: str) -> str:
+    """Hash token để làm scope của cache key (không giữ token gốc trong key)"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+class ResponseCache:
+    """LRU cache theo tổng số bytes, key theo token scope + URL (thread-safe)"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            max_bytes: Tổng dung lượng body tối đa (bytes)
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "revalidations": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    @staticmethod
+    def make_key(scope: str, url: str, params: Optional[Dict[str, Any]] = None, accept: str = "") -> CacheKey:
+        """
+        Tạo cache key
+
+        Args:
+            scope: Token scope (xem token_scope)
+            url: URL đầy đủ của request
+            params: Query params
+            accept: Accept header (cùng URL nhưng media type khác là response khác)
+
+        Returns:
+            Cache key
+        """
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return (scope, url, accept)
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        """
+        Lấy entry để revalidate; entry được đánh dấu mới dùng gần nhất
+
+        Returns:
+            CacheEntry hoặc None nếu chưa có
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["revalidations"] += 1
+            return entry
+
+    def record_hit(self) -> None:
+        """Ghi nhận GitHub trả 304 và body trong cache được dùng lại"""
+        with self._lock:
+            self._counters["hits"] += 1
+
+    def prepare_request(self, scope: str, url: str, params: Optional[Dict[str, Any]],
+                        headers: Dict[str, str]) -> Tuple[CacheKey, Optional[CacheEntry]]:
+        """
+        Chuẩn bị conditional request: thêm validators vào headers nếu đã có entry
+
+        Args:
+            scope: Token scope
+            url: URL đầy đủ
+            params: Query params
+            headers: Headers của request (được cập nhật tại chỗ)
+
+        Returns:
+            Tuple (cache key, entry hiện có hoặc None)
+        """
+        key = self.make_key(scope, url, params, headers.get("Accept", ""))
+        entry = self.get(key)
+        if entry is not None:
+            headers.update(entry.conditional_headers())
+        return key, entry
+
+    def resolve_response(self, key: CacheKey, entry: Optional[CacheEntry], status_code: int,
+                         response_headers: Any, body: bytes) -> Tuple[bytes, Optional[str]]:
+        """
+        Xử lý response của conditional request
+
+        Args:
+            key: Cache key từ prepare_request
+            entry: Entry từ prepare_request
+            status_code: HTTP status code
+            response_headers: Headers của response
+            body: Body của response
+
+        Returns:
+            Tuple (body, Link header) cần dùng - lấy từ cache nếu GitHub trả 304
+        """
+        if status_code == 304 and entry is not None:
+            self.record_hit()
+            return entry.body, entry.link
+        link = response_headers.get("Link")
+        if 200 <= status_code < 300:
+            self.store(key, response_headers.get("ETag"), response_headers.get("Last-Modified"), body, link)
+        return body, link
+
+    def store(self, key: CacheKey, etag: Optional[str], last_modified: Optional[str], body: bytes,
+              link: Optional[str] = None) -> None:
+        """
+        Lưu response nếu có validator và vừa dung lượng cache
+
+        Args:
+            key: Cache key
+            etag: Giá trị header ETag
+            last_modified: Giá trị header Last-Modified
+            body: Body gốc của response
+            link: Giá trị header Link (phân trang)
+        """
+        if not (etag or last_modified) or len(body) > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = CacheEntry(etag, last_modified, body, link)
+            self._bytes += len(body)
+            self._counters["stores"] += 1
+
+            # Evict LRU cho tới khi vừa giới hạn bytes
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self._counters["evictions"] += 1
+
+    def invalidate_scope(self, scope: str) -> int:
+        """
+        Xóa toàn bộ entry của một token scope
+
+        Returns:
+            Số entry đã xóa
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == scope]
+            for key in keys:
+                self._bytes -= len(self._entries.pop(key).body)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lấy counters và dung lượng hiện tại"""
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Lấy response cache dùng chung của process
+
+    Returns:
+        ResponseCache instance
+    """
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache()
+    return _response_cache
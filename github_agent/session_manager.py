@@ -1,148 +1,622 @@
 """
 Session Manager để quản lý GitHub Personal Access Token theo session
+Session được chia vào nhiều shard, mỗi shard có lock riêng chỉ dùng cho ghi
+(tạo/cập nhật/xóa). Đọc (get_token, get_session_info) không lấy lock: tra dict
+là thao tác nguyên tử và record không bị sửa tại chỗ ngoài các field đơn
+
+Session hết hạn sau GITHUB_AGENT_SESSION_TTL giây không được truy cập. Một thread
+nền giữ min-heap (hạn, session_id) với đúng một entry cho mỗi session: entry tới
+hạn mà session đã được truy cập lại thì được đẩy lại với hạn mới, nên đọc không
+chạm tới heap và mỗi lần hết hạn tốn O(log n)
+
+Khi có session store (xem session_store.py), shard trong bộ nhớ là read-through
+cache của store: session không có trong cache được load từ store, ghi
+(tạo/cập nhật/xóa) đi thẳng xuống store, còn last_accessed được ghi theo lô
+mỗi GITHUB_AGENT_SESSION_FLUSH_INTERVAL giây
 """
-import uuid
-from typing import Dict, Optional, Any
-from threading import Lock
+import heapq
+import logging
+import os
 import time
+import uuid
+from collections.abc import Mapping
+from threading import Condition, Event, Lock, Thread
+from typing import Callable, Dict, Optional, Any, Iterator, List, Set, Tuple
+
+from .session_store import SQLiteSessionStore, SessionStoreError, create_session_store
+
+logger = logging.getLogger(__name__)
+
+# Số shard của store
+SESSION_SHARDS = int(os.getenv("GITHUB_AGENT_SESSION_SHARDS", "16"))
+# Thời gian session được giữ kể từ lần truy cập cuối (giây), 0 để tắt expiry tự động
+SESSION_TTL = float(os.getenv("GITHUB_AGENT_SESSION_TTL", str(24 * 3600)))
+# Chu kỳ ghi last_accessed xuống session store (giây)
+SESSION_FLUSH_INTERVAL = float(os.getenv("GITHUB_AGENT_SESSION_FLUSH_INTERVAL", "5"))
+# Chu kỳ xóa session hết hạn trong store, kể cả session không được load ở process này (giây)
+STORE_SWEEP_INTERVAL = 60.0
+# Thời gian chờ trước khi thử lại expiry của session khi store lỗi (giây)
+STORE_RETRY_DELAY = 60.0
+
+# Field có slot riêng trong SessionRecord, các field khác nằm trong extra
+_CORE_FIELDS = ("token", "github_url", "created_at", "last_accessed")
+_RECORD_FIELDS = _CORE_FIELDS + ("owner", "repo", "repo_full_name", "repo_description")
+# Giá trị của slot chưa được đặt (khác None: field có thể được đặt là None)
+_UNSET = object()
+
+
+class SessionRecord(Mapping):
+    """
+    Record gọn (__slots__) của một session, đọc được như dict chỉ-đọc
+    (session_info["github_url"], session_info.get("owner")...)
+    """
+
+    __slots__ = _RECORD_FIELDS + ("extra",)
+
+    def __init__(self, token: str, github_url: str, created_at: float):
+        self.token = token
+        self.github_url = github_url
+        self.created_at = created_at
+        self.last_accessed = created_at
+        self.owner: Any = _UNSET
+        self.repo: Any = _UNSET
+        self.repo_full_name: Any = _UNSET
+        self.repo_description: Any = _UNSET
+        # Field ngoài danh sách trên; được thay bằng dict mới khi cập nhật (copy-on-write)
+        self.extra: Dict[str, Any] = {}
+
+    @classmethod
+    def from_stored(cls, session: Dict[str, Any]) -> "SessionRecord":
+        """Tạo record từ dict của session store"""
+        record = cls(session["token"], session["github_url"], session["created_at"])
+        record.last_accessed = session["last_accessed"]
+        record.update(session["fields"])
+        return record
+
+    def to_stored(self) -> Dict[str, Any]:
+        """Dict để ghi vào session store"""
+        fields = {
+            name: getattr(self, name) for name in _RECORD_FIELDS[len(_CORE_FIELDS):]
+            if getattr(self, name) is not _UNSET
+        }
+        fields.update(self.extra)
+        return {
+            "token": self.token,
+            "github_url": self.github_url,
+            "created_at": self.created_at,
+            "last_accessed": self.last_accessed,
+            "fields": fields,
+        }
+
+    def update(self, fields: Dict[str, Any]) -> None:
+        """Cập nhật field; extra được thay bằng dict mới nên reader đang duyệt dict cũ không bị ảnh hưởng"""
+        extra = None
+        for key, value in fields.items():
+            if key in _RECORD_FIELDS:
+                setattr(self, key, value)
+            else:
+                if extra is None:
+                    extra = dict(self.extra)
+                extra[key] = value
+        if extra is not None:
+            self.extra = extra
+
+    def _keys(self) -> List[str]:
+        keys = [name for name in _RECORD_FIELDS if getattr(self, name) is not _UNSET]
+        keys.extend(self.extra)
+        return keys
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _RECORD_FIELDS:
+            value = getattr(self, key)
+            if value is not _UNSET:
+                return value
+        else:
+            extra = self.extra
+            if key in extra:
+                return extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __repr__(self) -> str:
+        return f"SessionRecord(github_url={self.github_url!r}, repo_full_name={self.get('repo_full_name')!r})"
+
+
+class _Shard:
+    __slots__ = ("sessions", "lock")
+
+    def __init__(self):
+        self.sessions: Dict[str, SessionRecord] = {}
+        self.lock = Lock()
+
+
+# Hook nhận (session_id, record) của session đã bị xóa do hết hạn
+ExpiryHook = Callable[[str, SessionRecord], None]
+
 
 class SessionManager:
     """Quản lý session và PAT cho từng user session"""
-    
-    def __init__(self):
-        self._sessions: Dict[str, Dict[str, Any]] = {}
-        self._lock = Lock()
-    
+
+    def __init__(self, shards: int = SESSION_SHARDS, ttl: float = SESSION_TTL,
+                 store: Optional[SQLiteSessionStore] = None,
+                 flush_interval: float = SESSION_FLUSH_INTERVAL):
+        """
+        Args:
+            shards: Số shard của cache trong bộ nhớ
+            ttl: Thời gian session được giữ kể từ lần truy cập cuối (giây), 0 để tắt
+            store: Session store bền vững (None: chỉ giữ trong bộ nhớ)
+            flush_interval: Chu kỳ ghi last_accessed xuống store (giây)
+        """
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self.ttl = ttl
+        self._store = store
+        self.flush_interval = flush_interval
+        # Session được đọc từ lần flush trước (set.add/pop nguyên tử, không cần lock)
+        self._dirty: Set[str] = set()
+        # Số session đang dùng mỗi token (để hook biết còn session nào dùng cache theo token)
+        self._token_refs: Dict[str, int] = {}
+        self._token_lock = Lock()
+        self._expiry_hooks: List[ExpiryHook] = []
+        self._heap: List[Tuple[float, str]] = []
+        self._heap_cond = Condition(Lock())
+        self._expiry_thread: Optional[Thread] = None
+        self._stopping = False
+        self._expired = 0
+        self._flush_thread: Optional[Thread] = None
+        self._stop_flush = Event()
+        if store is not None:
+            self._flush_thread = Thread(target=self._flush_loop, name="session-flush", daemon=True)
+            self._flush_thread.start()
+
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def _get(self, session_id: str) -> Optional[SessionRecord]:
+        record = self._shard(session_id).sessions.get(session_id)
+        if record is None:
+            if self._store is None:
+                return None
+            record = self._load(session_id)
+            if record is None:
+                return None
+        # Ghi một float không cần lock, lần ghi sau cùng thắng
+        record.last_accessed = time.time()
+        if self._store is not None:
+            self._dirty.add(session_id)
+        return record
+
+    def _load(self, session_id: str) -> Optional[SessionRecord]:
+        """Load session từ store vào cache (session do worker khác tạo hoặc trước khi restart)"""
+        try:
+            stored = self._store.load(session_id)
+        except SessionStoreError:
+            logger.warning("Không đọc được session %s từ store", session_id, exc_info=True)
+            return None
+        if stored is None or (self.ttl > 0 and stored["last_accessed"] + self.ttl <= time.time()):
+            return None
+        record = SessionRecord.from_stored(stored)
+
+        shard = self._shard(session_id)
+        with shard.lock:
+            existing = shard.sessions.get(session_id)
+            if existing is not None:
+                return existing
+            shard.sessions[session_id] = record
+        self._acquire_token(record.token)
+        if self.ttl > 0:
+            self._schedule(record.last_accessed + self.ttl, session_id)
+        return record
+
     def create_session(self, github_url: str, token: str) -> str:
         """
         Tạo session mới và lưu trữ PAT
-        
+
         Args:
             github_url: GitHub repository URL
             token: GitHub Personal Access Token
-            
+
         Returns:
             session_id: ID của session được tạo
         """
         session_id = str(uuid.uuid4())
-        
-        with self._lock:
-            self._sessions[session_id] = {
-                'token': token,
-                'github_url': github_url,
-                'created_at': time.time(),
-                'last_accessed': time.time()
-            }
-        
+        record = SessionRecord(token, github_url, time.time())
+        if self._store is not None:
+            self._store.save(session_id, record.to_stored())
+
+        shard = self._shard(session_id)
+        with shard.lock:
+            shard.sessions[session_id] = record
+        self._acquire_token(token)
+        if self.ttl > 0:
+            self._schedule(record.created_at + self.ttl, session_id)
+
         return session_id
-    
+
     def get_token(self, session_id: str) -> Optional[str]:
         """
         Lấy PAT của session
-        
+
         Args:
             session_id: ID của session
-            
+
         Returns:
             token hoặc None nếu session không tồn tại
         """
-        with self._lock:
-            if session_id in self._sessions:
-                self._sessions[session_id]['last_accessed'] = time.time()
-                return self._sessions[session_id]['token']
-        return None
-    
-    def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
+        record = self._get(session_id)
+        return record.token if record is not None else None
+
+    def get_session_info(self, session_id: str) -> Optional[SessionRecord]:
         """
         Lấy thông tin đầy đủ của session
-        
+
         Args:
             session_id: ID của session
-            
+
         Returns:
-            Dict chứa thông tin session hoặc None
-        """
-        with self._lock:
-            if session_id in self._sessions:
-                self._sessions[session_id]['last_accessed'] = time.time()
-                return self._sessions[session_id].copy()
-        return None
-    
+            SessionRecord (mapping chỉ-đọc, không copy) hoặc None
+        """
+        return self._get(session_id)
+
+    def has_session(self, session_id: str) -> bool:
+        """
+        Session còn trong cache của process không (không load từ store và không
+        tính là một lần truy cập, dùng cho tác vụ nền)
+        """
+        return self._shard(session_id).sessions.get(session_id) is not None
+
     def update_session(self, session_id: str, **kwargs) -> bool:
         """
         Cập nhật thông tin session
-        
+
         Args:
             session_id: ID của session
             **kwargs: Các thông tin cần cập nhật
-            
+
         Returns:
             True nếu cập nhật thành công, False nếu session không tồn tại
         """
-        with self._lock:
-            if session_id in self._sessions:
-                self._sessions[session_id].update(kwargs)
-                self._sessions[session_id]['last_accessed'] = time.time()
-                return True
-        return False
-    
+        if self._shard(session_id).sessions.get(session_id) is None and (
+            self._store is None or self._load(session_id) is None
+        ):
+            return False
+        shard = self._shard(session_id)
+        with shard.lock:
+            record = shard.sessions.get(session_id)
+            if record is None:
+                return False
+            record.update(kwargs)
+            record.last_accessed = time.time()
+            stored = record.to_stored()
+        if self._store is not None:
+            self._store.save(session_id, stored)
+        return True
+
     def delete_session(self, session_id: str) -> bool:
         """
         Xóa session
-        
+
         Args:
             session_id: ID của session
-            
+
         Returns:
             True nếu xóa thành công, False nếu session không tồn tại
         """
-        with self._lock:
-            if session_id in self._sessions:
-                del self._sessions[session_id]
-                return True
-        return False
-    
+        shard = self._shard(session_id)
+        with shard.lock:
+            record = shard.sessions.pop(session_id, None)
+        deleted = self._store.delete(session_id) if self._store is not None else False
+        if record is None:
+            return deleted
+        # Entry trong heap được bỏ qua khi tới hạn
+        self._release_token(record.token)
+        return True
+
+    def token_in_use(self, token: str) -> bool:
+        """True nếu còn session đang dùng token này"""
+        with self._token_lock:
+            return token in self._token_refs
+
+    def _acquire_token(self, token: str) -> None:
+        with self._token_lock:
+            self._token_refs[token] = self._token_refs.get(token, 0) + 1
+
+    def _release_token(self, token: str) -> None:
+        with self._token_lock:
+            count = self._token_refs.get(token, 0) - 1
+            if count > 0:
+                self._token_refs[token] = count
+            else:
+                self._token_refs.pop(token, None)
+
+    def add_expiry_hook(self, hook: ExpiryHook) -> None:
+        """
+        Đăng ký hook chạy sau khi một session bị xóa do hết hạn (giải phóng thư
+        mục clone, cache...). Hook chạy ngoài lock, lỗi của hook chỉ được log
+
+        Args:
+            hook: Hàm nhận (session_id, record)
+        """
+        self._expiry_hooks.append(hook)
+
+    def _run_expiry_hooks(self, expired: List[Tuple[str, SessionRecord]]) -> None:
+        """Chạy hook cho các session đã bị xóa (token ref của session trong cache đã được trả)"""
+        for session_id, record in expired:
+            for hook in self._expiry_hooks:
+                try:
+                    hook(session_id, record)
+                except Exception:
+                    logger.warning("Expiry hook lỗi cho session %s", session_id, exc_info=True)
+        with self._heap_cond:
+            self._expired += len(expired)
+
+    def _schedule(self, deadline: float, session_id: str) -> None:
+        with self._heap_cond:
+            heapq.heappush(self._heap, (deadline, session_id))
+            if self._heap[0][1] == session_id:
+                self._heap_cond.notify()
+            if self._expiry_thread is None and not self._stopping:
+                self._expiry_thread = Thread(
+                    target=self._expiry_loop, name="session-expiry", daemon=True
+                )
+                self._expiry_thread.start()
+
+    def _pop_due(self) -> List[Tuple[float, str]]:
+        """Chờ tới khi có entry tới hạn (hoặc stop) và lấy hết các entry đó"""
+        with self._heap_cond:
+            while not self._stopping:
+                now = time.time()
+                if self._heap and self._heap[0][0] <= now:
+                    due = []
+                    while self._heap and self._heap[0][0] <= now:
+                        due.append(heapq.heappop(self._heap))
+                    return due
+                self._heap_cond.wait(self._heap[0][0] - now if self._heap else None)
+            return []
+
+    def _expiry_loop(self) -> None:
+        while not self._stopping:
+            due = self._pop_due()
+            now = time.time()
+            expired = []
+            for _, session_id in due:
+                shard = self._shard(session_id)
+                record = shard.sessions.get(session_id)
+                if record is None:
+                    continue
+                removed_from_store = False
+                if self._store is not None and record.last_accessed + self.ttl <= now:
+                    # Worker khác có thể đã dùng session (last_accessed đã flush) hoặc đã xóa nó
+                    try:
+                        stored = self._store.last_accessed(session_id)
+                    except Exception:
+                        logger.warning("Không đọc được session %s từ store", session_id, exc_info=True)
+                        self._reschedule(now + STORE_RETRY_DELAY, session_id)
+                        continue
+                    if stored is None:
+                        removed_from_store = True
+                    elif stored > record.last_accessed:
+                        record.last_accessed = stored
+                with shard.lock:
+                    if shard.sessions.get(session_id) is not record:
+                        continue
+                    deadline = record.last_accessed + self.ttl
+                    if deadline <= now or removed_from_store:
+                        del shard.sessions[session_id]
+                        expired.append((session_id, record))
+                        continue
+                # Session đã được truy cập lại: lên lịch theo lần truy cập cuối
+                self._reschedule(deadline, session_id)
+            for session_id, record in expired:
+                self._release_token(record.token)
+                if self._store is not None:
+                    try:
+                        self._store.delete(session_id)
+                    except Exception:
+                        logger.warning("Không xóa được session %s khỏi store", session_id, exc_info=True)
+            if expired:
+                self._run_expiry_hooks(expired)
+
+    def _reschedule(self, deadline: float, session_id: str) -> None:
+        with self._heap_cond:
+            heapq.heappush(self._heap, (deadline, session_id))
+
+    def flush(self) -> int:
+        """
+        Ghi last_accessed của các session đã được đọc từ lần flush trước xuống store
+
+        Returns:
+            Số session được ghi
+        """
+        if self._store is None:
+            return 0
+        accesses = []
+        dirty = self._dirty
+        while dirty:
+            try:
+                session_id = dirty.pop()
+            except KeyError:
+                break
+            record = self._shard(session_id).sessions.get(session_id)
+            if record is not None:
+                accesses.append((session_id, record.last_accessed))
+        return self._store.touch(accesses)
+
+    def _sweep_store(self, cutoff: float) -> List[Tuple[str, SessionRecord]]:
+        """Xóa session hết hạn trong store (của mọi worker) và bỏ chúng khỏi cache"""
+        self.flush()
+        expired = []
+        for session_id, stored in self._store.delete_idle(cutoff):
+            shard = self._shard(session_id)
+            with shard.lock:
+                record = shard.sessions.pop(session_id, None)
+            if record is not None:
+                self._release_token(record.token)
+            else:
+                record = SessionRecord.from_stored(stored)
+            expired.append((session_id, record))
+        return expired
+
+    def _flush_loop(self) -> None:
+        last_sweep = 0.0
+        while not self._stop_flush.wait(self.flush_interval):
+            try:
+                if self.ttl > 0 and time.monotonic() - last_sweep >= STORE_SWEEP_INTERVAL:
+                    last_sweep = time.monotonic()
+                    expired = self._sweep_store(time.time() - self.ttl)
+                    if expired:
+                        self._run_expiry_hooks(expired)
+                else:
+                    self.flush()
+            except Exception:
+                logger.warning("Không ghi được session store", exc_info=True)
+
+    def close(self) -> None:
+        """Dừng các thread nền và ghi nốt last_accessed xuống store (khi tắt server)"""
+        with self._heap_cond:
+            self._stopping = True
+            self._heap_cond.notify_all()
+            threads = [self._expiry_thread, self._flush_thread]
+        self._stop_flush.set()
+        for thread in threads:
+            if thread is not None:
+                thread.join()
+        self.flush()
+
     def cleanup_expired_sessions(self, max_age_hours: int = 24) -> int:
         """
         Xóa các session hết hạn
-        
+
         Args:
             max_age_hours: Thời gian tối đa session được giữ (giờ)
-            
+
         Returns:
             Số session đã được xóa
         """
-        current_time = time.time()
-        max_age_seconds = max_age_hours * 3600
-        
-        expired_sessions = []
-        
-        with self._lock:
-            for session_id, session_data in self._sessions.items():
-                if current_time - session_data['last_accessed'] > max_age_seconds:
-                    expired_sessions.append(session_id)
-            
-            for session_id in expired_sessions:
-                del self._sessions[session_id]
-        
-        return len(expired_sessions)
-    
+        cutoff = time.time() - max_age_hours * 3600
+        expired = []
+
+        if self._store is not None:
+            # Store là nguồn chính, gồm cả session của worker khác
+            expired = self._sweep_store(cutoff)
+        else:
+            # Quét toàn bộ, dùng cho max_age khác TTL; mỗi lần chỉ giữ lock của một shard
+            for shard in self._shards:
+                with shard.lock:
+                    for session_id in [
+                        session_id for session_id, record in shard.sessions.items()
+                        if record.last_accessed < cutoff
+                    ]:
+                        expired.append((session_id, shard.sessions.pop(session_id)))
+            for _, record in expired:
+                self._release_token(record.token)
+
+        self._run_expiry_hooks(expired)
+        return len(expired)
+
     def list_sessions(self) -> Dict[str, Dict[str, Any]]:
         """
         Liệt kê tất cả session (không bao gồm token để bảo mật)
-        
+
         Returns:
             Dict chứa thông tin các session
         """
-        with self._lock:
-            return {
-                session_id: {
-                    'github_url': data['github_url'],
-                    'created_at': data['created_at'],
-                    'last_accessed': data['last_accessed']
+        if self._store is not None:
+            self.flush()
+            return self._store.list_sessions()
+        sessions = {}
+        for shard in self._shards:
+            with shard.lock:
+                items = list(shard.sessions.items())
+            for session_id, record in items:
+                sessions[session_id] = {
+                    'github_url': record.github_url,
+                    'created_at': record.created_at,
+                    'last_accessed': record.last_accessed
                 }
-                for session_id, data in self._sessions.items()
-            }
+        return sessions
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Thống kê: số session trong bộ nhớ, phân bố theo shard và session store
+
+        Returns:
+            Dict thống kê
+        """
+        sizes = [len(shard.sessions) for shard in self._shards]
+        with self._heap_cond:
+            scheduled = len(self._heap)
+            expired = self._expired
+        return {
+            "sessions": sum(sizes),
+            "shards": len(sizes),
+            "largest_shard": max(sizes),
+            "ttl_seconds": self.ttl,
+            "scheduled_expiries": scheduled,
+            "expired": expired,
+            "store": self._store.get_stats() if self._store is not None else None,
+        }
+
+
+def benchmark(thread_counts=(1, 2, 4, 8), sessions: int = 5000, duration: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Microbenchmark đọc: mỗi thread gọi get_token/get_session_info trên session ngẫu nhiên
+
+    Args:
+        thread_counts: Các số thread cần đo
+        sessions: Số session trong store
+        duration: Thời gian đo mỗi cấu hình (giây)
+
+    Returns:
+        List dict (threads, ops, seconds, ops_per_sec) - seconds là thời gian đo thực
+        từ lúc start thread đầu tiên tới khi join thread cuối cùng
+    """
+    import random
+
+    manager = SessionManager(ttl=0)
+    session_ids = [manager.create_session("https://github.com/owner/repo", "ghp_x") for _ in range(sessions)]
+    results = []
+    for threads in thread_counts:
+        counts = [0] * threads
+        stop = Event()
+
+        def worker(slot: int) -> None:
+            rng = random.Random(slot)
+            ops = 0
+            while not stop.is_set():
+                for _ in range(100):
+                    session_id = session_ids[rng.randrange(sessions)]
+                    manager.get_token(session_id)
+                    manager.get_session_info(session_id)["github_url"]
+                ops += 200
+            counts[slot] = ops
+
+        workers = [Thread(target=worker, args=(slot,)) for slot in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        results.append({
+            "threads": threads,
+            "ops": sum(counts),
+            "seconds": round(elapsed, 3),
+            "ops_per_sec": round(sum(counts) / elapsed),
+        })
+    return results
+
 
 # Global session manager instance
-session_manager = SessionManager() 
\ No newline at end of file
+session_manager = SessionManager(store=create_session_store())
+
+
+if __name__ == "__main__":
+    for row in benchmark():
+        print(f"{row['threads']:>2} threads: {row['ops_per_sec']:>12,} ops/s")
@@ -0,0 +1,235 @@
+"""
+Store bền vững cho session trên SQLite (WAL)
+Session sống qua restart và được chia sẻ giữa các worker process trên cùng host.
+Token được mã hóa bằng Fernet (cần package `cryptography`) với key lấy từ
+GITHUB_AGENT_SESSION_KEY; SessionManager vẫn giữ session trong bộ nhớ làm
+read-through cache và ghi last_accessed theo lô
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    Fernet = None
+    InvalidToken = None
+
+# Đường dẫn file SQLite, để trống để chỉ giữ session trong bộ nhớ
+SESSION_DB_PATH = os.getenv("GITHUB_AGENT_SESSION_DB", "")
+# Biến môi trường chứa Fernet key (urlsafe base64, 32 bytes) để mã hóa token
+SESSION_KEY_ENV = "GITHUB_AGENT_SESSION_KEY"
+# Timeout chờ lock ghi của worker khác (milli giây)
+BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    token BLOB NOT NULL,
+    github_url TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_accessed REAL NOT NULL,
+    fields TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS sessions_last_accessed ON sessions (last_accessed);
+"""
+
+
+class SessionStoreError(ValueError):
+    """Cấu hình store sai hoặc không giải mã được token"""
+
+
+class TokenCipher:
+    """Mã hóa/giải mã token bằng Fernet"""
+
+    def __init__(self, key: str):
+        """
+        Args:
+            key: Fernet key (tạo bằng `Fernet.generate_key()`)
+        """
+        if Fernet is None:
+            raise SessionStoreError("Cần cài package `cryptography` để mã hóa token của session store")
+        try:
+            self._fernet = Fernet(key)
+        except (TypeError, ValueError) as e:
+            raise SessionStoreError(f"{SESSION_KEY_ENV} không phải Fernet key hợp lệ") from e
+
+    @classmethod
+    def from_env(cls) -> "TokenCipher":
+        key = os.getenv(SESSION_KEY_ENV, "")
+        if not key:
+            raise SessionStoreError(f"Cần đặt {SESSION_KEY_ENV} khi dùng session store trên SQLite")
+        return cls(key)
+
+    def encrypt(self, token: str) -> bytes:
+        return self._fernet.encrypt(token.encode("utf-8"))
+
+    def decrypt(self, data: bytes) -> str:
+        try:
+            return self._fernet.decrypt(data).decode("utf-8")
+        except InvalidToken as e:
+            raise SessionStoreError("Không giải mã được token (key đã đổi?)") from e
+
+
+class SQLiteSessionStore:
+    """
+    Session store trên SQLite ở chế độ WAL: nhiều worker đọc song song, ghi tuần tự
+
+    Mỗi thread dùng connection riêng. Các method nhận/trả session dạng dict với
+    token, github_url, created_at, last_accessed và fields (các thông tin khác)
+    """
+
+    def __init__(self, path: str, cipher: TokenCipher):
+        """
+        Args:
+            path: Đường dẫn file SQLite
+            cipher: TokenCipher để mã hóa token
+        """
+        self.path = path
+        self.cipher = cipher
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"loads": 0, "writes": 0, "touch_batches": 0, "touched": 0}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: commit không fsync mỗi lần, vẫn an toàn khi process crash
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.connection = connection
+        return connection
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def _row_to_session(self, row: Tuple) -> Dict[str, Any]:
+        token, github_url, created_at, last_accessed, fields = row
+        return {
+            "token": self.cipher.decrypt(token),
+            "github_url": github_url,
+            "created_at": created_at,
+            "last_accessed": last_accessed,
+            "fields": json.loads(fields),
+        }
+
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        """Ghi (insert hoặc thay thế) một session"""
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sessions (session_id, token, github_url, created_at, last_accessed, fields) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                session_id,
+                self.cipher.encrypt(session["token"]),
+                session["github_url"],
+                session["created_at"],
+                session["last_accessed"],
+                json.dumps(session["fields"], ensure_ascii=False),
+            ),
+        )
+        self._count("writes")
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT token, github_url, created_at, last_accessed, fields FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        self._count("loads")
+        return self._row_to_session(row) if row is not None else None
+
+    def last_accessed(self, session_id: str) -> Optional[float]:
+        """last_accessed đã ghi của session (mọi worker), None nếu session không còn"""
+        row = self._connection().execute(
+            "SELECT last_accessed FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def delete(self, session_id: str) -> bool:
+        cursor = self._connection().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self._count("writes")
+        return cursor.rowcount > 0
+
+    def touch(self, accesses: Iterable[Tuple[str, float]]) -> int:
+        """
+        Ghi last_accessed theo lô trong một transaction (không lùi giá trị đã ghi bởi worker khác)
+
+        Args:
+            accesses: Các cặp (session_id, last_accessed)
+
+        Returns:
+            Số session được ghi
+        """
+        accesses = [(last_accessed, session_id) for session_id, last_accessed in accesses]
+        if not accesses:
+            return 0
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                "UPDATE sessions SET last_accessed = MAX(last_accessed, ?) WHERE session_id = ?", accesses
+            )
+        self._count("touch_batches")
+        self._count("touched", len(accesses))
+        return len(accesses)
+
+    def delete_idle(self, cutoff: float) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Xóa các session không được truy cập từ cutoff
+
+        Args:
+            cutoff: Timestamp; session có last_accessed nhỏ hơn bị xóa
+
+        Returns:
+            List (session_id, session) đã xóa
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            rows = connection.execute(
+                "SELECT session_id, token, github_url, created_at, last_accessed, fields "
+                "FROM sessions WHERE last_accessed < ?",
+                (cutoff,),
+            ).fetchall()
+            connection.execute("DELETE FROM sessions WHERE last_accessed < ?", (cutoff,))
+        removed = []
+        for row in rows:
+            try:
+                removed.append((row[0], self._row_to_session(row[1:])))
+            except SessionStoreError:
+                continue
+        return removed
+
+    def list_sessions(self) -> Dict[str, Dict[str, Any]]:
+        """Thông tin các session (không có token)"""
+        rows = self._connection().execute(
+            "SELECT session_id, github_url, created_at, last_accessed FROM sessions"
+        ).fetchall()
+        return {
+            session_id: {"github_url": github_url, "created_at": created_at, "last_accessed": last_accessed}
+            for session_id, github_url, created_at, last_accessed in rows
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        count = self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        with self._lock:
+            return {**self._counters, "path": self.path, "sessions": count}
+
+
+def create_session_store() -> Optional[SQLiteSessionStore]:
+    """
+    Tạo session store theo GITHUB_AGENT_SESSION_DB
+
+    Returns:
+        SQLiteSessionStore, hoặc None nếu chỉ giữ session trong bộ nhớ
+    """
+    if not SESSION_DB_PATH:
+        return None
+    return SQLiteSessionStore(SESSION_DB_PATH, TokenCipher.from_env())
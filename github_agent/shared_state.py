@@ -0,0 +1,186 @@
+"""
+Backend dùng chung giữa các worker process trên cùng host (chế độ --workers N)
+A2A task lưu trong SQLite, artifact của ADK lưu thành file theo version. ADK
+session dùng DatabaseSessionService trên SQLite và GitHub session dùng
+session_store.SQLiteSessionStore, nên worker nào cũng phục vụ được mọi request
+"""
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+from typing import List, Optional
+from urllib.parse import quote, unquote
+
+from a2a.server.tasks import TaskStore
+from a2a.types import Task
+from google.adk.artifacts import BaseArtifactService
+from google.genai import types
+
+# Thư mục chứa state dùng chung (task, ADK session, artifact, GitHub session)
+DEFAULT_STATE_DIR = os.getenv(
+    "GITHUB_AGENT_STATE_DIR", os.path.join(tempfile.gettempdir(), "github_agent_state")
+)
+# Timeout chờ lock ghi của worker khác (giây)
+SQLITE_TIMEOUT = 30.0
+
+
+def enable_wal(path: str) -> None:
+    """Chuyển file SQLite sang WAL (lưu trong file, áp dụng cho mọi connection sau đó)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(path, timeout=SQLITE_TIMEOUT)
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+    finally:
+        connection.close()
+
+
+class SQLiteTaskStore(TaskStore):
+    """TaskStore của A2A trên SQLite (WAL), thay cho InMemoryTaskStore khi chạy nhiều worker"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Đường dẫn file SQLite
+        """
+        self.path = path
+        self._local = threading.local()
+        enable_wal(path)
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS tasks (task_id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _save(self, task_id: str, data: str) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO tasks (task_id, data) VALUES (?, ?)", (task_id, data)
+        )
+
+    def _get(self, task_id: str) -> Optional[str]:
+        row = self._connection().execute("SELECT data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _delete(self, task_id: str) -> None:
+        self._connection().execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    # Query chạy trong thread pool để không chặn event loop khi chờ lock của worker khác
+    async def save(self, task: Task) -> None:
+        await asyncio.to_thread(self._save, task.id, task.model_dump_json())
+
+    async def get(self, task_id: str) -> Optional[Task]:
+        data = await asyncio.to_thread(self._get, task_id)
+        return Task.model_validate_json(data) if data is not None else None
+
+    async def delete(self, task_id: str) -> None:
+        await asyncio.to_thread(self._delete, task_id)
+
+
+class FileArtifactService(BaseArtifactService):
+    """
+    Artifact service lưu trên filesystem: mỗi version là một file JSON của types.Part
+
+    Layout: <root>/<app>/<user>/<session hoặc "user">/<filename>/<version>.json,
+    filename có tiền tố "user:" thuộc namespace của user như InMemoryArtifactService.
+    Version mới được tạo bằng os.link nên hai worker không ghi đè cùng version
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Thư mục gốc chứa artifact
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _artifact_dir(self, app_name: str, user_id: str, session_id: str, filename: str) -> str:
+        scope = "user" if filename.startswith("user:") else quote(session_id, safe="")
+        return os.path.join(
+            self.root, quote(app_name, safe=""), quote(user_id, safe=""), scope, quote(filename, safe="")
+        )
+
+    @staticmethod
+    def _versions(directory: str) -> List[int]:
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-5]) for name in names if name.endswith(".json") and name[:-5].isdigit())
+
+    def _save(self, directory: str, data: str) -> int:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            while True:
+                versions = self._versions(directory)
+                version = versions[-1] + 1 if versions else 0
+                try:
+                    os.link(tmp_path, os.path.join(directory, f"{version}.json"))
+                    return version
+                except FileExistsError:
+                    continue
+        finally:
+            os.remove(tmp_path)
+
+    def _load(self, directory: str, version: Optional[int]) -> Optional[types.Part]:
+        if version is None:
+            versions = self._versions(directory)
+            if not versions:
+                return None
+            version = versions[-1]
+        try:
+            with open(os.path.join(directory, f"{version}.json"), encoding="utf-8") as f:
+                return types.Part.model_validate_json(f.read())
+        except FileNotFoundError:
+            return None
+
+    def _list_keys(self, app_name: str, user_id: str, session_id: str) -> List[str]:
+        user_root = os.path.join(self.root, quote(app_name, safe=""), quote(user_id, safe=""))
+        filenames = []
+        for scope in (quote(session_id, safe=""), "user"):
+            try:
+                names = os.listdir(os.path.join(user_root, scope))
+            except FileNotFoundError:
+                continue
+            filenames.extend(
+                unquote(name) for name in names
+                if self._versions(os.path.join(user_root, scope, name))
+            )
+        return sorted(filenames)
+
+    def _delete(self, directory: str) -> None:
+        for version in self._versions(directory):
+            try:
+                os.remove(os.path.join(directory, f"{version}.json"))
+            except FileNotFoundError:
+                pass
+
+    async def save_artifact(self, *, app_name: str, user_id: str, session_id: str, filename: str,
+                            artifact: types.Part) -> int:
+        directory = self._artifact_dir(app_name, user_id, session_id, filename)
+        return await asyncio.to_thread(self._save, directory, artifact.model_dump_json(exclude_none=True))
+
+    async def load_artifact(self, *, app_name: str, user_id: str, session_id: str, filename: str,
+                            version: Optional[int] = None) -> Optional[types.Part]:
+        directory = self._artifact_dir(app_name, user_id, session_id, filename)
+        return await asyncio.to_thread(self._load, directory, version)
+
+    async def list_artifact_keys(self, *, app_name: str, user_id: str, session_id: str) -> List[str]:
+        return await asyncio.to_thread(self._list_keys, app_name, user_id, session_id)
+
+    async def delete_artifact(self, *, app_name: str, user_id: str, session_id: str, filename: str) -> None:
+        directory = self._artifact_dir(app_name, user_id, session_id, filename)
+        await asyncio.to_thread(self._delete, directory)
+
+    async def list_versions(self, *, app_name: str, user_id: str, session_id: str, filename: str) -> List[int]:
+        directory = self._artifact_dir(app_name, user_id, session_id, filename)
+        return await asyncio.to_thread(self._versions, directory)
@@ -0,0 +1,289 @@
+"""
+Single-flight cho các GET giống nhau đang chạy đồng thời
+Repository phổ biến thường được nhiều user mở cùng lúc: các request trùng (cùng
+repo info, cùng file ở cùng SHA) chỉ gửi một lần lên GitHub, các request còn lại
+chờ và dùng chung kết quả (status, body, Link). Key gồm URL, Accept và scope:
+token scope, hoặc scope "public" cho resource con của repository đã biết là
+public (nội dung giống nhau với mọi token). Giữa các token khác nhau chỉ kết quả
+thành công (2xx/304) được dùng chung: lỗi auth/rate limit của token leader không
+được áp cho token khác, follower tự gửi lại request bằng token của mình
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+# Scope dùng chung giữa các token cho resource của repository public
+PUBLIC_SCOPE = "public"
+# Thời gian một repository được coi là public kể từ lần xác nhận cuối (giây)
+PUBLIC_REPO_TTL = float(os.getenv("GITHUB_AGENT_PUBLIC_REPO_TTL", "3600"))
+# Số repository public được ghi nhớ
+MAX_PUBLIC_REPOS = 4096
+
+_REPO_PATH_RE = re.compile(r"/repos/([^/]+)/([^/]+)(/.*)?$")
+
+# Kết quả dùng chung của một request: (status code, body, header Link)
+FlightResult = Tuple[int, bytes, Optional[str]]
+
+
+class PublicRepoRegistry:
+    """Các repository đã biết là public (học từ repository info), có TTL"""
+
+    def __init__(self, ttl: float = PUBLIC_REPO_TTL, max_repos: int = MAX_PUBLIC_REPOS):
+        self.ttl = ttl
+        self.max_repos = max_repos
+        self._repos: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, owner: str, repo: str, public: bool) -> None:
+        """Ghi nhận visibility của repository từ repository info"""
+        key = (owner.lower(), repo.lower())
+        with self._lock:
+            if not public:
+                self._repos.pop(key, None)
+                return
+            self._repos[key] = time.monotonic()
+            self._repos.move_to_end(key)
+            while len(self._repos) > self.max_repos:
+                self._repos.popitem(last=False)
+
+    def is_public(self, owner: str, repo: str) -> bool:
+        with self._lock:
+            marked = self._repos.get((owner.lower(), repo.lower()))
+            return marked is not None and time.monotonic() - marked <= self.ttl
+
+    def flight_scope(self, scope: str, url: str) -> str:
+        """
+        Scope của single-flight key cho URL
+
+        Resource con của repository public (contents, trees, commits, pulls...) dùng
+        chung scope "public". Bản thân repository info có field theo user
+        (permissions) nên vẫn theo token scope
+        """
+        match = _REPO_PATH_RE.search(urlparse(url).path)
+        if match and match.group(3) and match.group(3) != "/" and self.is_public(match.group(1), match.group(2)):
+            return PUBLIC_SCOPE
+        return scope
+
+    def __len__(self) -> int:
+        return len(self._repos)
+
+
+def shareable_across_scopes(result: FlightResult) -> bool:
+    """Kết quả có dùng chung được cho token khác không (chỉ 2xx/304)"""
+    return 200 <= result[0] < 300 or result[0] == 304
+
+
+def flight_key(scope: str, url: str, params: Optional[Dict[str, Any]], accept: str) -> Tuple[str, str, str]:
+    if params:
+        url = f"{url}?{urlencode(sorted(params.items()))}"
+    return (scope, url, accept)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "scope")
+
+    def __init__(self, scope: Optional[str] = None):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        # Token scope của leader
+        self.scope = scope
+
+
+class SingleFlight:
+    """
+    Gộp các call trùng key đang chạy: call đầu tiên (leader) chạy fn, các call
+    đến trong lúc đó chờ và nhận cùng kết quả hoặc cùng exception
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = {"leaders": 0, "collapsed": 0, "collapsed_public": 0, "shared_errors": 0,
+                          "own_retries": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], scope: Optional[str] = None) -> Any:
+        """
+        Chạy fn một lần cho mọi call đồng thời cùng key
+
+        Follower có token scope khác leader chỉ dùng kết quả thành công; nếu leader
+        gặp lỗi hoặc status lỗi, follower tự chạy fn của mình
+
+        Args:
+            key: Key của call (xem flight_key)
+            fn: Hàm thực hiện request (với token của caller)
+            scope: Token scope của caller
+
+        Returns:
+            Kết quả của fn (dùng chung, không được sửa tại chỗ)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(scope)
+                self._counters["leaders"] += 1
+
+        if not leader:
+            call.done.wait()
+            if not self._can_share(call.scope, scope, call.error, call.result):
+                self._count_own_retry()
+                return fn()
+            self._record_follower(key, call.error)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @staticmethod
+    def _can_share(leader_scope: Optional[str], scope: Optional[str], error: Optional[BaseException],
+                   result: Any) -> bool:
+        if leader_scope == scope:
+            return True
+        return error is None and shareable_across_scopes(result)
+
+    def _count_own_retry(self) -> None:
+        with self._lock:
+            self._counters["own_retries"] += 1
+
+    def _record_follower(self, key: Hashable, error: Optional[BaseException]) -> None:
+        with self._lock:
+            self._counters["collapsed"] += 1
+            if key[0] == PUBLIC_SCOPE:
+                self._counters["collapsed_public"] += 1
+            if error is not None:
+                self._counters["shared_errors"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight(SingleFlight):
+    """Phiên bản asyncio: follower await future của leader (key tách theo event loop)"""
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], scope: Optional[str] = None) -> Any:
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        while True:
+            with self._lock:
+                call = self._calls.get(loop_key)
+                leader = call is None
+                if leader:
+                    # (future, token scope của leader)
+                    call = self._calls[loop_key] = (loop.create_future(), scope)
+                    self._counters["leaders"] += 1
+            future, leader_scope = call
+            if leader:
+                break
+            try:
+                # shield: follower bị cancel không cancel request của leader
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    # Leader bị cancel (không phải follower): thử lại, có thể trở thành leader
+                    continue
+                raise
+            except BaseException as e:
+                if not self._can_share(leader_scope, scope, e, None):
+                    self._count_own_retry()
+                    return await fn()
+                self._record_follower(key, e)
+                raise
+            if not self._can_share(leader_scope, scope, None, result):
+                self._count_own_retry()
+                return await fn()
+            self._record_follower(key, None)
+            return result
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Đánh dấu exception đã được lấy (không có follower thì asyncio sẽ cảnh báo)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[loop_key]
+
+
+_public_repos: Optional[PublicRepoRegistry] = None
+_single_flight: Optional[SingleFlight] = None
+_async_single_flight: Optional[AsyncSingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_public_repos() -> PublicRepoRegistry:
+    """
+    Lấy registry repository public dùng chung của process
+
+    Returns:
+        PublicRepoRegistry instance
+    """
+    global _public_repos
+    if _public_repos is None:
+        with _single_flight_lock:
+            if _public_repos is None:
+                _public_repos = PublicRepoRegistry()
+    return _public_repos
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    Lấy single-flight dùng chung của các client sync
+
+    Returns:
+        SingleFlight instance
+    """
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
+
+
+def get_async_single_flight() -> AsyncSingleFlight:
+    """
+    Lấy single-flight dùng chung của các client async
+
+    Returns:
+        AsyncSingleFlight instance
+    """
+    global _async_single_flight
+    if _async_single_flight is None:
+        with _single_flight_lock:
+            if _async_single_flight is None:
+                _async_single_flight = AsyncSingleFlight()
+    return _async_single_flight
+
+
+def single_flight_stats() -> Dict[str, Any]:
+    """Thống kê single-flight của client sync, async và số repository public đã biết"""
+    return {
+        "sync": get_single_flight().get_stats(),
+        "async": get_async_single_flight().get_stats(),
+        "public_repos": len(get_public_repos()),
+    }
@@ -1,13 +1,38 @@
 """
 New GitHub Tools sử dụng session-based GitHub API Client
 Thay thế cho github-mcp-server để hỗ trợ multi-user
+
+Các tool theo session (*_session) nằm trong async_tools. Module này giữ các tool
+không cần session (validate, list/cleanup session, stats, hướng dẫn), các helper
+dùng chung với async_tools và prefetch nền (chạy bằng client sync)
 """
 import json
-import re
-from typing import Dict, Any, List, Optional
+import os
+import shutil
+import time
+from typing import Dict, Any, List, Mapping, Optional, Tuple
 from urllib.parse import urlparse
-from .session_manager import session_manager
-from .github_api_client import create_github_client
+from .session_manager import SessionRecord, session_manager
+from .github_api_client import GitHubAPIClient, build_clone_path, create_github_client, session_clone_root
+from .repo_context import CONTEXT_FIELD, RepoContext, repo_context_stats
+from .tree_index import RepositoryTreeIndex, get_tree_index_cache
+from .blob_cache import get_blob_cache
+from .mirror_cache import get_mirror_cache
+from .code_index import get_code_index_manager
+from .bm25_index import get_bm25_index_manager
+from .fanout import CallResult, fanout_stats
+from .diff_parser import (
+    DEFAULT_DIFF_MAX_FILES,
+    DEFAULT_DIFF_MAX_TOKENS,
+    DiffFile,
+    build_diff_page,
+)
+from .http_transport import get_async_transport_stats, get_transport
+from .response_cache import get_response_cache, token_scope
+from .rate_limiter import get_rate_limit_scheduler
+from .single_flight import single_flight_stats
+from .prefetch import PREFETCH_ENABLED, PrefetchStep, get_prefetcher
+from .warm_pool import warm_pool_stats
 
 
 def validate_github_url(url: str) -> Dict[str, Any]:
@@ -116,478 +141,293 @@ def validate_github_token(token: str) -> Dict[str, Any]:
         }
 
 
-def create_github_session(github_url: str, token: str) -> str:
+def load_session_context(session_info: Mapping[str, Any]) -> Optional[RepoContext]:
     """
-    Tạo session mới và lưu trữ PAT cho user
+    Lấy context repository đã lưu trong session
+    
+    Session tạo trước khi có context được dựng lại từ owner/repo đã lưu hoặc từ
+    github_url (default branch được resolve khi tool cần tới)
     
     Args:
-        github_url: GitHub repository URL
-        token: GitHub Personal Access Token
+        session_info: Record của session
         
     Returns:
-        JSON string chứa thông tin session
+        RepoContext hoặc None nếu github_url không hợp lệ
     """
-    try:
-        # Validate inputs
-        url_validation = validate_github_url(github_url)
+    context = RepoContext.from_fields(session_info.get(CONTEXT_FIELD))
+    if context is not None:
+        return context
+    owner, repo = session_info.get("owner"), session_info.get("repo")
+    if not owner or not repo:
+        url_validation = validate_github_url(session_info["github_url"])
         if not url_validation["valid"]:
-            return json.dumps({
-                "success": False,
-                "error": f"GitHub URL không hợp lệ: {url_validation['error']}"
-            }, ensure_ascii=False)
-            
-        token_validation = validate_github_token(token)
-        if not token_validation["valid"]:
-            return json.dumps({
-                "success": False,
-                "error": f"GitHub token không hợp lệ: {token_validation['error']}"
-            }, ensure_ascii=False)
-        
-        # Tạo session mới
-        session_id = session_manager.create_session(github_url, token)
-        
-        # Test connection để đảm bảo token hoạt động
-        try:
-            client = create_github_client(session_id)
-            repo_info = client.get_repository_info(url_validation["owner"], url_validation["repo"])
-            
-            # Cập nhật thông tin session với repo info
-            session_manager.update_session(session_id, 
-                owner=url_validation["owner"],
-                repo=url_validation["repo"],
-                repo_full_name=repo_info.get("full_name"),
-                repo_description=repo_info.get("description")
-            )
-            
-            return json.dumps({
-                "success": True,
-                "session_id": session_id,
-                "message": "Session đã được tạo thành công",
-                "repository": {
-                    "owner": url_validation["owner"],
-                    "repo": url_validation["repo"],
-                    "full_name": repo_info.get("full_name"),
-                    "description": repo_info.get("description"),
-                    "stars": repo_info.get("stargazers_count"),
-                    "language": repo_info.get("language")
-                }
-            }, ensure_ascii=False)
-            
-        except Exception as api_error:
-            # Xóa session nếu không thể kết nối
-            session_manager.delete_session(session_id)
-            return json.dumps({
-                "success": False,
-                "error": f"Không thể kết nối tới GitHub với token này: {str(api_error)}"
-            }, ensure_ascii=False)
-            
-    except Exception as e:
-        return json.dumps({
-            "success": False,
-            "error": f"Lỗi khi tạo session: {str(e)}"
-        }, ensure_ascii=False)
+            return None
+        owner, repo = url_validation["owner"], url_validation["repo"]
+    return RepoContext(owner, repo)
 
 
-def get_repository_info_session(session_id: str) -> str:
+def _session_ref(session_id: str, client: GitHubAPIClient, context: RepoContext, ref: str,
+                 pin_head: bool = False) -> str:
     """
-    Lấy thông tin repository sử dụng session
+    Resolve ref của tool theo context của session
+    
+    Ref trỏ tới default branch (rỗng, "HEAD" hoặc tên default branch) được
+    thay bằng head SHA còn hạn, nếu không thì bằng tên default branch thật. Context
+    thay đổi được lưu lại vào session
     
     Args:
         session_id: ID của session
+        client: GitHub API client của session
+        context: Context repository của session
+        ref: Ref truyền vào tool
+        pin_head: Resolve lại head SHA khi đã hết hạn (tool cần commit SHA, ví dụ tree index)
         
     Returns:
-        JSON string chứa thông tin repository
+        Ref dùng để gọi API
     """
-    try:
-        session_info = session_manager.get_session_info(session_id)
-        if not session_info:
-            return json.dumps({
-                "success": False,
-                "error": "Session không tồn tại hoặc đã hết hạn"
-            }, ensure_ascii=False)
-        
-        client = create_github_client(session_id)
-        
-        # Parse owner/repo từ GitHub URL
-        url_validation = validate_github_url(session_info["github_url"])
-        if not url_validation["valid"]:
-            return json.dumps({
-                "success": False,
-                "error": "GitHub URL trong session không hợp lệ"
-            }, ensure_ascii=False)
-        
-        repo_info = client.get_repository_info(url_validation["owner"], url_validation["repo"])
-        
-        return json.dumps({
-            "success": True,
-            "repository": repo_info
-        }, ensure_ascii=False)
-        
-    except Exception as e:
-        return json.dumps({
-            "success": False,
-            "error": f"Lỗi khi lấy thông tin repository: {str(e)}"
-        }, ensure_ascii=False)
+    if not context.is_default_ref(ref):
+        return ref
+    
+    changed = False
+    if not context.default_branch:
+        repo_info = client.get_repository_info(context.owner, context.repo)
+        context.default_branch = repo_info.get("default_branch") or ""
+        repo_context_stats.record(session_id, context_resolves=1)
+        changed = True
+    if context.head_is_fresh():
+        repo_context_stats.record(session_id, head_hits=1)
+    elif pin_head and context.default_branch:
+        context.head_sha = client.resolve_commit_sha(context.owner, context.repo, context.default_branch)
+        context.head_resolved_at = time.time()
+        repo_context_stats.record(session_id, head_resolves=1)
+        changed = True
+    if changed:
+        session_manager.update_session(session_id, **{CONTEXT_FIELD: context.to_fields()})
+    
+    repo_context_stats.record(session_id, default_refs=1)
+    return context.resolve_ref(ref)
 
 
-def clone_repository_session(session_id: str, destination_path: Optional[str] = None) -> str:
+def _prefetch_steps(session_id: str) -> List[PrefetchStep]:
     """
-    Clone repository sử dụng session
-    
-    Args:
-        session_id: ID của session
-        destination_path: Đường dẫn đích (optional)
-        
-    Returns:
-        JSON string chứa thông tin về quá trình clone
+    Các bước prefetch sau khi tạo session, theo thứ tự ưu tiên: head SHA của
+    default branch, tree index root, README ở root và trang PR đầu tiên (cùng
+    tham số mặc định với list_pull_requests_session để dùng lại ETag cache)
+
+    Các bước không đi qua _resolve_session_context nên không được tính là tool
+    call (idle detection dựa trên tool call thật)
     """
-    try:
-        session_info = session_manager.get_session_info(session_id)
-        if not session_info:
-            return json.dumps({
-                "success": False,
-                "error": "Session không tồn tại hoặc đã hết hạn"
-            }, ensure_ascii=False)
-        
-        client = create_github_client(session_id)
-        
-        # Parse owner/repo từ GitHub URL
-        url_validation = validate_github_url(session_info["github_url"])
-        if not url_validation["valid"]:
-            return json.dumps({
-                "success": False,
-                "error": "GitHub URL trong session không hợp lệ"
-            }, ensure_ascii=False)
-        
-        result = client.clone_repository(
-            url_validation["owner"], 
-            url_validation["repo"], 
-            destination_path
-        )
-        
-        return json.dumps(result, ensure_ascii=False)
-        
-    except Exception as e:
-        return json.dumps({
-            "success": False,
-            "error": f"Lỗi khi clone repository: {str(e)}"
-        }, ensure_ascii=False)
+    state: Dict[str, Any] = {}
+
+    def session():
+        if "context" not in state:
+            session_info = session_manager.get_session_info(session_id)
+            if not session_info:
+                raise ValueError("Session không tồn tại hoặc đã hết hạn")
+            state["client"] = create_github_client(session_id)
+            state["context"] = load_session_context(session_info)
+        return state["client"], state["context"]
 
+    def head():
+        client, context = session()
+        state["ref"] = _session_ref(session_id, client, context, "", pin_head=True)
 
-def get_repository_content_session(session_id: str, path: str = "", ref: str = "main") -> str:
+    def tree():
+        client, context = session()
+        state["index"] = client.get_tree_index(context.owner, context.repo, state["ref"])
+
+    def readme():
+        client, context = session()
+        for entry in state["index"].list_directory("") or []:
+            if entry.type == "blob" and entry.name.lower().startswith("readme"):
+                client.read_file(context.owner, context.repo, entry.path, state["ref"])
+                break
+
+    def pull_requests():
+        client, context = session()
+        client.list_pull_requests(context.owner, context.repo, "open", 10)
+
+    return [("head", head), ("tree", tree), ("readme", readme), ("pull_requests", pull_requests)]
+
+
+def start_session_prefetch(session_id: str, token: str) -> bool:
     """
-    Lấy nội dung thư mục/file trong repository sử dụng session
-    
+    Bắt đầu prefetch nền cho session vừa tạo nếu GITHUB_AGENT_PREFETCH được bật
+
     Args:
         session_id: ID của session
-        path: Đường dẫn file/folder (mặc định là root)
-        ref: Branch/commit reference (mặc định là main)
-        
+        token: Token của session (scope để kiểm tra rate limit budget)
+
     Returns:
-        JSON string chứa thông tin files/folders
+        True nếu prefetch được bắt đầu
     """
-    try:
-        session_info = session_manager.get_session_info(session_id)
-        if not session_info:
-            return json.dumps({
-                "success": False,
-                "error": "Session không tồn tại hoặc đã hết hạn"
-            }, ensure_ascii=False)
-        
-        client = create_github_client(session_id)
-        
-        # Parse owner/repo từ GitHub URL
-        url_validation = validate_github_url(session_info["github_url"])
-        if not url_validation["valid"]:
-            return json.dumps({
-                "success": False,
-                "error": "GitHub URL trong session không hợp lệ"
-            }, ensure_ascii=False)
-        
-        content = client.get_repository_content(
-            url_validation["owner"], 
-            url_validation["repo"], 
-            path, 
-            ref
-        )
-        
-        return json.dumps({
-            "success": True,
-            "content": content
-        }, ensure_ascii=False)
-        
-    except Exception as e:
-        return json.dumps({
-            "success": False,
-            "error": f"Lỗi khi lấy nội dung repository: {str(e)}"
-        }, ensure_ascii=False)
+    if not PREFETCH_ENABLED:
+        return False
+    return get_prefetcher().start(session_id, token_scope(token), _prefetch_steps(session_id))
 
 
-def get_file_content_session(session_id: str, path: str, ref: str = "main") -> str:
+def format_tree_listing(index: RepositoryTreeIndex, path: str = "", pattern: str = "",
+                        max_entries: int = 500) -> Dict[str, Any]:
     """
-    Lấy nội dung file cụ thể trong repository sử dụng session
+    Lọc tree index theo path/pattern và format kết quả cho tool
     
     Args:
-        session_id: ID của session
-        path: Đường dẫn tới file
-        ref: Branch/commit reference
+        index: Tree index của commit
+        path: Chỉ lấy entry nằm dưới thư mục này
+        pattern: Glob pattern (ví dụ "*.py", "src/**/test_*.py")
+        max_entries: Số entry tối đa trả về
         
     Returns:
-        JSON string chứa nội dung file
+        Dict chứa summary, entries và cờ truncated
     """
-    try:
-        session_info = session_manager.get_session_info(session_id)
-        if not session_info:
-            return json.dumps({
-                "success": False,
-                "error": "Session không tồn tại hoặc đã hết hạn"
-            }, ensure_ascii=False)
-        
-        client = create_github_client(session_id)
-        
-        # Parse owner/repo từ GitHub URL
-        url_validation = validate_github_url(session_info["github_url"])
-        if not url_validation["valid"]:
-            return json.dumps({
-                "success": False,
-                "error": "GitHub URL trong session không hợp lệ"
-            }, ensure_ascii=False)
-        
-        file_info = client.get_file_content(
-            url_validation["owner"], 
-            url_validation["repo"], 
-            path, 
-            ref
-        )
-        
-        return json.dumps({
-            "success": True,
-            "file": file_info
-        }, ensure_ascii=False)
-        
-    except Exception as e:
-        return json.dumps({
-            "success": False,
-            "error": f"Lỗi khi lấy nội dung file: {str(e)}"
-        }, ensure_ascii=False)
-
-
-def list_pull_requests_session(session_id: str, state: str = "open", per_page: int = 10) -> str:
+    path = path.strip("/")
+    if pattern:
+        entries = index.glob(pattern)
+        if path:
+            entries = [entry for entry in entries if entry.path.startswith(path + "/")]
+    elif path:
+        entries = index.find_prefix(path + "/")
+    else:
+        entries = index.find_prefix("")
+    
+    max_entries = max(1, max_entries)
+    return {
+        "success": True,
+        "summary": index.summary(),
+        "entries": [
+            {"path": entry.path, "type": entry.type, "size": entry.size}
+            for entry in entries[:max_entries]
+        ],
+        "count": min(len(entries), max_entries),
+        "total_matches": len(entries),
+        "truncated": len(entries) > max_entries
+    }
+
+
+def build_pull_request_diff_result(number: int, pr_call: CallResult, files: List[DiffFile], source: str,
+                                   path_glob: str = "", file_offset: int = 0,
+                                   max_files: int = DEFAULT_DIFF_MAX_FILES,
+                                   max_tokens: int = DEFAULT_DIFF_MAX_TOKENS) -> Dict[str, Any]:
     """
-    Liệt kê pull requests sử dụng session
+    Dựng kết quả của tool diff: thông tin PR và một trang file đã parse
     
     Args:
-        session_id: ID của session
-        state: Trạng thái PR (open, closed, all)
-        per_page: Số PR trên mỗi page
+        number: Số của pull request
+        pr_call: Kết quả lấy thông tin pull request (lỗi thì vẫn trả về diff, kèm partial_errors)
+        files: Các file đã parse từ diff
+        source: Nguồn diff ("diff" hoặc "files_api" khi diff vượt giới hạn của GitHub)
+        path_glob, file_offset, max_files, max_tokens: Tham số phân trang (xem diff_parser.build_diff_page)
         
     Returns:
-        JSON string chứa danh sách pull requests
+        Dict kết quả
     """
-    try:
-        session_info = session_manager.get_session_info(session_id)
-        if not session_info:
-            return json.dumps({
-                "success": False,
-                "error": "Session không tồn tại hoặc đã hết hạn"
-            }, ensure_ascii=False)
-        
-        client = create_github_client(session_id)
-        
-        # Parse owner/repo từ GitHub URL
-        url_validation = validate_github_url(session_info["github_url"])
-        if not url_validation["valid"]:
-            return json.dumps({
-                "success": False,
-                "error": "GitHub URL trong session không hợp lệ"
-            }, ensure_ascii=False)
-        
-        pull_requests = client.list_pull_requests(
-            url_validation["owner"], 
-            url_validation["repo"], 
-            state, 
-            per_page
-        )
-        
-        return json.dumps({
-            "success": True,
-            "pull_requests": pull_requests,
-            "count": len(pull_requests)
-        }, ensure_ascii=False)
-        
-    except Exception as e:
-        return json.dumps({
-            "success": False,
-            "error": f"Lỗi khi lấy danh sách pull requests: {str(e)}"
-        }, ensure_ascii=False)
-
-
-def get_pull_request_session(session_id: str, number: int) -> str:
+    page = build_diff_page(files, path_glob, file_offset, max_files, max_tokens)
+    pr_info = pr_call.value if pr_call.ok else {}
+    result = {
+        "success": True,
+        "pull_request": {
+            "number": number,
+            "title": pr_info.get("title"),
+            "state": pr_info.get("state"),
+            "user": (pr_info.get("user") or {}).get("login"),
+            "created_at": pr_info.get("created_at"),
+            "updated_at": pr_info.get("updated_at"),
+            "commits": pr_info.get("commits"),
+            "additions": pr_info.get("additions"),
+            "deletions": pr_info.get("deletions"),
+            "changed_files": pr_info.get("changed_files"),
+            "body": pr_info.get("body"),
+            "html_url": pr_info.get("html_url"),
+        },
+        "source": source,
+        **page
+    }
+    if not pr_call.ok:
+        result["partial_errors"] = {"pull_request": str(pr_call.error)}
+    return result
+
+
+def resolve_checkout_path(session_id: str, repo: str, local_path: str = "") -> Tuple[str, Optional[Dict[str, Any]]]:
     """
-    Lấy thông tin chi tiết pull request sử dụng session
+    Tìm thư mục clone của session
+    
+    local_path do model truyền vào phải nằm trong thư mục clone của session: session
+    không được index/đọc bản clone của session khác (token khác) hay checkout bất kỳ
+    trên server
     
     Args:
         session_id: ID của session
-        number: Số của pull request
+        repo: Tên repository
+        local_path: Thư mục clone trong thư mục của session (mặc định: bản clone mặc định)
         
     Returns:
-        JSON string chứa thông tin chi tiết pull request
+        Tuple (checkout_path, error) - error là None nếu bản clone tồn tại
     """
-    try:
-        session_info = session_manager.get_session_info(session_id)
-        if not session_info:
-            return json.dumps({
+    checkout_path = build_clone_path(session_id, repo)
+    if local_path:
+        clone_root = os.path.realpath(session_clone_root(session_id))
+        checkout_path = os.path.realpath(os.path.join(clone_root, local_path))
+        if os.path.commonpath([clone_root, checkout_path]) != clone_root:
+            return local_path, {
                 "success": False,
-                "error": "Session không tồn tại hoặc đã hết hạn"
-            }, ensure_ascii=False)
-        
-        client = create_github_client(session_id)
-        
-        # Parse owner/repo từ GitHub URL
-        url_validation = validate_github_url(session_info["github_url"])
-        if not url_validation["valid"]:
-            return json.dumps({
-                "success": False,
-                "error": "GitHub URL trong session không hợp lệ"
-            }, ensure_ascii=False)
-        
-        pull_request = client.get_pull_request(
-            url_validation["owner"], 
-            url_validation["repo"], 
-            number
-        )
-        
-        return json.dumps({
-            "success": True,
-            "pull_request": pull_request
-        }, ensure_ascii=False)
-        
-    except Exception as e:
-        return json.dumps({
+                "error": f"local_path phải nằm trong thư mục clone của session ({clone_root})"
+            }
+    if not os.path.isdir(os.path.join(checkout_path, ".git")):
+        return checkout_path, {
             "success": False,
-            "error": f"Lỗi khi lấy thông tin pull request: {str(e)}"
-        }, ensure_ascii=False)
+            "error": f"Chưa có bản clone tại {checkout_path}, hãy clone repository trước"
+        }
+    return checkout_path, None
 
 
-def get_pull_request_diff_session(session_id: str, number: int) -> str:
+def search_local_code(session_id: str, owner: str, repo: str, query: str, local_path: str = "",
+                      **kwargs) -> Dict[str, Any]:
     """
-    Lấy diff của pull request sử dụng session, output dạng markdown
+    Tìm kiếm trong thư mục clone của session (async_tools chạy trong thread pool)
     
     Args:
         session_id: ID của session
-        number: Số của pull request
+        owner: Tên owner của repository
+        repo: Tên repository
+        query: Chuỗi cần tìm hoặc regex
+        local_path: Thư mục clone trong thư mục của session (mặc định: bản clone mặc định)
+        **kwargs: Tham số của code_index.search_index
         
     Returns:
-        String chứa diff formatted dạng markdown
+        Dict kết quả
     """
-    try:
-        session_info = session_manager.get_session_info(session_id)
-        if not session_info:
-            return json.dumps({
-                "success": False,
-                "error": "Session không tồn tại hoặc đã hết hạn"
-            }, ensure_ascii=False)
-        
-        client = create_github_client(session_id)
-        
-        # Parse owner/repo từ GitHub URL
-        url_validation = validate_github_url(session_info["github_url"])
-        if not url_validation["valid"]:
-            return json.dumps({
-                "success": False,
-                "error": "GitHub URL trong session không hợp lệ"
-            }, ensure_ascii=False)
-        
-        # Lấy thông tin PR trước
-        pr_info = client.get_pull_request(
-            url_validation["owner"], 
-            url_validation["repo"], 
-            number
-        )
-        
-        # Lấy diff của PR
-        diff_content = client.get_pull_request_diff(
-            url_validation["owner"], 
-            url_validation["repo"], 
-            number
-        )
-        
-        # Format thành markdown
-        markdown_output = f"""# Pull Request #{number}: {pr_info.get('title', 'N/A')}
+    if not query:
+        return {"success": False, "error": "query không được để trống"}
+    checkout_path, error = resolve_checkout_path(session_id, repo, local_path)
+    if error:
+        return error
+    result = get_code_index_manager().search(f"{owner}/{repo}", checkout_path, query, **kwargs)
+    return {"success": True, "local_path": checkout_path, **result}
 
-## Thông tin chi tiết
-- **Trạng thái**: {pr_info.get('state', 'N/A')}
-- **Người tạo**: {pr_info.get('user', {}).get('login', 'N/A')}
-- **Ngày tạo**: {pr_info.get('created_at', 'N/A')}
-- **Ngày cập nhật**: {pr_info.get('updated_at', 'N/A')}
-- **Commits**: {pr_info.get('commits', 'N/A')}
-- **Additions**: +{pr_info.get('additions', 'N/A')}
-- **Deletions**: -{pr_info.get('deletions', 'N/A')}
-- **Changed files**: {pr_info.get('changed_files', 'N/A')}
 
-## Mô tả
-{pr_info.get('body', 'Không có mô tả')}
-
-## Changes (Diff)
-
-```diff
-{diff_content}
-```
-
-[Xem trên GitHub]({pr_info.get('html_url', '#')})
-"""
-        
-        return markdown_output
-        
-    except Exception as e:
-        return f"❌ **Lỗi khi lấy diff pull request**: {str(e)}"
-
-
-def search_code_session(session_id: str, query: str) -> str:
+def search_relevant_code(session_id: str, owner: str, repo: str, question: str, local_path: str = "",
+                         **kwargs) -> Dict[str, Any]:
     """
-    Tìm kiếm code trong repository sử dụng session
+    Xếp hạng chunk trong thư mục clone của session theo BM25 (async_tools chạy trong thread pool)
     
     Args:
         session_id: ID của session
-        query: Từ khóa tìm kiếm
+        owner: Tên owner của repository
+        repo: Tên repository
+        question: Câu hỏi hoặc từ khóa
+        local_path: Thư mục clone trong thư mục của session (mặc định: bản clone mặc định)
+        **kwargs: Tham số của bm25_index.search_bm25
         
     Returns:
-        JSON string chứa kết quả tìm kiếm
+        Dict kết quả
     """
-    try:
-        session_info = session_manager.get_session_info(session_id)
-        if not session_info:
-            return json.dumps({
-                "success": False,
-                "error": "Session không tồn tại hoặc đã hết hạn"
-            }, ensure_ascii=False)
-        
-        client = create_github_client(session_id)
-        
-        # Parse owner/repo từ GitHub URL
-        url_validation = validate_github_url(session_info["github_url"])
-        if not url_validation["valid"]:
-            return json.dumps({
-                "success": False,
-                "error": "GitHub URL trong session không hợp lệ"
-            }, ensure_ascii=False)
-        
-        search_results = client.search_code(
-            query, 
-            url_validation["owner"], 
-            url_validation["repo"]
-        )
-        
-        return json.dumps({
-            "success": True,
-            "search_results": search_results
-        }, ensure_ascii=False)
-        
-    except Exception as e:
-        return json.dumps({
-            "success": False,
-            "error": f"Lỗi khi tìm kiếm code: {str(e)}"
-        }, ensure_ascii=False)
+    if not question:
+        return {"success": False, "error": "question không được để trống"}
+    checkout_path, error = resolve_checkout_path(session_id, repo, local_path)
+    if error:
+        return error
+    result = get_bm25_index_manager().search(f"{owner}/{repo}", checkout_path, question, **kwargs)
+    return {"success": True, "local_path": checkout_path, **result}
 
 
 def list_sessions() -> str:
@@ -612,6 +452,35 @@ def list_sessions() -> str:
         }, ensure_ascii=False)
 
 
+def release_session_resources(session_id: str, session_info: SessionRecord) -> None:
+    """
+    Expiry hook: giải phóng tài nguyên của session đã hết hạn
+
+    Xóa thống kê của session, thư mục clone mặc định và index trong bộ nhớ của
+    các bản clone đó. Cache theo token (response cache, ref đã resolve) chỉ bị
+    xóa khi không còn session nào dùng token
+
+    Args:
+        session_id: ID của session
+        session_info: Record của session đã bị xóa
+    """
+    get_prefetcher().cancel(session_id)
+    repo_context_stats.forget(session_id)
+    clone_root = session_clone_root(session_id)
+    get_code_index_manager().forget_checkouts(clone_root)
+    get_bm25_index_manager().forget_checkouts(clone_root)
+    shutil.rmtree(clone_root, ignore_errors=True)
+
+    token = session_info["token"]
+    if not session_manager.token_in_use(token):
+        scope = token_scope(token)
+        get_response_cache().invalidate_scope(scope)
+        get_tree_index_cache().forget_scope(scope)
+
+
+session_manager.add_expiry_hook(release_session_resources)
+
+
 def cleanup_expired_sessions(max_age_hours: int = 24) -> str:
     """
     Xóa các session hết hạn
@@ -637,6 +506,43 @@ def cleanup_expired_sessions(max_age_hours: int = 24) -> str:
         }, ensure_ascii=False)
 
 
+def get_github_api_stats() -> str:
+    """
+    Lấy thống kê runtime của tầng gọi GitHub API (connection pool...)
+    
+    Returns:
+        JSON string chứa thống kê
+    """
+    try:
+        return json.dumps({
+            "success": True,
+            # Tool call đi qua pool async; pool sync chỉ còn prefetch và warm pool
+            "http_pool": {
+                "async": get_async_transport_stats(),
+                "sync": get_transport().get_stats()
+            },
+            "response_cache": get_response_cache().get_stats(),
+            "rate_limit": get_rate_limit_scheduler().get_stats(),
+            "tree_index": get_tree_index_cache().get_stats(),
+            "blob_cache": get_blob_cache().get_stats(),
+            "mirrors": get_mirror_cache().get_stats(),
+            "code_index": get_code_index_manager().get_stats(),
+            "bm25_index": get_bm25_index_manager().get_stats(),
+            "fanout": fanout_stats.get_stats(),
+            "sessions": session_manager.get_stats(),
+            "repo_context": repo_context_stats.get_stats(),
+            "single_flight": single_flight_stats(),
+            "prefetch": get_prefetcher().get_stats(),
+            "warm_pool": warm_pool_stats()
+        }, ensure_ascii=False)
+        
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Lỗi khi lấy thống kê: {str(e)}"
+        }, ensure_ascii=False)
+
+
 def show_github_setup_guide() -> str:
     """
     Hiển thị hướng dẫn setup GitHub Personal Access Token
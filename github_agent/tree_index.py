@@ -0,0 +1,360 @@
+"""
+Path index cho toàn bộ cây thư mục của một commit (Git Trees API)
+Một lần gọi recursive tree cho cả repository, sau đó các lần liệt kê
+thư mục/glob/prefix cho cùng commit SHA được trả lời hoàn toàn local
+"""
+import bisect
+import fnmatch
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+# Số tree index (theo commit) được giữ trong bộ nhớ
+DEFAULT_MAX_INDEXES = int(os.getenv("GITHUB_AGENT_TREE_INDEX_MAX", "32"))
+# Thời gian tin cậy kết quả resolve ref (branch/tag) -> commit SHA (giây)
+DEFAULT_REF_TTL = float(os.getenv("GITHUB_AGENT_REF_TTL", "60"))
+# Số request Git Trees tối đa khi phải walk subtree (recursive tree bị truncated)
+DEFAULT_MAX_TREE_WALKS = int(os.getenv("GITHUB_AGENT_TREE_MAX_WALKS", "200"))
+# Số request Git Trees chạy song song khi walk subtree bằng client async
+TREE_WALK_CONCURRENCY = int(os.getenv("GITHUB_AGENT_TREE_WALK_CONCURRENCY", "8"))
+
+
+class TreeEntry:
+    """Một entry trong git tree"""
+
+    __slots__ = ("path", "type", "size", "sha", "mode")
+
+    def __init__(self, path: str, type: str, sha: str, size: Optional[int] = None, mode: str = ""):
+        self.path = path
+        self.type = type  # blob, tree hoặc commit (submodule)
+        self.sha = sha
+        self.size = size
+        self.mode = mode
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"path": self.path, "type": self.type, "size": self.size, "sha": self.sha}
+
+    def to_content_item(self) -> Dict[str, Any]:
+        """Chuyển sang dạng giống item của contents API"""
+        content_type = {"blob": "file", "tree": "dir", "commit": "submodule"}.get(self.type, self.type)
+        if self.mode == "120000":
+            content_type = "symlink"
+        return {
+            "name": self.name,
+            "path": self.path,
+            "type": content_type,
+            "size": self.size or 0,
+            "sha": self.sha,
+        }
+
+
+def _expand_globstar(pattern: str) -> List[str]:
+    """
+    Các biến thể của pattern với mỗi `**/` được giữ nguyên hoặc bỏ đi
+
+    fnmatch cần ít nhất một thư mục cho `**/`; biến thể bỏ `**/` khớp trường hợp
+    không có thư mục nào
+    """
+    variants = [""]
+    parts = pattern.split("**/")
+    for part in parts[:-1]:
+        variants = [prefix + part + globstar for prefix in variants for globstar in ("**/", "")]
+    return list(dict.fromkeys(prefix + parts[-1] for prefix in variants))
+
+
+class RepositoryTreeIndex:
+    """Index in-memory của toàn bộ cây thư mục tại một commit"""
+
+    def __init__(self, commit_sha: str, entries: Iterable[TreeEntry], truncated: bool = False):
+        """
+        Args:
+            commit_sha: SHA của commit
+            entries: Các entry của tree (path đầy đủ từ root)
+            truncated: Index không đầy đủ (GitHub cắt bớt và không walk được hết)
+        """
+        self.commit_sha = commit_sha
+        self.truncated = truncated
+        self._entries: Dict[str, TreeEntry] = {entry.path: entry for entry in entries}
+        self._paths: List[str] = sorted(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str) -> Optional[TreeEntry]:
+        """Lấy entry theo path chính xác"""
+        return self._entries.get(path.strip("/"))
+
+    def find_prefix(self, prefix: str) -> List[TreeEntry]:
+        """
+        Lấy tất cả entry có path bắt đầu bằng prefix (bisect trên path đã sort)
+
+        Args:
+            prefix: Prefix của path, ví dụ "src/" hoặc "src/main"
+
+        Returns:
+            List entry theo thứ tự path
+        """
+        prefix = prefix.lstrip("/")
+        start = bisect.bisect_left(self._paths, prefix)
+        result = []
+        for path in self._paths[start:]:
+            if not path.startswith(prefix):
+                break
+            result.append(self._entries[path])
+        return result
+
+    def list_directory(self, path: str = "") -> Optional[List[TreeEntry]]:
+        """
+        Liệt kê các entry con trực tiếp của một thư mục
+
+        Args:
+            path: Đường dẫn thư mục (rỗng là root)
+
+        Returns:
+            List entry, hoặc None nếu thư mục không tồn tại
+        """
+        path = path.strip("/")
+        if path:
+            entry = self._entries.get(path)
+            if entry is None or entry.type != "tree":
+                return None
+            prefix = path + "/"
+        else:
+            prefix = ""
+        return [entry for entry in self.find_prefix(prefix) if "/" not in entry.path[len(prefix):]]
+
+    def glob(self, pattern: str, entry_type: Optional[str] = None) -> List[TreeEntry]:
+        """
+        Tìm entry theo glob pattern trên toàn bộ path (`*` khớp cả `/`, `**/` khớp
+        không hoặc nhiều thư mục: "src/**/test_*.py" khớp cả "src/test_a.py")
+
+        Args:
+            pattern: Glob pattern, ví dụ "*.py" hoặc "src/**/test_*.py"
+            entry_type: Chỉ lấy blob hoặc tree
+
+        Returns:
+            List entry khớp pattern
+        """
+        pattern = pattern.lstrip("/")
+        # Pattern không có "/" thì so với tên file, giống .gitignore
+        match_name = "/" not in pattern
+        patterns = _expand_globstar(pattern)
+        result = []
+        for path in self._paths:
+            entry = self._entries[path]
+            if entry_type and entry.type != entry_type:
+                continue
+            target = entry.name if match_name else path
+            if any(fnmatch.fnmatchcase(target, variant) for variant in patterns):
+                result.append(entry)
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        """Thống kê số file/thư mục và tổng dung lượng"""
+        files = [entry for entry in self._entries.values() if entry.type == "blob"]
+        return {
+            "commit_sha": self.commit_sha,
+            "files": len(files),
+            "directories": sum(1 for entry in self._entries.values() if entry.type == "tree"),
+            "total_size": sum(entry.size or 0 for entry in files),
+            "truncated": self.truncated,
+        }
+
+
+def entries_from_tree(tree: List[Dict[str, Any]], base_path: str = "") -> List[TreeEntry]:
+    """
+    Chuyển response của Git Trees API thành TreeEntry
+
+    Args:
+        tree: Field "tree" của response
+        base_path: Path của tree cha (khi walk subtree)
+
+    Returns:
+        List TreeEntry với path đầy đủ từ root
+    """
+    prefix = f"{base_path}/" if base_path else ""
+    return [
+        TreeEntry(prefix + item["path"], item["type"], item["sha"], item.get("size"), item.get("mode", ""))
+        for item in tree
+    ]
+
+
+class TreeWalker:
+    """
+    Điều phối việc lấy tree của một commit, không tự thực hiện I/O
+
+    Bắt đầu bằng một recursive tree request. Nếu GitHub trả về truncated,
+    lấy lại tree đó dạng non-recursive rồi walk từng subtree (recursive),
+    lặp lại cho tới khi đủ hoặc hết budget request. Client sync/async gọi
+    next_requests() để biết cần lấy tree nào và feed() kết quả vào
+    """
+
+    def __init__(self, commit_sha: str, max_walks: int = DEFAULT_MAX_TREE_WALKS):
+        self.commit_sha = commit_sha
+        self.max_walks = max_walks
+        self.requests_made = 0
+        self.truncated = False
+        self._entries: List[TreeEntry] = []
+        # (base_path, tree_sha, recursive)
+        self._pending: List[Tuple[str, str, bool]] = [("", commit_sha, True)]
+
+    def next_requests(self) -> List[Tuple[str, str, bool]]:
+        """
+        Lấy các tree request cần thực hiện tiếp theo (có thể chạy song song)
+
+        Returns:
+            List (base_path, tree_sha, recursive); rỗng khi đã xong
+        """
+        budget = self.max_walks - self.requests_made
+        if budget <= 0 and self._pending:
+            self.truncated = True
+            self._pending = []
+        batch, self._pending = self._pending[:budget], self._pending[budget:]
+        self.requests_made += len(batch)
+        return batch
+
+    def feed(self, base_path: str, tree_sha: str, recursive: bool, response: Dict[str, Any]) -> None:
+        """
+        Nạp response của Git Trees API cho một request
+
+        Args:
+            base_path: Path của tree trong repository
+            tree_sha: SHA của tree đã request
+            recursive: Request có dùng recursive=1 không
+            response: JSON response
+        """
+        entries = entries_from_tree(response.get("tree", []), base_path)
+        if response.get("truncated"):
+            if recursive:
+                # Quá lớn cho một request: walk từng subtree
+                self._pending.append((base_path, tree_sha, False))
+                return
+            # Ngay cả một thư mục đơn cũng bị cắt bớt
+            self.truncated = True
+
+        self._entries.extend(entries)
+        if not recursive:
+            self._pending.extend((entry.path, entry.sha, True) for entry in entries if entry.type == "tree")
+
+    @property
+    def subtree_walks(self) -> int:
+        return max(0, self.requests_made - 1)
+
+    def build(self) -> RepositoryTreeIndex:
+        return RepositoryTreeIndex(self.commit_sha, self._entries, self.truncated)
+
+
+class TreeIndexCache:
+    """
+    LRU cache các tree index theo (owner, repo, commit SHA) và cache ref -> SHA có TTL
+
+    Index được pin (repository của warm pool) không bị LRU loại bỏ
+    """
+
+    def __init__(self, max_indexes: int = DEFAULT_MAX_INDEXES, ref_ttl: float = DEFAULT_REF_TTL):
+        self.max_indexes = max_indexes
+        self.ref_ttl = ref_ttl
+        self._indexes: "OrderedDict[Tuple[str, str, str], RepositoryTreeIndex]" = OrderedDict()
+        self._refs: Dict[Tuple[str, str, str, str], Tuple[str, float]] = {}
+        # (owner, repo) -> commit SHA của index đang được pin
+        self._pinned: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "builds": 0, "subtree_walks": 0}
+
+    def get(self, owner: str, repo: str, commit_sha: str) -> Optional[RepositoryTreeIndex]:
+        with self._lock:
+            index = self._indexes.get((owner, repo, commit_sha))
+            if index is None:
+                self._counters["misses"] += 1
+                return None
+            self._indexes.move_to_end((owner, repo, commit_sha))
+            self._counters["hits"] += 1
+            return index
+
+    def put(self, owner: str, repo: str, index: RepositoryTreeIndex, subtree_walks: int = 0) -> None:
+        with self._lock:
+            self._indexes[(owner, repo, index.commit_sha)] = index
+            self._indexes.move_to_end((owner, repo, index.commit_sha))
+            self._counters["builds"] += 1
+            self._counters["subtree_walks"] += subtree_walks
+            self._evict()
+
+    def _evict(self) -> None:
+        # Index được pin không tính vào max_indexes
+        pinned = {(owner, repo, commit_sha) for (owner, repo), commit_sha in self._pinned.items()}
+        limit = self.max_indexes + len(pinned.intersection(self._indexes))
+        for key in list(self._indexes):
+            if len(self._indexes) <= limit:
+                break
+            if key not in pinned:
+                del self._indexes[key]
+
+    def pin(self, owner: str, repo: str, commit_sha: str) -> None:
+        """Pin index của repository tại commit SHA (thay cho commit đã pin trước đó)"""
+        with self._lock:
+            self._pinned[(owner, repo)] = commit_sha
+            self._evict()
+
+    def unpin(self, owner: str, repo: str) -> None:
+        with self._lock:
+            self._pinned.pop((owner, repo), None)
+            self._evict()
+
+    def resolve_ref(self, scope: str, owner: str, repo: str, ref: str) -> Optional[str]:
+        """
+        Lấy commit SHA đã resolve gần đây cho ref (scope theo token)
+
+        Returns:
+            Commit SHA hoặc None nếu chưa có/hết TTL
+        """
+        with self._lock:
+            cached = self._refs.get((scope, owner, repo, ref))
+            if cached is None or time.monotonic() - cached[1] > self.ref_ttl:
+                return None
+            return cached[0]
+
+    def remember_ref(self, scope: str, owner: str, repo: str, ref: str, commit_sha: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._refs) >= 4096:
+                # Dọn các ref đã hết TTL để cache không phình vô hạn
+                self._refs = {key: value for key, value in self._refs.items() if now - value[1] <= self.ref_ttl}
+            self._refs[(scope, owner, repo, ref)] = (commit_sha, now)
+
+    def forget_scope(self, scope: str) -> int:
+        """Xóa các ref đã resolve của một token scope, trả về số ref đã xóa"""
+        with self._lock:
+            keys = [key for key in self._refs if key[0] == scope]
+            for key in keys:
+                del self._refs[key]
+            return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "indexes": len(self._indexes), "refs": len(self._refs),
+                    "pinned": len(self._pinned)}
+
+
+_tree_index_cache: Optional[TreeIndexCache] = None
+_tree_index_cache_lock = threading.Lock()
+
+
+def get_tree_index_cache() -> TreeIndexCache:
+    """
+    Lấy tree index cache dùng chung của process
+
+    Returns:
+        TreeIndexCache instance
+    """
+    global _tree_index_cache
+    if _tree_index_cache is None:
+        with _tree_index_cache_lock:
+            if _tree_index_cache is None:
+                _tree_index_cache = TreeIndexCache()
+    return _tree_index_cache
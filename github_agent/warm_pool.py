@@ -0,0 +1,260 @@
+"""
+Warm pool cho các repository được pin (GITHUB_AGENT_PINNED_REPOS)
+Các repository dùng hằng ngày được chuẩn bị ngay khi server khởi động: bare
+mirror (clone_repository chỉ còn fetch incremental + checkout local), tree index
+của default branch (được pin, không bị LRU loại bỏ) và metadata (repository
+info, head SHA) trong response cache. Một thread nền refresh định kỳ: mirror
+bằng `git fetch`, head SHA bằng conditional request (304 khi không đổi) và tree
+index chỉ build lại khi head đổi. Stats báo staleness và thời gian refresh.
+
+Cache theo token (metadata, ref đã resolve) thuộc về GITHUB_AGENT_PINNED_TOKEN;
+session dùng token khác vẫn resolve head SHA một lần bằng token của mình (kiểm
+tra quyền), sau đó dùng tree index và mirror chung
+"""
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .github_api_client import GitHubAPIClient
+from .mirror_cache import MirrorCache, get_mirror_cache
+from .tree_index import TreeIndexCache, get_tree_index_cache
+
+logger = logging.getLogger(__name__)
+
+# Danh sách repository pin: "owner/repo" hoặc URL GitHub, cách nhau bởi dấu phẩy/khoảng trắng
+PINNED_REPOS_ENV = "GITHUB_AGENT_PINNED_REPOS"
+# Token dùng để warm và refresh các repository pin
+PINNED_TOKEN_ENV = "GITHUB_AGENT_PINNED_TOKEN"
+# Chu kỳ refresh nền (giây), 0 để chỉ warm lúc khởi động
+WARM_POOL_REFRESH_INTERVAL = float(os.getenv("GITHUB_AGENT_PINNED_REFRESH_INTERVAL", "300"))
+
+_PINNED_REPO_RE = re.compile(r"^(?:(?:https?://)?(?:www\.)?github\.com/)?([\w.-]+)/([\w.-]+?)(?:\.git)?/?$")
+
+
+class WarmPoolError(ValueError):
+    """Cấu hình warm pool không hợp lệ"""
+
+
+def parse_pinned_repos(value: str) -> List[Tuple[str, str]]:
+    """
+    Parse danh sách repository pin
+
+    Args:
+        value: "owner/repo" hoặc URL GitHub, cách nhau bởi dấu phẩy hoặc khoảng trắng
+
+    Returns:
+        List (owner, repo) không trùng lặp, theo thứ tự khai báo
+
+    Raises:
+        WarmPoolError: Nếu có entry không hợp lệ
+    """
+    repos: List[Tuple[str, str]] = []
+    for entry in re.split(r"[,\s]+", value.strip()):
+        if not entry:
+            continue
+        match = _PINNED_REPO_RE.match(entry)
+        if not match:
+            raise WarmPoolError(f"Repository pin không hợp lệ: {entry!r} (cần owner/repo hoặc URL GitHub)")
+        repo = (match.group(1), match.group(2))
+        if repo not in repos:
+            repos.append(repo)
+    return repos
+
+
+class PinnedRepo:
+    """Trạng thái warm/refresh của một repository pin"""
+
+    __slots__ = ("owner", "repo", "default_branch", "head_sha", "refreshed_at", "last_duration",
+                 "refreshes", "head_changes", "failures", "last_error")
+
+    def __init__(self, owner: str, repo: str):
+        self.owner = owner
+        self.repo = repo
+        self.default_branch = ""
+        self.head_sha = ""
+        # Thời điểm refresh thành công gần nhất (wall clock), 0 nếu chưa warm
+        self.refreshed_at = 0.0
+        self.last_duration = 0.0
+        self.refreshes = 0
+        self.head_changes = 0
+        self.failures = 0
+        self.last_error = ""
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.owner}/{self.repo}"
+
+    def staleness(self) -> Optional[float]:
+        """Số giây kể từ lần refresh thành công gần nhất, None nếu chưa warm"""
+        return round(time.time() - self.refreshed_at, 1) if self.refreshed_at else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "repository": self.full_name,
+            "default_branch": self.default_branch,
+            "head_sha": self.head_sha,
+            "staleness_seconds": self.staleness(),
+            "last_refresh_seconds": round(self.last_duration, 3),
+            "refreshes": self.refreshes,
+            "head_changes": self.head_changes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class WarmPool:
+    """
+    Giữ mirror, tree index và metadata của các repository pin luôn sẵn sàng
+
+    Với nhiều worker process, mirror (trên disk) do process cha quản lý còn tree
+    index (trong bộ nhớ) do từng worker tự warm: chọn bằng mirrors/indexes
+    """
+
+    def __init__(self, repos: List[Tuple[str, str]], token: str, mirrors: bool = True, indexes: bool = True,
+                 interval: float = WARM_POOL_REFRESH_INTERVAL, client: Optional[GitHubAPIClient] = None,
+                 mirror_cache: Optional[MirrorCache] = None, tree_index_cache: Optional[TreeIndexCache] = None):
+        """
+        Args:
+            repos: Các repository (owner, repo)
+            token: GitHub PAT dùng để warm/refresh
+            mirrors: Tạo và fetch bare mirror
+            indexes: Warm metadata và tree index của default branch
+            interval: Chu kỳ refresh nền (giây), 0 để không refresh
+            client: GitHub API client (mặc định client không gắn session dùng token)
+            mirror_cache: Mirror cache (mặc định dùng chung)
+            tree_index_cache: Tree index cache (mặc định dùng chung)
+        """
+        self.repos = [PinnedRepo(owner, repo) for owner, repo in repos]
+        self.token = token
+        self.mirrors = mirrors
+        self.indexes = indexes
+        self.interval = interval
+        self.client = client or GitHubAPIClient("", token=token)
+        self.mirror_cache = mirror_cache or get_mirror_cache()
+        self.tree_index_cache = tree_index_cache or get_tree_index_cache()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, pinned: PinnedRepo) -> bool:
+        """
+        Warm hoặc refresh incremental một repository
+
+        Returns:
+            True nếu thành công (lỗi được ghi vào stats, không raise)
+        """
+        started = time.monotonic()
+        try:
+            if self.indexes:
+                repo_info = self.client.get_repository_info(pinned.owner, pinned.repo)
+                default_branch = repo_info.get("default_branch") or ""
+                head_sha = self.client.resolve_commit_sha(pinned.owner, pinned.repo, default_branch)
+                # Tree index theo SHA: chỉ build lại khi head đổi
+                self.client.get_tree_index(pinned.owner, pinned.repo, head_sha)
+                self.tree_index_cache.pin(pinned.owner, pinned.repo, head_sha)
+            if self.mirrors:
+                self.mirror_cache.ensure_mirror(pinned.owner, pinned.repo, self.token)
+        except Exception as e:
+            with self._lock:
+                pinned.failures += 1
+                pinned.last_error = str(e)
+            logger.warning("Warm pool: refresh %s lỗi (staleness_seconds=%s): %s",
+                           pinned.full_name, pinned.staleness(), e)
+            return False
+
+        duration = time.monotonic() - started
+        with self._lock:
+            if self.indexes:
+                if pinned.head_sha and head_sha != pinned.head_sha:
+                    pinned.head_changes += 1
+                pinned.default_branch, pinned.head_sha = default_branch, head_sha
+            pinned.refreshed_at = time.time()
+            pinned.last_duration = duration
+            pinned.refreshes += 1
+            pinned.last_error = ""
+        logger.info("Warm pool: refresh %s trong %.2fs", pinned.full_name, duration)
+        return True
+
+    def refresh_all(self) -> int:
+        """Refresh tuần tự mọi repository, trả về số repository thành công"""
+        return sum(self.refresh(pinned) for pinned in self.repos if not self._stop.is_set())
+
+    def start(self) -> None:
+        """Bắt đầu thread refresh nền (không làm gì nếu interval <= 0)"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="warm-pool-refresh", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.refresh_all()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            repos = [pinned.to_dict() for pinned in self.repos]
+        staleness = [repo["staleness_seconds"] for repo in repos]
+        return {
+            "mirrors": self.mirrors,
+            "indexes": self.indexes,
+            "refresh_interval": self.interval,
+            "max_staleness_seconds": None if None in staleness or not staleness else max(staleness),
+            "repositories": repos,
+        }
+
+
+_warm_pool: Optional[WarmPool] = None
+_warm_pool_lock = threading.Lock()
+
+
+def start_warm_pool(mirrors: bool = True, indexes: bool = True) -> Optional[WarmPool]:
+    """
+    Warm các repository pin từ cấu hình (đồng bộ) và bắt đầu refresh nền
+
+    Gọi một lần khi khởi động process; không có GITHUB_AGENT_PINNED_REPOS thì
+    không làm gì
+
+    Args:
+        mirrors: Quản lý bare mirror trong process này
+        indexes: Warm metadata và tree index trong process này
+
+    Returns:
+        WarmPool hoặc None nếu không có repository pin
+
+    Raises:
+        WarmPoolError: Nếu danh sách repository không hợp lệ hoặc thiếu token
+    """
+    global _warm_pool
+    repos = parse_pinned_repos(os.getenv(PINNED_REPOS_ENV, ""))
+    if not repos:
+        return None
+    token = os.getenv(PINNED_TOKEN_ENV, "").strip()
+    if not token:
+        raise WarmPoolError(f"{PINNED_REPOS_ENV} cần {PINNED_TOKEN_ENV} (GitHub PAT) để warm repository")
+
+    with _warm_pool_lock:
+        if _warm_pool is not None:
+            return _warm_pool
+        pool = WarmPool(repos, token, mirrors=mirrors, indexes=indexes)
+        started = time.monotonic()
+        warmed = pool.refresh_all()
+        logger.info("Warm pool: %d/%d repository sẵn sàng sau %.1fs",
+                       warmed, len(pool.repos), time.monotonic() - started)
+        pool.start()
+        _warm_pool = pool
+        return pool
+
+
+def warm_pool_stats() -> Dict[str, Any]:
+    """Stats của warm pool trong process này (rỗng nếu không có repository pin)"""
+    pool = _warm_pool
+    return pool.get_stats() if pool is not None else {}
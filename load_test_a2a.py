@@ -0,0 +1,132 @@
+"""
+Load test cho GitHub Agent A2A server
+Đo throughput (request/giây) và latency khi tăng số worker:
+
+    python -m github_agent --workers 4 --port 10003
+    python load_test_a2a.py --url http://localhost:10003 --concurrency 64 --duration 20
+
+Mặc định seed `--tasks` task đã hoàn thành vào task store dùng chung (SQLite
+trong `--state-dir`, phải trùng với server; với 1 worker server cũng phải chạy
+với `--state-dir`) rồi gửi `tasks/get` lần lượt theo
+các task đó, nên không tốn LLM quota và mọi worker đều phải đọc được task do
+process khác ghi. Response JSON-RPC có `error` (ví dụ TaskNotFound) bị tính là
+lỗi. `--method agent_card` chỉ đo tầng HTTP.
+
+Streaming (`message/stream`) và `tasks/resubscribe` không đo ở đây: event queue
+(QueueManager của DefaultRequestHandler) nằm trong bộ nhớ của worker đang chạy
+task nên chỉ worker đó phục vụ được
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import time
+import uuid
+from typing import Iterator, List, Optional
+
+import httpx
+from a2a.types import Task, TaskState, TaskStatus
+
+from github_agent.shared_state import DEFAULT_STATE_DIR, SQLiteTaskStore
+
+
+async def seed_tasks(state_dir: str, count: int) -> List[str]:
+    """
+    Ghi `count` task đã hoàn thành vào task store dùng chung của server
+
+    Returns:
+        List task ID đã ghi
+    """
+    task_store = SQLiteTaskStore(os.path.join(state_dir, "tasks.db"))
+    task_ids = []
+    for _ in range(count):
+        task = Task(
+            id=str(uuid.uuid4()),
+            contextId=str(uuid.uuid4()),
+            status=TaskStatus(state=TaskState.completed),
+        )
+        await task_store.save(task)
+        task_ids.append(task.id)
+    return task_ids
+
+
+def build_request(method: str, task_ids: Optional[Iterator[str]] = None):
+    if method == "agent_card":
+        return "GET", "/.well-known/agent.json", None
+    payload = {
+        "jsonrpc": "2.0",
+        "id": str(uuid.uuid4()),
+        "method": "tasks/get",
+        "params": {"id": next(task_ids)},
+    }
+    return "POST", "/", payload
+
+
+async def run_load_test(url: str, method: str, concurrency: int, duration: float,
+                        task_ids: Optional[List[str]] = None) -> dict:
+    """
+    Gửi request liên tục từ `concurrency` client trong `duration` giây
+
+    Args:
+        task_ids: Task đã seed, dùng xoay vòng cho `tasks/get`
+
+    Returns:
+        Dict chứa số request, lỗi, throughput và latency p50/p95
+    """
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    task_id_cycle = itertools.cycle(task_ids or [])
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                http_method, path, payload = build_request(method, task_id_cycle)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(http_method, path, json=payload)
+                    response.raise_for_status()
+                    # Lỗi JSON-RPC (TaskNotFound...) vẫn trả HTTP 200
+                    if payload is not None and "error" in response.json():
+                        errors += 1
+                        continue
+                except (httpx.HTTPError, ValueError):
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2) if latencies else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test GitHub Agent A2A server")
+    parser.add_argument("--url", default="http://localhost:10003")
+    parser.add_argument("--method", choices=["tasks_get", "agent_card"], default="tasks_get")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--state-dir", default=DEFAULT_STATE_DIR,
+                        help="State dir của server (để seed task cho tasks_get)")
+    parser.add_argument("--tasks", type=int, default=100, help="Số task seed cho tasks_get")
+    args = parser.parse_args()
+
+    task_ids = None
+    if args.method == "tasks_get":
+        task_ids = asyncio.run(seed_tasks(os.path.abspath(args.state_dir), max(1, args.tasks)))
+    result = asyncio.run(run_load_test(args.url, args.method, args.concurrency, args.duration, task_ids))
+    print(f"📊 {args.method} @ {args.url} ({args.concurrency} client, {args.duration:g}s)")
+    for key, value in result.items():
+        print(f"  {key}: {value}")